@@ -1,33 +1,56 @@
 from flask import Flask, request
-from flask_sqlalchemy import SQLAlchemy
-from flask_jwt_extended import JWTManager
 from flask_cors import CORS
+from werkzeug.middleware.proxy_fix import ProxyFix
 from config import Config
-from translations import translate
+from translations import catalog, check_translations
+from utils import get_language
+from otp_store import create_otp_store
+from cache import TTLCache
+from json_provider import FastJSONProvider
+from database import configure_database, install_engine_hooks, init_read_routing
+from extensions import db, jwt
+from instrumentation import init_instrumentation
+from compression import init_compression
+from ratelimit import init_rate_limiting
+from prefork import init_prefork
+from routing import LazyBuildRule
 
-# Initialize extensions
-db = SQLAlchemy()
-jwt = JWTManager()
-
-def get_language():
-    """Get language from request headers or default to English"""
-    lang = request.headers.get('Accept-Language', 'en')
-    if '-' in lang:
-        lang = lang.split('-')[0]
-    if lang not in ['en', 'ar']:
-        lang = 'en'
-    return lang
-
-def create_app():
+def create_app(config_class=Config):
     app = Flask(__name__)
-    app.config.from_object(Config)
+    app.url_rule_class = LazyBuildRule
+    app.config.from_object(config_class)
+    app.json = FastJSONProvider(app)
+    
+    # Real client address behind the load balancer
+    if app.config.get('PROXY_FIX_X_FOR'):
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=app.config['PROXY_FIX_X_FOR'])
     
     # Initialize extensions with app
+    configure_database(app)
     db.init_app(app)
+    install_engine_hooks(app, db)
+    init_prefork(app, db)
+    init_instrumentation(app, db)
+    init_read_routing(app)
     jwt.init_app(app)
     
     # Enable CORS
     CORS(app)
+    
+    # gzip/brotli compression of large responses
+    init_compression(app)
+    
+    # Per-client token buckets and load shedding, before any view work
+    init_rate_limiting(app)
+    
+    # OTP storage backend for password resets
+    app.extensions['otp_store'] = create_otp_store(app.config)
+    
+    # Facet counts for field listings, keyed by filter signature
+    app.extensions['facet_cache'] = TTLCache(
+        maxsize=app.config.get('FACET_CACHE_SIZE', 1024),
+        ttl=app.config.get('FACET_CACHE_TTL', 60)
+    )
 
     # ⭐⭐⭐ HEALTH CHECK ROUTE ⭐⭐⭐
     @app.route("/healthz")
@@ -55,6 +78,16 @@ def create_app():
     app.register_blueprint(notifications_bp, url_prefix='/api')
     app.register_blueprint(analytics_bp, url_prefix='/api')
 
+    # CLI commands (flask recompute-ratings, ...)
+    from commands import register_commands
+    register_commands(app)
+    
+    # Load every locale now, so forked workers share them, and report
+    # message keys used by the routes but missing from a locale
+    if app.config.get('TRANSLATIONS_PRELOAD', True):
+        catalog.preload()
+        check_translations(app)
+
     # Add language support to app context
     @app.before_request
     def before_request():
@@ -0,0 +1 @@
+"""Load-test scenarios and runner for the API (python -m benchmarks.run --help)"""
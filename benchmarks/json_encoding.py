@@ -0,0 +1,95 @@
+"""Micro-benchmark of list serialization: to_dict() + stdlib JSON vs rows + fast provider.
+
+    python -m benchmarks.json_encoding --profile small --rows 1000 --repeat 20
+
+Times building and encoding a page of bookings and fields three ways:
+
+  current   ORM objects -> to_dict() -> Flask's default JSON provider
+  provider  ORM objects -> to_dict() -> FastJSONProvider (orjson if installed)
+  rows      column projection -> Fieldset.dump() -> FastJSONProvider
+"""
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.run import generate_database  # noqa: E402
+
+DEFAULT_DATABASE = os.path.join(ROOT, 'instance', 'benchmark_json.db')
+
+
+def best_of(function, repeat):
+    """Fastest of `repeat` runs in milliseconds"""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        timings.append((time.perf_counter() - started) * 1000)
+    return min(timings)
+
+
+def main(argv=None):
+    from datagen import PROFILES
+
+    parser = argparse.ArgumentParser(description='Compare JSON serialization paths for list responses')
+    parser.add_argument('--database', default=DEFAULT_DATABASE, help='SQLite file to generate')
+    parser.add_argument('--no-generate', action='store_true', help='Reuse the existing database')
+    parser.add_argument('--profile', default='small', choices=sorted(PROFILES), help='Synthetic data set size')
+    parser.add_argument('--rows', type=int, default=1000, help='Rows per page')
+    parser.add_argument('--repeat', type=int, default=20, help='Runs per path, the best one is reported')
+    args = parser.parse_args(argv)
+
+    uri = 'sqlite:///' + args.database
+    if not args.no_generate:
+        uri = generate_database(args.database, args.profile, seed=0)
+
+    from flask.json.provider import DefaultJSONProvider
+    from sqlalchemy.orm import selectinload
+    from config import Config
+    from app import create_app
+    from models import db, Booking, Field
+    from json_provider import FastJSONProvider, orjson
+    from serialization import BOOKING_SCHEMA, FIELD_SCHEMA
+
+    class BenchmarkConfig(Config):
+        SQLALCHEMY_DATABASE_URI = uri
+        METRICS_ENABLED = False
+
+    app = create_app(BenchmarkConfig)
+    default_provider = DefaultJSONProvider(app)
+    fast_provider = FastJSONProvider(app)
+    print(f"Fast encoder: {'orjson ' + orjson.__version__ if fast_provider.use_orjson else 'standard library'}")
+
+    cases = [
+        ('bookings', Booking, [], BOOKING_SCHEMA.fieldset()),
+        ('fields', Field, [selectinload(Field.facilities)], FIELD_SCHEMA.fieldset(include=['facilities'])),
+    ]
+    with app.test_request_context():
+        print(f"{'':10} {'current':>10} {'provider':>10} {'rows':>10} {'speedup':>8}  (ms, best of {args.repeat})")
+        for name, model, options, fieldset in cases:
+            query = model.query.order_by(model.id).limit(args.rows)
+
+            def current():
+                items = [item.to_dict() for item in query.options(*options)]
+                db.session.expunge_all()
+                return default_provider.response({name: items}).get_data()
+
+            def provider():
+                items = [item.to_dict() for item in query.options(*options)]
+                db.session.expunge_all()
+                return fast_provider.response({name: items}).get_data()
+
+            def rows():
+                items = fieldset.dump(fieldset.select(query).all())
+                return fast_provider.response({name: items}).get_data()
+
+            timings = [best_of(path, args.repeat) for path in (current, provider, rows)]
+            print(f'{name:10} {timings[0]:10.2f} {timings[1]:10.2f} {timings[2]:10.2f} '
+                  f'{timings[0] / timings[2]:7.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,282 @@
+"""Run the load-test scenarios against a local gunicorn and compare with baselines.
+
+    python -m benchmarks.run --profile small --duration 10 --concurrency 8
+    python -m benchmarks.run --url http://127.0.0.1:8000 --no-generate --scenario field_search
+    python -m benchmarks.run --save-baseline        # record the current numbers
+
+By default a fresh SQLite database is generated with datagen, gunicorn is
+started on it, every scenario runs for --duration seconds with --concurrency
+client threads, and p50/p95/p99 latency and throughput are compared with
+benchmarks/baselines.json. The exit code is 1 when a scenario regressed.
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from datetime import date
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.scenarios import BenchmarkContext, get_scenarios  # noqa: E402
+
+DEFAULT_BASELINES = os.path.join(ROOT, 'benchmarks', 'baselines.json')
+DEFAULT_DATABASE = os.path.join(ROOT, 'instance', 'benchmark.db')
+
+
+def percentile(sorted_values, pct):
+    """Linear-interpolated percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = (len(sorted_values) - 1) * pct / 100.0
+    low = int(rank)
+    high = min(low + 1, len(sorted_values) - 1)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (rank - low)
+
+
+def summarize(latencies_ms, errors, elapsed):
+    """p50/p95/p99 latency in ms, throughput and error count for one scenario"""
+    latencies_ms = sorted(latencies_ms)
+    requests = len(latencies_ms)
+    return {
+        'requests': requests,
+        'errors': errors,
+        'rps': round(requests / elapsed, 2) if elapsed else 0.0,
+        'p50_ms': round(percentile(latencies_ms, 50), 2),
+        'p95_ms': round(percentile(latencies_ms, 95), 2),
+        'p99_ms': round(percentile(latencies_ms, 99), 2),
+    }
+
+
+def compare_to_baseline(results, baselines, tolerance=0.2):
+    """List of regression messages, empty when every scenario is within tolerance.
+
+    A scenario regresses when its p95 latency grows, or its throughput drops,
+    by more than `tolerance` relative to the baseline, or when it had errors.
+    """
+    regressions = []
+    for name, result in results.items():
+        if result['errors']:
+            regressions.append(f"{name}: {result['errors']} failed requests")
+        baseline = baselines.get(name)
+        if not baseline:
+            continue
+        if result['p95_ms'] > baseline['p95_ms'] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {result['p95_ms']}ms vs baseline {baseline['p95_ms']}ms")
+        if result['rps'] < baseline['rps'] * (1 - tolerance):
+            regressions.append(f"{name}: {result['rps']} req/s vs baseline {baseline['rps']} req/s")
+    return regressions
+
+
+def http_request(base_url, method, path, body=None, token=None, timeout=30):
+    """Send one request and return (status, body bytes)"""
+    headers = {'Content-Type': 'application/json'}
+    if token:
+        headers['Authorization'] = f'Bearer {token}'
+    data = json.dumps(body).encode('utf-8') if body is not None else None
+    req = urllib.request.Request(base_url + path, data=data, headers=headers, method=method)
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as response:
+            return response.status, response.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.read()
+
+
+def run_scenario(base_url, scenario, context, duration, concurrency, seed=0):
+    """Replay a scenario from `concurrency` threads for `duration` seconds"""
+    latencies, errors = [], [0]
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def worker(worker_id):
+        rng = random.Random(seed * 1000 + worker_id)
+        while time.perf_counter() < deadline:
+            method, path, body, role = scenario.build(context, rng)
+            token = context.tokens.get(role) if role else None
+            start = time.perf_counter()
+            try:
+                status, _ = http_request(base_url, method, path, body, token)
+            except OSError:
+                status = None
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            with lock:
+                latencies.append(elapsed_ms)
+                if status not in scenario.expected_status:
+                    errors[0] += 1
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return summarize(latencies, errors[0], time.perf_counter() - started)
+
+
+def generate_database(database_path, profile, seed):
+    """Create a fresh SQLite database filled by datagen and return its URI"""
+    from config import Config
+    from app import create_app
+    from models import db
+    from datagen import PROFILES, generate_dataset
+
+    if os.path.exists(database_path):
+        os.remove(database_path)
+    os.makedirs(os.path.dirname(database_path), exist_ok=True)
+    uri = 'sqlite:///' + database_path
+
+    class BenchmarkConfig(Config):
+        SQLALCHEMY_DATABASE_URI = uri
+
+    app = create_app(BenchmarkConfig)
+    with app.app_context():
+        db.create_all()
+        counts = generate_dataset(seed=seed, **PROFILES[profile])
+        print('Generated ' + ', '.join(f'{count} {table}' for table, count in counts.items()))
+    return uri
+
+
+def load_context(database_uri):
+    """Field ids plus a player and an owner account from the benchmark database"""
+    from config import Config
+    from app import create_app
+    from models import User, Field
+
+    class BenchmarkConfig(Config):
+        SQLALCHEMY_DATABASE_URI = database_uri
+
+    app = create_app(BenchmarkConfig)
+    with app.app_context():
+        field_ids = [field_id for (field_id,) in Field.query.with_entities(Field.id).order_by(Field.id)]
+        player = User.query.filter_by(role='user').order_by(User.id).first()
+        owner = User.query.filter_by(role='owner').order_by(User.id).first()
+        return field_ids, {'user': player.email, 'owner': owner.email}
+
+
+def login(base_url, email, password):
+    status, body = http_request(base_url, 'POST', '/api/login', {'email': email, 'password': password})
+    if status != 200:
+        raise RuntimeError(f'Login as {email} failed with {status}: {body[:200]!r}')
+    payload = json.loads(body)
+    # create_response() payloads are returned as [body, status]
+    payload = payload[0] if isinstance(payload, list) else payload
+    return payload['token']
+
+
+def start_gunicorn(database_uri, port, workers, threads, worker_class='gthread'):
+    """Start gunicorn with gunicorn.conf.py, overriding the worker model"""
+    env = dict(os.environ, DATABASE_URL=database_uri, WEB_CONCURRENCY=str(workers),
+               GUNICORN_THREADS=str(threads), GUNICORN_ACCESS_LOG='', SLOW_REQUEST_THRESHOLD_MS='60000',
+               RATELIMIT_ENABLED='false')
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'wsgi:app',
+         '--bind', f'127.0.0.1:{port}', '--worker-class', worker_class,
+         '--workers', str(workers), '--threads', str(threads),
+         '--log-level', 'warning'],
+        cwd=ROOT, env=env
+    )
+    base_url = f'http://127.0.0.1:{port}'
+    for _ in range(100):
+        if process.poll() is not None:
+            raise RuntimeError('gunicorn exited during startup')
+        try:
+            if http_request(base_url, 'GET', '/healthz', timeout=1)[0] == 200:
+                return process, base_url
+        except OSError:
+            pass
+        time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError('gunicorn did not become healthy')
+
+
+def load_baselines(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def print_results(results, baselines):
+    print(f"{'scenario':<22}{'reqs':>7}{'errors':>8}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+          f"{'base p95':>10}")
+    for name, result in results.items():
+        base = baselines.get(name, {}).get('p95_ms', '-')
+        print(f"{name:<22}{result['requests']:>7}{result['errors']:>8}{result['rps']:>10}"
+              f"{result['p50_ms']:>10}{result['p95_ms']:>10}{result['p99_ms']:>10}{base:>10}")
+
+
+def main(argv=None):
+    from datagen import DEFAULT_PASSWORD, PROFILES
+
+    parser = argparse.ArgumentParser(description='Load-test the API and compare with stored baselines')
+    parser.add_argument('--url', help='Benchmark a server that is already running instead of starting gunicorn')
+    parser.add_argument('--database', default=DEFAULT_DATABASE, help='SQLite file to generate and serve')
+    parser.add_argument('--database-uri', help='Benchmark an existing database (implies --no-generate)')
+    parser.add_argument('--no-generate', action='store_true', help='Reuse the existing benchmark database')
+    parser.add_argument('--profile', default='small', choices=sorted(PROFILES), help='Synthetic data set size')
+    parser.add_argument('--scenario', action='append', help='Scenario to run (repeatable, default: all)')
+    parser.add_argument('--duration', type=float, default=10.0, help='Seconds per scenario')
+    parser.add_argument('--concurrency', type=int, default=8, help='Client threads')
+    parser.add_argument('--workers', type=int, default=2, help='gunicorn workers')
+    parser.add_argument('--threads', type=int, default=4, help='gunicorn threads per worker')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--baselines', default=DEFAULT_BASELINES, help='Baseline JSON file')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='Allowed relative regression')
+    parser.add_argument('--save-baseline', action='store_true', help='Store these results as the new baseline')
+    parser.add_argument('--output', help='Also write the results to this JSON file')
+    args = parser.parse_args(argv)
+
+    scenarios = get_scenarios(args.scenario)
+
+    database_uri = args.database_uri or 'sqlite:///' + args.database
+    if not args.database_uri and not args.no_generate:
+        database_uri = generate_database(args.database, args.profile, args.seed)
+    field_ids, emails = load_context(database_uri)
+
+    process = None
+    base_url = args.url
+    if not base_url:
+        process, base_url = start_gunicorn(database_uri, args.port, args.workers, args.threads)
+
+    try:
+        tokens = {role: login(base_url, email, DEFAULT_PASSWORD) for role, email in emails.items()}
+        context = BenchmarkContext(field_ids, tokens, date.today())
+        results = {}
+        for scenario in scenarios:
+            results[scenario.name] = run_scenario(base_url, scenario, context, args.duration,
+                                                  args.concurrency, seed=args.seed)
+            print(f'{scenario.name}: done', file=sys.stderr)
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    baselines = load_baselines(args.baselines)
+    print_results(results, baselines)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.save_baseline:
+        baselines.update(results)
+        with open(args.baselines, 'w') as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+        print(f'Baseline saved to {args.baselines}')
+        return 0
+
+    regressions = compare_to_baseline(results, baselines, args.tolerance)
+    for message in regressions:
+        print('REGRESSION ' + message)
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,127 @@
+import itertools
+import threading
+from datetime import timedelta
+
+
+class Scenario:
+    """A named request pattern replayed by the load runner.
+
+    build(context, rng) returns (method, path, json_body, token_role) for one
+    request; token_role is a key of context.tokens or None for anonymous calls.
+    """
+
+    def __init__(self, name, build, expected_status=(200,)):
+        self.name = name
+        self.build = build
+        self.expected_status = expected_status
+
+
+class BenchmarkContext:
+    """Ids and tokens the scenarios pick from"""
+
+    def __init__(self, field_ids, tokens, today):
+        self.field_ids = field_ids
+        self.tokens = tokens
+        self.today = today
+        # Booking creation walks (field, day, hour) slots no generated booking uses
+        self._slots = itertools.count()
+        self._slots_lock = threading.Lock()
+
+    def next_free_slot(self):
+        with self._slots_lock:
+            n = next(self._slots)
+        hours = 14
+        field_id = self.field_ids[n % len(self.field_ids)]
+        day, hour = divmod(n // len(self.field_ids), hours)
+        return field_id, self.today + timedelta(days=400 + day), 8 + hour
+
+
+def _field_search(context, rng):
+    query = rng.choice([
+        '', 'governorate=cairo', 'governorate=giza&min_price=200', 'max_price=300', 'min_price=250&max_price=450',
+        'search=maadi', 'search=nasr+field', 'search=zay',
+        'facets=true', 'facets=true&governorate=cairo&max_price=300',
+        'fields=id,name,price_per_hour,average_rating',
+    ])
+    return 'GET', f'/api/fields?{query}&page={rng.randint(1, 5)}&per_page=20', None, None
+
+
+def _nearby_fields(context, rng):
+    lat = 30.0444 + rng.uniform(-0.1, 0.1)
+    lng = 31.2357 + rng.uniform(-0.1, 0.1)
+    radius = rng.choice([1, 2, 5])
+    return 'GET', f'/api/fields?near={lat:.5f},{lng:.5f}&radius_km={radius}&per_page=20', None, None
+
+
+def _availability(context, rng):
+    day = context.today + timedelta(days=rng.randint(0, 29))
+    hour = rng.randint(8, 20)
+    return ('GET', f'/api/fields/available?date={day.isoformat()}&start_time={hour:02d}:00'
+                   f'&end_time={hour + 1:02d}:00&per_page=20', None, None)
+
+
+def _field_availability(context, rng):
+    day = context.today + timedelta(days=rng.randint(0, 29))
+    field_id = rng.choice(context.field_ids)
+    return 'GET', f'/api/bookings/field/{field_id}/availability?date={day.isoformat()}', None, 'user'
+
+
+def _create_booking(context, rng):
+    field_id, day, hour = context.next_free_slot()
+    body = {'field_id': field_id, 'date': day.isoformat(),
+            'start_time': f'{hour:02d}:00', 'end_time': f'{hour + 1:02d}:00'}
+    return 'POST', '/api/bookings', body, 'user'
+
+
+def _club_search(context, rng):
+    query = rng.choice(['', 'governorate=cairo', 'governorate=giza', 'min_rating=3', 'name=Owner'])
+    return 'GET', f'/api/clubs/search?{query}&per_page=20', None, None
+
+
+def _top_rated_clubs(context, rng):
+    return 'GET', '/api/clubs/top-rated?limit=20', None, None
+
+
+def _analytics_dashboard(context, rng):
+    return 'GET', '/api/analytics/dashboard', None, 'owner'
+
+
+def _field_performance(context, rng):
+    return 'GET', '/api/analytics/fields/performance', None, 'owner'
+
+
+def _export_bookings(context, rng):
+    start = context.today - timedelta(days=60)
+    return 'GET', f'/api/analytics/export/bookings?start_date={start.isoformat()}', None, 'owner'
+
+
+def _export_payments(context, rng):
+    start = context.today - timedelta(days=60)
+    return 'GET', f'/api/analytics/export/payments?start_date={start.isoformat()}', None, 'owner'
+
+
+SCENARIOS = [
+    Scenario('field_search', _field_search),
+    Scenario('nearby_fields', _nearby_fields),
+    Scenario('available_fields', _availability),
+    Scenario('field_availability', _field_availability),
+    Scenario('create_booking', _create_booking, expected_status=(201,)),
+    Scenario('club_search', _club_search),
+    Scenario('top_rated_clubs', _top_rated_clubs),
+    Scenario('analytics_dashboard', _analytics_dashboard),
+    Scenario('field_performance', _field_performance),
+    Scenario('export_bookings', _export_bookings),
+    Scenario('export_payments', _export_payments),
+]
+
+
+def get_scenarios(names=None):
+    """Scenarios by name, all of them when names is empty"""
+    if not names:
+        return list(SCENARIOS)
+    by_name = {scenario.name: scenario for scenario in SCENARIOS}
+    unknown = [name for name in names if name not in by_name]
+    if unknown:
+        raise ValueError(f"Unknown scenario(s): {', '.join(unknown)}. Available: {', '.join(by_name)}")
+    return [by_name[name] for name in names]
+
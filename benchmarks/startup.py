@@ -0,0 +1,104 @@
+"""Measure application startup: importing app and calling create_app().
+
+    python -m benchmarks.startup --repeat 10
+    python -m benchmarks.startup --save-baseline
+    python -m benchmarks.startup --top 15        # slowest imports
+
+Every run is a fresh interpreter, so imports are not cached. The median of
+--repeat runs is compared with the `startup` entry of benchmarks/baselines.json;
+the exit code is 1 when import or create_app() time grew by more than
+--tolerance.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.run import DEFAULT_BASELINES, load_baselines  # noqa: E402
+
+PROBE = '''
+import json, time
+started = time.perf_counter()
+from app import create_app
+imported = time.perf_counter()
+create_app()
+created = time.perf_counter()
+print(json.dumps({'import_ms': (imported - started) * 1000, 'create_app_ms': (created - imported) * 1000}))
+'''
+
+
+def measure_once():
+    """{'import_ms', 'create_app_ms'} of one fresh interpreter"""
+    output = subprocess.run([sys.executable, '-c', PROBE], cwd=ROOT, capture_output=True, text=True, check=True)
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def measure(repeat):
+    """Median import and create_app() times in ms over `repeat` fresh interpreters"""
+    runs = [measure_once() for _ in range(repeat)]
+    return {name: round(statistics.median(run[name] for run in runs), 2) for name in ('import_ms', 'create_app_ms')}
+
+
+def slowest_imports(top):
+    """(self ms, cumulative ms, module) of the `top` slowest imports of app, by self time"""
+    output = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import app'],
+                            cwd=ROOT, capture_output=True, text=True, check=True)
+    imports = []
+    for line in output.stderr.splitlines():
+        parts = line.split('|')
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue
+        self_us = int(parts[0].split(':')[-1])
+        imports.append((self_us / 1000, int(parts[1]) / 1000, parts[2].strip()))
+    return sorted(imports, reverse=True)[:top]
+
+
+def compare(result, baseline, tolerance):
+    """Regression messages for timings more than `tolerance` above the baseline"""
+    return [
+        f'{name}: {result[name]}ms vs baseline {baseline[name]}ms'
+        for name in result
+        if name in baseline and result[name] > baseline[name] * (1 + tolerance)
+    ]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Measure import and create_app() time')
+    parser.add_argument('--repeat', type=int, default=10, help='Fresh interpreters to measure, the median is reported')
+    parser.add_argument('--top', type=int, default=0, help='Also list the N slowest imports')
+    parser.add_argument('--baselines', default=DEFAULT_BASELINES, help='Baseline JSON file')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='Allowed relative regression')
+    parser.add_argument('--save-baseline', action='store_true', help='Store these results as the new baseline')
+    args = parser.parse_args(argv)
+
+    result = measure(args.repeat)
+    baselines = load_baselines(args.baselines)
+    baseline = baselines.get('startup', {})
+    for name, value in result.items():
+        print(f"{name:<16}{value:>10}{baseline.get(name, '-'):>10}")
+
+    if args.top:
+        print(f"\n{'self ms':>10}{'total ms':>10}  module")
+        for self_ms, total_ms, module in slowest_imports(args.top):
+            print(f'{self_ms:>10.1f}{total_ms:>10.1f}  {module}')
+
+    if args.save_baseline:
+        baselines['startup'] = result
+        with open(args.baselines, 'w') as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+        print(f'Baseline saved to {args.baselines}')
+        return 0
+
+    regressions = compare(result, baseline, args.tolerance)
+    for message in regressions:
+        print('REGRESSION ' + message)
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
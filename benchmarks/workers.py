@@ -0,0 +1,103 @@
+"""Compare gunicorn worker models on the load-test scenarios.
+
+    python -m benchmarks.workers --profile small --duration 10 --concurrency 16
+    python -m benchmarks.workers --model sync:5 --model gthread:3x4 --scenario field_search
+
+Each model is started with gunicorn.conf.py on the same generated database
+and every scenario is replayed against it. A model is written as
+class:workers (sync:5, gevent:3) or class:workersxthreads (gthread:3x4).
+Models whose worker class is not installed (gevent) are skipped.
+"""
+import argparse
+import importlib.util
+import multiprocessing
+import os
+import sys
+from datetime import date
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.run import (  # noqa: E402
+    generate_database, load_context, login, run_scenario, start_gunicorn
+)
+from benchmarks.scenarios import BenchmarkContext, get_scenarios  # noqa: E402
+
+DEFAULT_DATABASE = os.path.join(ROOT, 'instance', 'benchmark_workers.db')
+
+# Worker classes that need a package besides gunicorn
+REQUIRED_MODULES = {'gevent': 'gevent'}
+
+
+def parse_model(value):
+    """'gthread:3x4' -> ('gthread', 3, 4); threads default to 1"""
+    worker_class, _, size = value.partition(':')
+    workers, _, threads = size.partition('x')
+    try:
+        return worker_class, int(workers), int(threads or 1)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f'Expected class:workers or class:workersxthreads, got {value!r}')
+
+
+def default_models(cores):
+    """The worker models of gunicorn.conf.py for this machine"""
+    return [
+        ('sync', 2 * cores + 1, 1),
+        ('gthread', cores + 1, 4),
+        ('gevent', cores + 1, 1),
+    ]
+
+
+def main(argv=None):
+    from datagen import DEFAULT_PASSWORD, PROFILES
+
+    parser = argparse.ArgumentParser(description='Compare gunicorn worker models')
+    parser.add_argument('--model', action='append', type=parse_model,
+                        help='Worker model, e.g. sync:5 or gthread:3x4 (repeatable, default: one of each)')
+    parser.add_argument('--database', default=DEFAULT_DATABASE, help='SQLite file to generate and serve')
+    parser.add_argument('--no-generate', action='store_true', help='Reuse the existing benchmark database')
+    parser.add_argument('--profile', default='small', choices=sorted(PROFILES), help='Synthetic data set size')
+    parser.add_argument('--scenario', action='append', help='Scenario to run (repeatable, default: all)')
+    parser.add_argument('--duration', type=float, default=10.0, help='Seconds per scenario and model')
+    parser.add_argument('--concurrency', type=int, default=16, help='Client threads')
+    parser.add_argument('--port', type=int, default=8766)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    scenarios = get_scenarios(args.scenario)
+    models = args.model or default_models(multiprocessing.cpu_count())
+
+    database_uri = 'sqlite:///' + args.database
+    if not args.no_generate:
+        database_uri = generate_database(args.database, args.profile, args.seed)
+    field_ids, emails = load_context(database_uri)
+
+    results = {}
+    for worker_class, workers, threads in models:
+        module = REQUIRED_MODULES.get(worker_class)
+        if module and importlib.util.find_spec(module) is None:
+            print(f'{worker_class}: skipped, {module} is not installed', file=sys.stderr)
+            continue
+        label = f'{worker_class} {workers}x{threads}'
+        process, base_url = start_gunicorn(database_uri, args.port, workers, threads, worker_class)
+        try:
+            tokens = {role: login(base_url, email, DEFAULT_PASSWORD) for role, email in emails.items()}
+            context = BenchmarkContext(field_ids, tokens, date.today())
+            for scenario in scenarios:
+                results[(scenario.name, label)] = run_scenario(base_url, scenario, context, args.duration,
+                                                               args.concurrency, seed=args.seed)
+                print(f'{label} {scenario.name}: done', file=sys.stderr)
+        finally:
+            process.terminate()
+            process.wait()
+
+    print(f"{'scenario':<22}{'model':<16}{'reqs':>7}{'errors':>8}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}"
+          f"{'p99 ms':>10}")
+    for (name, label), result in results.items():
+        print(f"{name:<22}{label:<16}{result['requests']:>7}{result['errors']:>8}{result['rps']:>10}"
+              f"{result['p50_ms']:>10}{result['p95_ms']:>10}{result['p99_ms']:>10}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,72 @@
+import click
+from models import db, Field, Facility, recompute_field_ratings, get_facility_type_ids
+from geo import encode_geohash
+from search_index import rebuild_search_index
+from idempotency import purge_expired_keys
+from webhooks import run_worker
+
+
+def register_commands(app):
+    """Register the app's `flask` CLI commands"""
+
+    @app.cli.command('recompute-ratings')
+    @click.option('--field-id', 'field_ids', type=int, multiple=True, help='Only recompute these fields (repeatable).')
+    def recompute_ratings(field_ids):
+        """Rebuild the rating aggregates on fields from the reviews table."""
+        updated = recompute_field_ratings(list(field_ids) or None)
+        db.session.commit()
+        click.echo(f'Recomputed ratings for {updated} fields')
+
+    @app.cli.command('rebuild-geohashes')
+    def rebuild_geohashes():
+        """Recompute the geohash of every field from its coordinates."""
+        updated = 0
+        for field_id, latitude, longitude, geohash in db.session.query(
+            Field.id, Field.latitude, Field.longitude, Field.geohash
+        ):
+            expected = encode_geohash(latitude, longitude)
+            if expected != geohash:
+                db.session.execute(db.update(Field).where(Field.id == field_id).values(geohash=expected))
+                updated += 1
+        db.session.commit()
+        click.echo(f'Updated geohashes for {updated} fields')
+
+    @app.cli.command('rebuild-search-index')
+    def rebuild_search_index_command():
+        """Recreate the full-text search index from the fields, users and teams tables."""
+        counts = rebuild_search_index()
+        db.session.commit()
+        for table, count in counts.items():
+            click.echo(f'Indexed {count} {table}')
+
+    @app.cli.command('rebuild-facility-index')
+    def rebuild_facility_index():
+        """Link every facility row to its catalog entry, adding missing catalog entries."""
+        names = [name for (name,) in db.session.query(Facility.name).distinct()]
+        type_ids = get_facility_type_ids(db.session.connection(), names)
+        updated = 0
+        for name in names:
+            result = db.session.execute(
+                db.update(Facility).where(
+                    Facility.name == name,
+                    db.or_(Facility.facility_type_id.is_(None), Facility.facility_type_id != type_ids.get(name))
+                ).values(facility_type_id=type_ids.get(name)),
+                execution_options={'synchronize_session': False}
+            )
+            updated += result.rowcount
+        db.session.commit()
+        click.echo(f'Linked {updated} facilities to {len(set(type_ids.values()))} facility types')
+
+    @app.cli.command('purge-idempotency-keys')
+    def purge_idempotency_keys():
+        """Delete stored Idempotency-Key responses that have expired."""
+        deleted = purge_expired_keys()
+        click.echo(f'Deleted {deleted} expired idempotency keys')
+
+    @app.cli.command('process-payment-events')
+    @click.option('--batch-size', type=int, default=500, show_default=True, help='Callbacks applied per transaction.')
+    @click.option('--interval', type=float, default=1.0, show_default=True, help='Seconds between polls of an empty queue.')
+    @click.option('--once', is_flag=True, help='Exit when the queue is empty instead of polling.')
+    def process_payment_events_command(batch_size, interval, once):
+        """Apply queued payment gateway callbacks in batches (run a single worker on SQLite)."""
+        run_worker(batch_size=batch_size, interval=interval, once=once, log=click.echo)
@@ -0,0 +1,148 @@
+"""gzip/brotli response compression.
+
+The encoding is negotiated from Accept-Encoding (q-values honoured, brotli
+preferred when the brotli package is installed and the client accepts it).
+Buffered bodies below COMPRESS_MIN_SIZE are sent as they are. Streamed
+responses are compressed chunk by chunk and flushed after every chunk, so
+clients keep receiving data as it is generated. COMPRESS_LEVEL and
+COMPRESS_BROTLI_QUALITY bound the CPU spent per byte.
+"""
+import zlib
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, gzip is always available
+    brotli = None
+
+DEFAULT_MIMETYPES = (
+    'application/json', 'text/csv', 'text/plain', 'text/html', 'text/css',
+    'application/javascript', 'application/xml', 'text/xml',
+)
+
+
+def parse_accept_encoding(header):
+    """{coding: q} from an Accept-Encoding header"""
+    codings = {}
+    for part in (header or '').split(','):
+        coding, _, params = part.strip().partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params.split(';'):
+            name, _, value = param.strip().partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        codings[coding] = quality
+    return codings
+
+
+def negotiate_encoding(header, available):
+    """Best coding from `available` (in server preference order) accepted by the client, or None"""
+    codings = parse_accept_encoding(header)
+    best, best_quality = None, 0.0
+    for coding in available:
+        quality = codings.get(coding, codings.get('*', 0.0))
+        if quality > best_quality:
+            best, best_quality = coding, quality
+    return best
+
+
+class GzipCompressor:
+    def __init__(self, level):
+        # wbits=31: zlib stream with a gzip header and trailer
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data):
+        return self._compressor.compress(data)
+
+    def flush(self):
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+class BrotliCompressor:
+    def __init__(self, quality):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data):
+        return self._compressor.process(data)
+
+    def flush(self):
+        return self._compressor.flush()
+
+    def finish(self):
+        return self._compressor.finish()
+
+
+def compress_stream(chunks, compressor):
+    """Compress an iterable of byte chunks, flushing after every chunk"""
+    try:
+        for chunk in chunks:
+            if chunk:
+                data = compressor.compress(chunk) + compressor.flush()
+                if data:
+                    yield data
+        yield compressor.finish()
+    finally:
+        close = getattr(chunks, 'close', None)
+        if close is not None:
+            close()
+
+
+def init_compression(app):
+    """Compress responses according to the COMPRESS_* settings"""
+    if not app.config.get('COMPRESS_ENABLED', True):
+        return
+
+    min_size = app.config.get('COMPRESS_MIN_SIZE', 1024)
+    level = app.config.get('COMPRESS_LEVEL', 5)
+    brotli_quality = app.config.get('COMPRESS_BROTLI_QUALITY', 4)
+    mimetypes = set(app.config.get('COMPRESS_MIMETYPES', DEFAULT_MIMETYPES))
+    available = ('br', 'gzip') if brotli is not None else ('gzip',)
+
+    def make_compressor(coding):
+        if coding == 'br':
+            return BrotliCompressor(brotli_quality)
+        return GzipCompressor(level)
+
+    @app.after_request
+    def compress_response(response):
+        if (response.mimetype not in mimetypes
+                or response.status_code < 200 or response.status_code in (204, 206, 304)
+                or response.direct_passthrough
+                or 'Content-Encoding' in response.headers
+                or 'no-transform' in response.headers.get('Cache-Control', '')):
+            return response
+
+        # The body depends on Accept-Encoding, even when it is sent as is
+        response.vary.add('Accept-Encoding')
+
+        coding = negotiate_encoding(request.headers.get('Accept-Encoding'), available)
+        if coding is None or request.method == 'HEAD':
+            return response
+
+        if response.is_streamed:
+            content_length = response.content_length
+            if content_length is not None and content_length < min_size:
+                return response
+            response.response = compress_stream(response.iter_encoded(), make_compressor(coding))
+            response.headers.pop('Content-Length', None)
+        else:
+            data = response.get_data()
+            if len(data) < min_size:
+                return response
+            compressor = make_compressor(coding)
+            response.set_data(compressor.compress(data) + compressor.finish())
+
+        response.headers['Content-Encoding'] = coding
+        if response.headers.get('ETag', '').startswith('"'):
+            # A strong validator must change with the encoding
+            response.headers['ETag'] = 'W/' + response.headers['ETag']
+        return response
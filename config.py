@@ -10,4 +10,106 @@ class Config:
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///football_fields.db'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY') or 'jwt-secret-string'
-    JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=1)
\ No newline at end of file
+    JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=1)
+
+    # Read replicas (comma separated URIs), exposed as replica_1, replica_2, ... binds
+    DATABASE_REPLICA_URIS = [uri.strip() for uri in os.environ.get('DATABASE_REPLICA_URLS', '').split(',') if uri.strip()]
+    # GET requests on these blueprints/endpoints read from a replica
+    REPLICA_READ_BLUEPRINTS = ('analytics', 'clubs', 'fields')
+    REPLICA_READ_ENDPOINTS = ()
+    # Clients that wrote recently get a cookie that keeps their reads on the primary
+    REPLICA_STICKY_COOKIE = 'db_primary'
+    REPLICA_STICKY_SECONDS = int(os.environ.get('REPLICA_STICKY_SECONDS', 10))
+
+    # Worker model, used to split the connection budget between worker processes. Under
+    # gunicorn these are set by gunicorn.conf.py from the workers/threads it runs
+    GUNICORN_WORKERS = int(os.environ.get('WEB_CONCURRENCY', 1))
+    GUNICORN_THREADS = int(os.environ.get('GUNICORN_THREADS', 1))
+
+    # Connection pool (per worker). Pool size and overflow are derived from the
+    # worker model and DB_MAX_CONNECTIONS unless set explicitly.
+    DB_MAX_CONNECTIONS = int(os.environ.get('DB_MAX_CONNECTIONS', 100))
+    DB_POOL_SIZE = int(os.environ['DB_POOL_SIZE']) if os.environ.get('DB_POOL_SIZE') else None
+    DB_MAX_OVERFLOW = int(os.environ['DB_MAX_OVERFLOW']) if os.environ.get('DB_MAX_OVERFLOW') else None
+    DB_POOL_TIMEOUT = int(os.environ.get('DB_POOL_TIMEOUT', 30))
+    DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', 1800))
+    DB_POOL_PRE_PING = os.environ.get('DB_POOL_PRE_PING', 'true').lower() == 'true'
+
+    # SQLite pragmas applied to every new connection
+    SQLITE_JOURNAL_MODE = os.environ.get('SQLITE_JOURNAL_MODE', 'WAL')
+    SQLITE_SYNCHRONOUS = os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL')
+
+    # Instrumentation: requests slower than the threshold log their SQL trace, and a
+    # sampled fraction of requests is profiled when pyinstrument is installed
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() == 'true'
+    SLOW_REQUEST_THRESHOLD_MS = int(os.environ.get('SLOW_REQUEST_THRESHOLD_MS', 500))
+    PROFILER_SAMPLE_RATE = float(os.environ.get('PROFILER_SAMPLE_RATE', 0))
+    SERVER_TIMING_HEADER = os.environ.get('SERVER_TIMING_HEADER', 'false').lower() == 'true'
+
+    # Radius search on /api/fields?near=lat,lng&radius_km=
+    NEARBY_DEFAULT_RADIUS_KM = float(os.environ.get('NEARBY_DEFAULT_RADIUS_KM', 10))
+    NEARBY_MAX_RADIUS_KM = float(os.environ.get('NEARBY_MAX_RADIUS_KM', 100))
+
+    # Facet counts on /api/fields?facets=true, cached per filter combination
+    FACET_PRICE_BUCKET = float(os.environ.get('FACET_PRICE_BUCKET', 100))
+    FACET_CACHE_TTL = int(os.environ.get('FACET_CACHE_TTL', 60))
+    FACET_CACHE_SIZE = int(os.environ.get('FACET_CACHE_SIZE', 1024))
+
+    # JSON responses: orjson when installed, compact output, keys in insertion order
+    JSON_FAST_ENCODER = os.environ.get('JSON_FAST_ENCODER', 'true').lower() == 'true'
+    JSON_COMPACT = os.environ.get('JSON_COMPACT', 'true').lower() == 'true'
+    JSON_SORT_KEYS = os.environ.get('JSON_SORT_KEYS', 'false').lower() == 'true'
+
+    # Response compression (gzip, or brotli when installed and accepted)
+    COMPRESS_ENABLED = os.environ.get('COMPRESS_ENABLED', 'true').lower() == 'true'
+    COMPRESS_MIN_SIZE = int(os.environ.get('COMPRESS_MIN_SIZE', 1024))  # bytes
+    COMPRESS_LEVEL = int(os.environ.get('COMPRESS_LEVEL', 5))  # gzip, 1 (fastest) to 9
+    COMPRESS_BROTLI_QUALITY = int(os.environ.get('COMPRESS_BROTLI_QUALITY', 4))  # 0 (fastest) to 11
+
+    # Locale files: loaded at startup (shared by forked workers) and checked for message
+    # keys used by the routes, or loaded on first use when preloading is off
+    TRANSLATIONS_PRELOAD = os.environ.get('TRANSLATIONS_PRELOAD', 'true').lower() == 'true'
+    TRANSLATIONS_STRICT = os.environ.get('TRANSLATIONS_STRICT', 'false').lower() == 'true'
+
+    # Idempotency-Key on POST /api/bookings and /api/payments: responses are replayed
+    # to retries with the same key for this long
+    IDEMPOTENCY_TTL_HOURS = int(os.environ.get('IDEMPOTENCY_TTL_HOURS', 24))
+    # A key whose request has not finished after this long (its worker died) is taken over
+    # by the next retry; keep it above GUNICORN_TIMEOUT
+    IDEMPOTENCY_LOCK_SECONDS = int(os.environ.get('IDEMPOTENCY_LOCK_SECONDS', 120))
+
+    # Rate limiting: token buckets per JWT user (or IP) of RATELIMIT_BURST tokens, refilled at
+    # RATELIMIT_PER_MINUTE; expensive endpoints cost more tokens (ratelimit.DEFAULT_COSTS,
+    # overridden by RATELIMIT_COSTS='endpoint=cost,...'). Store: 'memory' (per worker) or 'redis'
+    RATELIMIT_ENABLED = os.environ.get('RATELIMIT_ENABLED', 'true').lower() == 'true'
+    RATELIMIT_PER_MINUTE = int(os.environ.get('RATELIMIT_PER_MINUTE', 120))
+    RATELIMIT_BURST = int(os.environ.get('RATELIMIT_BURST', 60))
+    RATELIMIT_COSTS = {
+        name.strip(): int(cost) for name, _, cost in
+        (item.partition('=') for item in os.environ.get('RATELIMIT_COSTS', '').split(',') if item.strip())
+    }
+    RATELIMIT_STORE = os.environ.get('RATELIMIT_STORE', 'memory')
+    RATELIMIT_REDIS_URL = os.environ.get('RATELIMIT_REDIS_URL', 'redis://localhost:6379/0')
+
+    # Reverse proxies in front of the app that append to X-Forwarded-For. The client address
+    # (rate limit buckets, logs) is taken from that many hops back; 0 when clients connect
+    # directly, or they could pick their own address
+    PROXY_FIX_X_FOR = int(os.environ.get('PROXY_FIX_X_FOR', 1))
+
+    # Load shedding: 503 + Retry-After for requests that waited longer than this in the
+    # queue, measured from the proxy's X-Request-Start header (0 disables)
+    LOAD_SHED_QUEUE_MS = int(os.environ.get('LOAD_SHED_QUEUE_MS', 0))
+    LOAD_SHED_RETRY_AFTER = int(os.environ.get('LOAD_SHED_RETRY_AFTER', 5))
+
+    # Payment gateway webhooks: HMAC-SHA256 secret per gateway ('vodafone_cash=...,fawry=...,card=...');
+    # gateways without a secret are rejected
+    PAYMENT_WEBHOOK_SECRETS = {
+        name.strip(): secret.strip() for name, _, secret in
+        (item.partition('=') for item in os.environ.get('PAYMENT_WEBHOOK_SECRETS', '').split(',') if item.strip())
+    }
+
+    # OTP storage: 'database' (indexed otps table) or 'memory' (in-process TTL store)
+    OTP_STORE = os.environ.get('OTP_STORE', 'database')
+    OTP_TTL_MINUTES = int(os.environ.get('OTP_TTL_MINUTES', 10))
+    OTP_MAX_PER_WINDOW = int(os.environ.get('OTP_MAX_PER_WINDOW', 3))
+    OTP_RATE_WINDOW_MINUTES = int(os.environ.get('OTP_RATE_WINDOW_MINUTES', 15))
@@ -0,0 +1,209 @@
+"""pytest fixtures: the schema is built once per session, each test runs in a rolled-back transaction.
+
+Test cases marked with @pytest.mark.usefixtures('db_transaction') start from
+an empty schema and need no create_all()/drop_all(): their setUp, the test
+and every request it makes share one connection whose transaction is rolled
+back afterwards. Commits in the code under test only release a SAVEPOINT.
+
+The schema comes from a template database file that is built once and
+reused until models.py or search_index.py change (instance/test_template_*.db).
+`seeded_app`/`seeded_db` do the same with a template filled by datagen.
+
+Each pytest-xdist worker (pytest -n 4) gets its own database file,
+instance/test_<worker>.db. Set TEST_DATABASE_URL to run the suite against
+another server; the worker id is appended to its database name.
+"""
+import hashlib
+import os
+import shutil
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import scoped_session, sessionmaker
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+INSTANCE = os.path.join(ROOT, 'instance')
+WORKER = os.environ.get('PYTEST_XDIST_WORKER', 'main')
+
+
+def worker_database_url(worker=WORKER):
+    """Database URL of this test process"""
+    url = os.environ.get('TEST_DATABASE_URL')
+    if not url:
+        return 'sqlite:///' + os.path.join(INSTANCE, f'test_{worker}.db')
+    if worker == 'main':
+        return url
+    url = make_url(url)
+    return url.set(database=f'{url.database}_{worker}').render_as_string(hide_password=False)
+
+
+os.makedirs(INSTANCE, exist_ok=True)
+# config.Config reads DATABASE_URL when it is first imported, which is after this
+os.environ['DATABASE_URL'] = worker_database_url()
+
+from config import Config  # noqa: E402
+from database import RoutingSession  # noqa: E402
+from testing import get_test_app  # noqa: E402
+
+# Small deterministic data set for seeded_app
+SEED_PROFILE = dict(owners=4, fields_per_owner=3, users_per_owner=5, bookings_per_field=10,
+                    reviews_per_field=3, notifications_per_user=2, seed=0)
+
+
+class SeededConfig(Config):
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(INSTANCE, f'test_seeded_{WORKER}.db')
+
+
+class TransactionSession(RoutingSession):
+    """RoutingSession that runs every statement on the connection it is bound to.
+
+    Flask-SQLAlchemy picks an engine per statement and ignores Session.bind,
+    so a session bound to a test transaction's connection must say so here.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and self.bind is not None:
+            return self.bind
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def fingerprint(*modules):
+    """Hash of the source files a template depends on"""
+    digest = hashlib.sha1()
+    for module in ('models.py', 'search_index.py') + modules:
+        with open(os.path.join(ROOT, module), 'rb') as source:
+            digest.update(source.read())
+    return digest.hexdigest()[:12]
+
+
+def enable_sqlite_savepoints(engine):
+    """Let SQLAlchemy issue BEGIN itself: pysqlite's implicit transactions break SAVEPOINTs"""
+    if engine.dialect.name != 'sqlite' or engine.dialect.driver != 'pysqlite':
+        return
+
+    @event.listens_for(engine, 'connect')
+    def disable_implicit_begin(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine, 'begin')
+    def begin(connection):
+        connection.exec_driver_sql('BEGIN')
+
+    engine.dispose()
+
+
+def _remove_database(path):
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+
+def prepare_database(app, template_name, populate):
+    """Give app's database the schema (and data) of a template, building the template first if needed.
+
+    SQLite databases are copied from the template file; other databases are
+    populated directly.
+    """
+    from models import db
+
+    with app.app_context():
+        engine = db.engine
+        if engine.dialect.name != 'sqlite':
+            db.drop_all()
+            db.create_all()
+            populate()
+            return
+
+        path = engine.url.database
+        template = os.path.join(INSTANCE, template_name)
+        engine.dispose()
+        _remove_database(path)
+        if not os.path.exists(template):
+            db.create_all()
+            populate()
+            with engine.connect() as connection:
+                connection.exec_driver_sql('PRAGMA wal_checkpoint(TRUNCATE)')
+            engine.dispose()
+            # Several xdist workers may build it at once: publish atomically
+            partial = f'{template}.{WORKER}.tmp'
+            shutil.copyfile(path, partial)
+            os.replace(partial, template)
+            _remove_database(path)
+        shutil.copyfile(template, path)
+
+
+@contextmanager
+def rolled_back(app):
+    """Bind db.session to one connection for the block and roll everything back afterwards.
+
+    No app context is kept pushed, so every request and app_context() block
+    in the test still gets its own context (and session) as it would in
+    production.
+    """
+    from models import db
+
+    with app.app_context():
+        # Restores the schema if a test case outside the fixtures dropped it
+        db.create_all()
+        connection = db.engine.connect()
+        db.session.remove()
+    transaction = connection.begin()
+    original = db.session
+    db.session = scoped_session(
+        sessionmaker(class_=TransactionSession, db=db, bind=connection,
+                     join_transaction_mode='create_savepoint'),
+        scopefunc=original.registry.scopefunc
+    )
+    try:
+        yield db.session
+    finally:
+        with app.app_context():
+            db.session.remove()
+        db.session = original
+        transaction.rollback()
+        connection.close()
+
+
+@pytest.fixture(scope='session')
+def app():
+    """The shared test app on this worker's database, with an empty schema"""
+    from models import db
+
+    app = get_test_app()
+    app.config['TESTING'] = True
+    with app.app_context():
+        enable_sqlite_savepoints(db.engine)
+    prepare_database(app, f'test_template_{fingerprint()}.db', lambda: None)
+    return app
+
+
+@pytest.fixture
+def db_transaction(app):
+    """Run the test in a transaction that is rolled back afterwards"""
+    with rolled_back(app) as session:
+        yield session
+
+
+@pytest.fixture(scope='session')
+def seeded_app():
+    """An app on a copy of a database filled by datagen with SEED_PROFILE"""
+    from models import db
+    from datagen import generate_dataset
+    from datetime import date
+
+    app = get_test_app(SeededConfig)
+    app.config['TESTING'] = True
+    with app.app_context():
+        enable_sqlite_savepoints(db.engine)
+    prepare_database(app, f'test_seeded_template_{fingerprint("datagen.py")}.db',
+                     lambda: generate_dataset(today=date(2030, 1, 1), **SEED_PROFILE))
+    return app
+
+
+@pytest.fixture
+def seeded_db(seeded_app):
+    """Run the test against the seeded database in a transaction that is rolled back afterwards"""
+    with rolled_back(seeded_app) as session:
+        yield session
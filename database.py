@@ -0,0 +1,240 @@
+import random
+import time
+from flask import current_app, g, has_app_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event, exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool
+from metrics import registry
+
+pool_checkout_seconds = registry.histogram(
+    'db_pool_checkout_wait_seconds',
+    'Time spent waiting to check out a connection from the pool',
+    ['bind'],
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0)
+)
+pool_checkout_timeouts = registry.counter(
+    'db_pool_checkout_timeouts_total',
+    'Pool checkouts that gave up after pool_timeout',
+    ['bind']
+)
+pool_checked_out = registry.gauge(
+    'db_pool_checked_out_connections',
+    'Connections currently checked out of the pool',
+    ['bind']
+)
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited for a connection"""
+
+    bind_name = 'default'
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            # Only waits that ran out of pool_timeout; connect errors are not timeouts
+            pool_checkout_timeouts.inc(bind=self.bind_name)
+            raise
+        finally:
+            pool_checkout_seconds.observe(time.perf_counter() - start, bind=self.bind_name)
+
+
+def _timed_pool_class(bind_name):
+    """Create a TimedQueuePool subclass labelled with the bind name"""
+    return type('TimedQueuePool_' + bind_name, (TimedQueuePool,), {'bind_name': bind_name})
+
+
+def is_sqlite_memory(uri):
+    url = make_url(uri)
+    return url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:')
+
+
+def default_pool_settings(config):
+    """Derive per-worker pool size and overflow from the gunicorn worker model.
+
+    Each worker process gets its own pool, so the total connection budget
+    (DB_MAX_CONNECTIONS) is split evenly between workers. A worker needs one
+    connection per thread, plus one spare for background work.
+    """
+    workers = max(1, config.get('GUNICORN_WORKERS', 1))
+    threads = max(1, config.get('GUNICORN_THREADS', 1))
+    budget = max(1, config.get('DB_MAX_CONNECTIONS', 100) // workers)
+
+    pool_size = min(threads + 1, budget)
+    max_overflow = max(0, min(threads, budget - pool_size))
+    return pool_size, max_overflow
+
+
+def build_engine_options(config, uri, bind_name='default'):
+    """Build create_engine() keyword arguments for a database URI"""
+    if is_sqlite_memory(uri):
+        # In-memory SQLite uses a single static connection, nothing to tune
+        return {}
+
+    pool_size, max_overflow = default_pool_settings(config)
+    if config.get('DB_POOL_SIZE') is not None:
+        pool_size = config['DB_POOL_SIZE']
+    if config.get('DB_MAX_OVERFLOW') is not None:
+        max_overflow = config['DB_MAX_OVERFLOW']
+
+    return {
+        'poolclass': _timed_pool_class(bind_name),
+        'pool_size': pool_size,
+        'max_overflow': max_overflow,
+        'pool_timeout': config.get('DB_POOL_TIMEOUT', 30),
+        'pool_recycle': config.get('DB_POOL_RECYCLE', 1800),
+        'pool_pre_ping': config.get('DB_POOL_PRE_PING', True)
+    }
+
+
+def replica_bind_keys(config):
+    """Bind keys used for the configured read replicas"""
+    return [f'replica_{i}' for i in range(1, len(config.get('DATABASE_REPLICA_URIS') or []) + 1)]
+
+
+def configure_database(app):
+    """Fill in engine options and replica binds before db.init_app().
+
+    Explicit SQLALCHEMY_ENGINE_OPTIONS or SQLALCHEMY_BINDS entries in the app
+    config take precedence over the derived defaults.
+    """
+    config = app.config
+
+    options = build_engine_options(config, config['SQLALCHEMY_DATABASE_URI'])
+    options.update(config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    config['SQLALCHEMY_ENGINE_OPTIONS'] = options
+
+    binds = dict(config.get('SQLALCHEMY_BINDS') or {})
+    for key, uri in zip(replica_bind_keys(config), config.get('DATABASE_REPLICA_URIS') or []):
+        if key not in binds:
+            binds[key] = dict(build_engine_options(config, uri, key), url=uri)
+    config['SQLALCHEMY_BINDS'] = binds
+
+
+def _set_sqlite_pragmas(journal_mode, synchronous):
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        if journal_mode:
+            cursor.execute(f'PRAGMA journal_mode={journal_mode}')
+        if synchronous:
+            cursor.execute(f'PRAGMA synchronous={synchronous}')
+        cursor.close()
+    return on_connect
+
+
+def install_engine_hooks(app, db):
+    """Attach SQLite pragmas and pool gauges to every engine of the app"""
+    with app.app_context():
+        engines = dict(db.engines)
+
+    # Replicas receive their schema through replication, so keep their (empty)
+    # metadata out of db.create_all()/drop_all()
+    for key in replica_bind_keys(app.config):
+        metadata = db.metadatas.get(key)
+        if metadata is not None and not metadata.tables:
+            del db.metadatas[key]
+
+    for key, engine in engines.items():
+        bind_name = key or 'default'
+
+        if engine.dialect.name == 'sqlite':
+            event.listen(engine, 'connect', _set_sqlite_pragmas(
+                app.config.get('SQLITE_JOURNAL_MODE'),
+                app.config.get('SQLITE_SYNCHRONOUS')
+            ))
+
+        event.listen(engine.pool, 'checkout',
+                     lambda *args, bind_name=bind_name: pool_checked_out.inc(bind=bind_name))
+        event.listen(engine.pool, 'checkin',
+                     lambda *args, bind_name=bind_name: pool_checked_out.dec(bind=bind_name))
+
+
+def dispose_engines(app, db):
+    """Drop the pooled connections a forked worker inherited from its parent.
+
+    close=False leaves the inherited sockets alone (the parent still owns them);
+    the worker's pools open fresh connections on first use.
+    """
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+
+
+class RoutingSession(Session):
+    """Session that sends read-only statements to a replica when the request allows it.
+
+    The replica bind for a request is chosen in before_request by
+    select_read_bind(). Anything that is not a plain SELECT, and every
+    statement after the session has flushed or issued DML, goes to the
+    primary so a request always reads its own writes.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        engine = super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+        if bind is not None or not has_app_context():
+            return engine
+
+        if clause is not None and getattr(clause, 'is_dml', False):
+            g.db_wrote = True
+            return engine
+
+        read_bind = g.get('db_read_bind')
+        if (read_bind is None or g.get('db_wrote')
+                or clause is None or not getattr(clause, 'is_select', False)
+                or self.new or self.dirty or self.deleted):
+            return engine
+
+        # Only reroute statements that would otherwise hit the default bind
+        engines = self._db.engines
+        if engine is not engines.get(None):
+            return engine
+        return engines.get(read_bind, engine)
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _mark_session_wrote(session, flush_context):
+    if has_app_context():
+        g.db_wrote = True
+
+
+def select_read_bind():
+    """Pick a replica bind for the current request, or None to use the primary.
+
+    Only safe methods on blueprints or endpoints listed in
+    REPLICA_READ_BLUEPRINTS / REPLICA_READ_ENDPOINTS are routed, and clients
+    that wrote recently (sticky cookie) stay on the primary.
+    """
+    config = current_app.config
+    keys = replica_bind_keys(config)
+    if not keys or request.method not in ('GET', 'HEAD'):
+        return None
+    if request.cookies.get(config.get('REPLICA_STICKY_COOKIE', 'db_primary')):
+        return None
+    if (request.blueprint not in config.get('REPLICA_READ_BLUEPRINTS', ())
+            and request.endpoint not in config.get('REPLICA_READ_ENDPOINTS', ())):
+        return None
+    return random.choice(keys)
+
+
+def init_read_routing(app):
+    """Register the request hooks that drive RoutingSession"""
+    if not replica_bind_keys(app.config):
+        return
+
+    @app.before_request
+    def route_reads_to_replica():
+        g.db_read_bind = select_read_bind()
+
+    @app.after_request
+    def stick_writers_to_primary(response):
+        # Keep this client on the primary long enough to read its own writes
+        if g.get('db_wrote'):
+            response.set_cookie(
+                app.config.get('REPLICA_STICKY_COOKIE', 'db_primary'), '1',
+                max_age=app.config.get('REPLICA_STICKY_SECONDS', 10),
+                httponly=True
+            )
+        return response
@@ -0,0 +1,214 @@
+"""Synthetic data generator for benchmarks and bulk seeding.
+
+Rows are built as plain dicts with precomputed primary keys and written with
+executemany() inserts in chunks, so generating millions of rows neither goes
+through the ORM unit of work nor keeps them all in memory.
+"""
+import random
+from datetime import date, datetime, time, timedelta
+from sqlalchemy import func, insert
+from geo import encode_geohash
+from search_index import index_rows
+from models import db, bcrypt, User, Field, Facility, Booking, Review, Payment, Notification, get_facility_type_ids
+
+DEFAULT_PASSWORD = 'password123'
+CHUNK_SIZE = 5000
+
+# Data set sizes for generate_dataset()
+PROFILES = {
+    'small': {'owners': 10, 'fields_per_owner': 3, 'users_per_owner': 10, 'bookings_per_field': 20,
+              'reviews_per_field': 5, 'notifications_per_user': 3},
+    'medium': {'owners': 100, 'fields_per_owner': 5, 'users_per_owner': 20, 'bookings_per_field': 50,
+               'reviews_per_field': 10, 'notifications_per_user': 5},
+    'large': {'owners': 1000, 'fields_per_owner': 5, 'users_per_owner': 50, 'bookings_per_field': 100,
+              'reviews_per_field': 20, 'notifications_per_user': 10},
+    # About 2.5 million bookings, for staging
+    'xlarge': {'owners': 2000, 'fields_per_owner': 5, 'users_per_owner': 50, 'bookings_per_field': 250,
+               'reviews_per_field': 20, 'notifications_per_user': 10},
+}
+
+GOVERNORATES = {
+    'cairo': (30.0444, 31.2357, ['Nasr City', 'Maadi', 'Heliopolis', 'Mohandessin', 'New Cairo', 'Zamalek']),
+    'giza': (30.0131, 31.2089, ['6th of October', 'Sheikh Zayed', 'Haram', 'Dokki', 'Faisal']),
+}
+FACILITIES = ['Parking', 'Changing Rooms', 'Showers', 'Cafeteria', 'Floodlights', 'Synthetic Turf']
+PAYMENT_METHODS = ['vodafone_cash', 'etisalat_cash', 'orange_cash', 'we_pay', 'visa', 'mastercard']
+COMMENTS = ['Great pitch', 'Good lighting', 'Clean changing rooms', 'A bit pricey', 'Friendly staff', None]
+
+
+def _next_id(model):
+    return (db.session.query(func.max(model.id)).scalar() or 0) + 1
+
+
+class _ChunkedWriter:
+    """Buffers dict rows per table and writes them with executemany() inserts.
+
+    Tables are flushed in the order they were first written to, so parent rows
+    always reach the database before the rows referencing them.
+    """
+
+    def __init__(self, chunk_size=CHUNK_SIZE, commit=False):
+        self.chunk_size = chunk_size
+        self.commit = commit
+        self.buffers = {}
+        self.counts = {}
+
+    def add(self, model, row):
+        self.counts.setdefault(model.__tablename__, 0)
+        buffer = self.buffers.setdefault(model, [])
+        buffer.append(row)
+        if len(buffer) >= self.chunk_size:
+            self.flush()
+
+    def write(self, model, rows):
+        for row in rows:
+            self.add(model, row)
+
+    def flush(self):
+        for model, rows in self.buffers.items():
+            if rows:
+                db.session.execute(insert(model.__table__), rows)
+                self.counts[model.__tablename__] += len(rows)
+                rows.clear()
+        if self.commit:
+            db.session.commit()
+
+
+def generate_dataset(owners=10, fields_per_owner=3, users_per_owner=10, bookings_per_field=20,
+                     reviews_per_field=5, notifications_per_user=3, seed=0, today=None,
+                     password_hash=None, chunk_size=CHUNK_SIZE, commit_chunks=False):
+    """Insert a synthetic data set and return the number of rows per table.
+
+    Must run inside an app context. Bookings are spread over the 60 days before
+    and 30 days after `today`; past confirmed bookings get a completed payment.
+    All users share DEFAULT_PASSWORD, hashed once up front unless password_hash
+    is given. With commit_chunks every chunk is committed on its own, which
+    keeps transactions small when loading millions of rows.
+    """
+    rng = random.Random(seed)
+    today = today or date.today()
+    now = datetime.utcnow()
+    password_hash = password_hash or bcrypt.generate_password_hash(DEFAULT_PASSWORD).decode('utf-8')
+    run_tag = _next_id(User)
+
+    # Users: owners first, then players
+    user_id = _next_id(User)
+    owner_ids, player_ids, users = [], [], []
+    for i in range(owners):
+        owner_ids.append(user_id)
+        users.append({'id': user_id, 'name': f'Owner {run_tag}-{i}', 'email': f'owner{run_tag}-{i}@bench.example.com',
+                      'password': password_hash, 'phone': f'010{user_id:08d}', 'role': 'owner'})
+        user_id += 1
+    for i in range(owners * users_per_owner):
+        player_ids.append(user_id)
+        users.append({'id': user_id, 'name': f'Player {run_tag}-{i}', 'email': f'player{run_tag}-{i}@bench.example.com',
+                      'password': password_hash, 'phone': f'011{user_id:08d}', 'role': 'user'})
+        user_id += 1
+
+    # Fields and facilities
+    field_id = _next_id(Field)
+    facility_id = _next_id(Facility)
+    facility_type_ids = get_facility_type_ids(db.session.connection(), FACILITIES)
+    fields, facilities = [], []
+    for owner_id in owner_ids:
+        for _ in range(fields_per_owner):
+            governorate = rng.choice(list(GOVERNORATES))
+            lat, lng, areas = GOVERNORATES[governorate]
+            area = rng.choice(areas)
+            lat = round(lat + rng.uniform(-0.15, 0.15), 6)
+            lng = round(lng + rng.uniform(-0.15, 0.15), 6)
+            fields.append({
+                'id': field_id, 'name': f'{area} Field {field_id}', 'location': area, 'governorate': governorate,
+                'price_per_hour': float(rng.randrange(150, 600, 10)),
+                'description': f'Football field in {area}', 'image': None, 'owner_id': owner_id,
+                'latitude': lat, 'longitude': lng, 'geohash': encode_geohash(lat, lng),
+                'opening_time': time(8, 0), 'closing_time': time(22, 0),
+                'rating_sum': 0, 'rating_count': 0, 'rating_avg': 0.0,
+            })
+            for name in rng.sample(FACILITIES, rng.randint(2, len(FACILITIES))):
+                facilities.append({'id': facility_id, 'field_id': field_id, 'name': name,
+                                   'facility_type_id': facility_type_ids[name]})
+                facility_id += 1
+            field_id += 1
+
+    # Reviews, with the rating aggregates stored on their field
+    reviews = []
+    review_id = _next_id(Review)
+    for field in fields:
+        for _ in range(reviews_per_field):
+            reviews.append({
+                'id': review_id, 'user_id': rng.choice(player_ids), 'field_id': field['id'],
+                'rating': rng.choices([1, 2, 3, 4, 5], weights=[1, 1, 3, 5, 5])[0],
+                'comment': rng.choice(COMMENTS), 'created_at': now - timedelta(days=rng.randint(0, 365)),
+            })
+            field['rating_sum'] += reviews[-1]['rating']
+            field['rating_count'] += 1
+            review_id += 1
+        if field['rating_count']:
+            field['rating_avg'] = field['rating_sum'] / field['rating_count']
+
+    # Bookings never overlap: each field gets distinct (date, hour) slots.
+    # Bookings and payments are the bulk of the data, so they are written as
+    # they are generated instead of being kept in memory.
+    writer = _ChunkedWriter(chunk_size, commit_chunks)
+    writer.write(User, users)
+    writer.write(Field, fields)
+    writer.write(Facility, facilities)
+    writer.flush()
+    index_rows(User, users)
+    index_rows(Field, fields)
+
+    booking_id = first_booking_id = _next_id(Booking)
+    payment_id = _next_id(Payment)
+    slots = [(day, hour) for day in range(-60, 30) for hour in range(8, 22)]
+    # A few bookings per player for their notifications: (booking id, amount, paid)
+    player_bookings = {}
+    for field in fields:
+        for day, hour in rng.sample(slots, min(bookings_per_field, len(slots))):
+            booking_date = today + timedelta(days=day)
+            status = 'confirmed' if day < 0 else rng.choice(['confirmed', 'pending', 'cancelled'])
+            player_id = rng.choice(player_ids)
+            writer.add(Booking, {
+                'id': booking_id, 'user_id': player_id, 'team_id': None, 'field_id': field['id'],
+                'date': booking_date, 'start_time': time(hour, 0), 'end_time': time(hour + 1, 0),
+                'total_price': field['price_per_hour'], 'status': status,
+            })
+            recent = player_bookings.setdefault(player_id, [])
+            if len(recent) < 10:
+                recent.append((booking_id, field['price_per_hour'], status == 'confirmed'))
+            if status == 'confirmed':
+                paid_at = datetime.combine(booking_date, time(hour, 0)) - timedelta(days=1)
+                writer.add(Payment, {
+                    'id': payment_id, 'booking_id': booking_id, 'user_id': player_id,
+                    'amount': field['price_per_hour'], 'currency': 'EGP',
+                    'payment_method': rng.choice(PAYMENT_METHODS), 'transaction_id': f'BENCH-{payment_id}',
+                    'status': 'completed', 'created_at': paid_at, 'completed_at': paid_at,
+                })
+                payment_id += 1
+            booking_id += 1
+
+    notifications = []
+    notification_id = _next_id(Notification)
+    # Coded like the ones the routes write, rendered in the reader's language
+    fallback = [(booking_id - 1, 0.0, False)] if booking_id > first_booking_id else [(None, 0.0, False)]
+    for player_id in player_ids:
+        for _ in range(notifications_per_user):
+            booking, amount, paid = rng.choice(player_bookings.get(player_id) or fallback)
+            if paid and rng.random() < 0.2:
+                code, notification_type = 'refund_processed', 'refund_processed'
+                params = {'amount': amount, 'currency': 'EGP', 'booking': booking}
+            else:
+                code, notification_type = 'payment_status', 'payment'
+                params = {'booking': booking, 'status': 'completed' if paid else rng.choice(['pending', 'failed'])}
+            notifications.append({
+                'id': notification_id, 'user_id': player_id, 'code': code, 'params': params,
+                'type': notification_type, 'is_read': rng.random() < 0.5,
+                'created_at': now - timedelta(days=rng.randint(0, 60)),
+            })
+            notification_id += 1
+
+    writer.write(Review, reviews)
+    writer.write(Notification, notifications)
+    writer.flush()
+    db.session.commit()
+    return writer.counts
@@ -0,0 +1,12 @@
+"""Flask extensions, created without an app and bound to one in create_app().
+
+Modules that need db or jwt import them from here rather than from app, so
+importing models does not import the app factory and, through it, every
+blueprint.
+"""
+from flask_sqlalchemy import SQLAlchemy
+from flask_jwt_extended import JWTManager
+from database import RoutingSession
+
+db = SQLAlchemy(session_options={'class_': RoutingSession})
+jwt = JWTManager()
@@ -0,0 +1,108 @@
+"""A local stand-in for the payment gateways' webhook callbacks.
+
+Tests post through a Flask test client; against a running server it settles
+pending payments in signed bursts:
+
+    PAYMENT_WEBHOOK_SECRETS=fawry=dev-secret python fake_gateway.py \\
+        --url http://127.0.0.1:5000 --gateway fawry --secret dev-secret --batch 50 --redeliver
+
+followed by `flask --app wsgi:app process-payment-events --once` to apply them.
+"""
+import argparse
+import itertools
+import json
+import sys
+import urllib.error
+import urllib.request
+from webhooks import GATEWAY_STATUSES, SIGNATURE_HEADER, sign
+
+WEBHOOK_PATH = '/api/payments/webhooks/{gateway}'
+
+
+def client_transport(client):
+    """Deliver callbacks through a Flask test client; returns (status, response JSON)"""
+    def post(path, body, headers):
+        response = client.post(path, data=body, headers=headers, content_type='application/json')
+        return response.status_code, response.get_json()
+    return post
+
+
+def http_transport(base_url, timeout=30):
+    """Deliver callbacks over HTTP to a running server"""
+    def post(path, body, headers):
+        request = urllib.request.Request(base_url + path, data=body, method='POST',
+                                         headers=dict(headers, **{'Content-Type': 'application/json'}))
+        try:
+            with urllib.request.urlopen(request, timeout=timeout) as response:
+                return response.status, json.loads(response.read() or 'null')
+        except urllib.error.HTTPError as e:
+            return e.code, json.loads(e.read() or 'null')
+    return post
+
+
+class FakeGateway:
+    """Builds callbacks in a gateway's vocabulary and delivers them signed like the gateway would"""
+
+    def __init__(self, post, gateway='fawry', secret='test-secret'):
+        self.post = post
+        self.gateway = gateway
+        self.secret = secret
+        # Our statuses in this gateway's words, e.g. completed -> PAID
+        self.statuses = {}
+        for gateway_status, status in GATEWAY_STATUSES[gateway].items():
+            self.statuses.setdefault(status, gateway_status)
+        self._ids = itertools.count(1)
+
+    def event(self, transaction_id, status, amount=None, event_id=None):
+        """A callback for a transaction; status is a Payment.status"""
+        event = {'id': event_id or f'{self.gateway}-evt-{next(self._ids)}',
+                 'transaction_id': transaction_id, 'status': self.statuses[status]}
+        if amount is not None:
+            event['amount'] = amount
+        return event
+
+    def deliver(self, events, secret=None, raw=None):
+        """Post events (one callback, or a batch for several); returns (status, response JSON)"""
+        if raw is None:
+            raw = json.dumps(events[0] if len(events) == 1 else {'events': events}).encode()
+        headers = {SIGNATURE_HEADER: 'sha256=' + sign(secret or self.secret, raw)}
+        return self.post(WEBHOOK_PATH.format(gateway=self.gateway), raw, headers)
+
+
+def pending_transactions(limit):
+    """(transaction_id, amount) of up to `limit` pending payments in the configured database"""
+    from app import create_app
+    from models import Payment
+
+    app = create_app()
+    with app.app_context():
+        return Payment.query.with_entities(Payment.transaction_id, Payment.amount).filter(
+            Payment.status == 'pending', Payment.transaction_id.isnot(None)
+        ).order_by(Payment.id).limit(limit).all()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Send signed payment callbacks for pending payments')
+    parser.add_argument('--url', default='http://127.0.0.1:5000', help='Server to deliver to')
+    parser.add_argument('--gateway', default='fawry', choices=sorted(GATEWAY_STATUSES))
+    parser.add_argument('--secret', required=True, help="The gateway's PAYMENT_WEBHOOK_SECRETS entry")
+    parser.add_argument('--status', default='completed', choices=['completed', 'failed', 'refunded'])
+    parser.add_argument('--limit', type=int, default=1000, help='Pending payments to settle')
+    parser.add_argument('--batch', type=int, default=50, help='Callbacks per request')
+    parser.add_argument('--redeliver', action='store_true', help='Send every burst twice, as gateways do on timeouts')
+    args = parser.parse_args(argv)
+
+    gateway = FakeGateway(http_transport(args.url), args.gateway, args.secret)
+    transactions = pending_transactions(args.limit)
+    for start in range(0, len(transactions), args.batch):
+        events = [gateway.event(transaction_id, args.status, amount)
+                  for transaction_id, amount in transactions[start:start + args.batch]]
+        for _ in range(2 if args.redeliver else 1):
+            status, body = gateway.deliver(events)
+            payload = body[0] if isinstance(body, list) else body
+            print(f'{status} {payload}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
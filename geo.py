@@ -0,0 +1,129 @@
+"""Geohash encoding and distance helpers for nearby-field search.
+
+Fields store a geohash of their coordinates in an indexed column. A radius
+search first selects the geohash cells covering the circle's bounding box
+(index range scans on the geohash column) and trims candidates to the box.
+Inside the box an equirectangular (planar) distance, which is plain
+arithmetic and can be filtered and sorted on in SQL, classifies the
+candidates; only those in the thin band where the approximation could be
+wrong are checked with the exact haversine distance.
+"""
+import math
+
+BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+GEOHASH_PRECISION = 9  # ~5m cells
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE_LAT = 111.32
+
+
+def encode_geohash(latitude, longitude, precision=GEOHASH_PRECISION):
+    """Geohash of a point, or None when the point is incomplete"""
+    if latitude is None or longitude is None:
+        return None
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    value = 0
+    even = True
+    while len(chars) < precision:
+        span, coordinate = (lng_range, longitude) if even else (lat_range, latitude)
+        middle = (span[0] + span[1]) / 2
+        if coordinate >= middle:
+            value = (value << 1) | 1
+            span[0] = middle
+        else:
+            value <<= 1
+            span[1] = middle
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(BASE32[value])
+            bits = 0
+            value = 0
+    return ''.join(chars)
+
+
+def cell_size(precision):
+    """(latitude, longitude) size in degrees of a geohash cell"""
+    lng_bits = (5 * precision + 1) // 2
+    lat_bits = 5 * precision // 2
+    return 180.0 / 2 ** lat_bits, 360.0 / 2 ** lng_bits
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    """Great-circle distance between two points in kilometres"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lng2 - lng1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def bounding_box(latitude, longitude, radius_km):
+    """(min_lat, min_lng, max_lat, max_lng) enclosing a circle"""
+    d_lat = radius_km / KM_PER_DEGREE_LAT
+    cos_lat = math.cos(math.radians(latitude))
+    d_lng = 180.0 if cos_lat < 1e-6 else min(180.0, radius_km / (KM_PER_DEGREE_LAT * cos_lat))
+    return (max(-90.0, latitude - d_lat), max(-180.0, longitude - d_lng),
+            min(90.0, latitude + d_lat), min(180.0, longitude + d_lng))
+
+
+def planar_distance_sq(lat_column, lng_column, latitude, longitude):
+    """SQL expression for the squared equirectangular distance in km² to a point"""
+    dy = (lat_column - latitude) * KM_PER_DEGREE_LAT
+    dx = (lng_column - longitude) * (KM_PER_DEGREE_LAT * math.cos(math.radians(latitude)))
+    return dx * dx + dy * dy
+
+
+def planar_error_margin(latitude, box):
+    """Relative error bound of planar_distance_sq() inside a bounding box.
+
+    The planar distance scales longitude by the cosine at the search point,
+    so its error grows with how much that cosine changes across the box; a
+    small constant covers the curvature the projection ignores.
+    """
+    cos_lat = max(math.cos(math.radians(latitude)), 1e-6)
+    drift = max(abs(1 - math.cos(math.radians(box[0])) / cos_lat),
+                abs(1 - math.cos(math.radians(box[2])) / cos_lat))
+    return drift + 0.005
+
+
+def covering_cells(box, max_cells=16):
+    """Geohash prefixes whose cells together cover a bounding box.
+
+    Uses the finest precision that needs at most max_cells cells, so the
+    geohash index is read with a few narrow range scans.
+    """
+    min_lat, min_lng, max_lat, max_lng = box
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        lat_step, lng_step = cell_size(precision)
+        rows = int(math.floor((max_lat + 90) / lat_step) - math.floor((min_lat + 90) / lat_step)) + 1
+        cols = int(math.floor((max_lng + 180) / lng_step) - math.floor((min_lng + 180) / lng_step)) + 1
+        if rows * cols <= max_cells:
+            break
+
+    cells = set()
+    lat = min_lat
+    for _ in range(rows):
+        lng = min_lng
+        for _ in range(cols):
+            cells.add(encode_geohash(min(lat, max_lat), min(lng, max_lng), precision))
+            lng += lng_step
+        lat += lat_step
+    # Make sure the far corners are included despite float stepping
+    cells.add(encode_geohash(max_lat, max_lng, precision))
+    cells.add(encode_geohash(max_lat, min_lng, precision))
+    cells.add(encode_geohash(min_lat, max_lng, precision))
+    return sorted(cells)
+
+
+def parse_near(value):
+    """Parse a 'lat,lng' query parameter, raising ValueError when invalid"""
+    parts = (value or '').split(',')
+    if len(parts) != 2:
+        raise ValueError('near must be lat,lng')
+    latitude, longitude = float(parts[0]), float(parts[1])
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180) or math.isnan(latitude + longitude):
+        raise ValueError('near is out of range')
+    return latitude, longitude
@@ -0,0 +1,70 @@
+"""Production gunicorn settings: gunicorn -c gunicorn.conf.py wsgi:app
+
+Every setting can be overridden from the environment (or on the command
+line). Worker models:
+
+  gthread  (default) WEB_CONCURRENCY processes x GUNICORN_THREADS threads.
+           Good for this API: requests mostly wait on the database and the
+           threads share one connection pool per process.
+  gevent   One greenlet per request, up to GUNICORN_WORKER_CONNECTIONS per
+           process. Needs `pip install gevent`; pays off with many slow
+           clients or long external calls (payment gateways).
+  sync     One request per process at a time.
+
+Compare them on the benchmark scenarios with `python -m benchmarks.workers`.
+"""
+import gc
+import multiprocessing
+import os
+
+cores = multiprocessing.cpu_count()
+
+bind = os.environ.get('GUNICORN_BIND', f"0.0.0.0:{os.environ.get('PORT', '8000')}")
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+
+# Processes: 2 x cores + 1 for sync workers, which only serve one request at a
+# time; threaded and gevent workers get their concurrency inside the process,
+# so one per core (plus one to cover a worker blocked in CPU work) is enough
+default_workers = 2 * cores + 1 if worker_class == 'sync' else cores + 1
+workers = int(os.environ.get('WEB_CONCURRENCY', default_workers))
+threads = int(os.environ.get('GUNICORN_THREADS', 4 if worker_class == 'gthread' else 1))
+worker_connections = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS', 1000))
+
+# config.Config sizes each worker's connection pool from these (DB_MAX_CONNECTIONS split
+# between the workers, one connection per thread). This file is read before the app is
+# imported, so pass on the computed defaults; set them here rather than with -w/--threads
+os.environ['WEB_CONCURRENCY'] = str(workers)
+os.environ['GUNICORN_THREADS'] = str(threads)
+
+# Load the app once in the master and fork the workers from it: startup work and
+# read-only data (translation catalogs, compiled code) is shared copy-on-write.
+# Pooled database connections are not shared: create_app disposes them in every
+# forked worker (prefork.py).
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'true').lower() == 'true'
+
+# Recycle workers after a number of requests to bound memory growth; the jitter
+# keeps them from all restarting at the same moment
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 2000))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', 200))
+
+# Keep-alive must outlast the load balancer's idle timeout (60s on most), or the
+# balancer may reuse a connection the worker is closing
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 75))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+
+# '-' logs requests to stdout, an empty value turns the access log off
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG', '-') or None
+loglevel = os.environ.get('GUNICORN_LOG_LEVEL', 'info')
+forwarded_allow_ips = os.environ.get('FORWARDED_ALLOW_IPS', '127.0.0.1')
+
+
+def pre_fork(server, worker):
+    """Keep the master's objects out of the workers' garbage collections.
+
+    A collection writes to every object it scans, which copies the page the
+    object lives on into the worker. Frozen objects are never scanned, so the
+    preloaded app stays shared. Connection pools and locks are reset in the
+    workers by create_app's fork hooks (prefork.py).
+    """
+    gc.freeze()
@@ -0,0 +1,158 @@
+"""Idempotency-Key support for POST endpoints that create resources.
+
+Clients send a unique Idempotency-Key header with a request and the same
+key with every retry of it. The first request runs the view and its
+response is stored in the indexed `idempotency_keys` table for
+IDEMPOTENCY_TTL_HOURS; retries get the stored response back, marked with
+Idempotent-Replayed: true, without running the view again. Keys are scoped
+to the JWT identity, so views must be wrapped in jwt_required() first:
+
+    @bookings_bp.route('/bookings', methods=['POST'])
+    @jwt_required()
+    @idempotent
+    def create_booking(): ...
+
+A key reused with a different method, path or body is rejected with 422,
+and a retry that arrives while the first request is still running gets
+409. Server errors (5xx) are not stored, so the client can retry them. A
+request that never finished (its worker was killed) holds the key for
+IDEMPOTENCY_LOCK_SECONDS; after that the next retry takes it over.
+Requests without the header are not affected.
+"""
+import hashlib
+import itertools
+from datetime import datetime, timedelta
+from functools import wraps
+from flask import current_app, jsonify, make_response, request
+from flask_jwt_extended import get_jwt_identity
+from sqlalchemy.exc import IntegrityError
+from utils import create_error_response
+
+HEADER = 'Idempotency-Key'
+REPLAYED_HEADER = 'Idempotent-Replayed'
+MAX_KEY_LENGTH = 255
+
+# Every N stored keys, delete expired keys of all users
+SWEEP_INTERVAL = 100
+_stored = itertools.count(1)
+
+
+def request_fingerprint():
+    """sha256 of the current request's method, path and body"""
+    digest = hashlib.sha256()
+    for part in (request.method.encode(), request.path.encode(), request.get_data()):
+        digest.update(part)
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def purge_expired_keys(now=None):
+    """Delete expired idempotency keys, return the number removed"""
+    from models import db, IdempotencyKey
+
+    deleted = IdempotencyKey.query.filter(
+        IdempotencyKey.expires_at < (now or datetime.utcnow())
+    ).delete(synchronize_session=False)
+    db.session.commit()
+    return deleted
+
+
+def _replay(record):
+    response = current_app.response_class(record.response_body, status=record.status_code,
+                                          mimetype=record.response_mimetype)
+    response.headers[REPLAYED_HEADER] = 'true'
+    return response
+
+
+def _existing_response(record, fingerprint):
+    if record.fingerprint != fingerprint:
+        return jsonify(create_error_response('idempotency_key_mismatch')), 422
+    if record.status_code is None:
+        return jsonify(create_error_response('idempotency_request_in_progress')), 409
+    return _replay(record)
+
+
+def _reserve(user_id, key, fingerprint, now):
+    """Insert the in-progress row for key; the existing row if another request holds it"""
+    from models import db, IdempotencyKey
+
+    record = IdempotencyKey.query.filter_by(user_id=user_id, key=key).first()
+    lock = timedelta(seconds=current_app.config.get('IDEMPOTENCY_LOCK_SECONDS', 120))
+    ttl = timedelta(hours=current_app.config.get('IDEMPOTENCY_TTL_HOURS', 24))
+    if record is not None and record.status_code is None and record.created_at < now - lock:
+        # Abandoned by a request that died; only one of several retries wins it
+        taken = IdempotencyKey.query.filter_by(
+            id=record.id, status_code=None, created_at=record.created_at
+        ).update({'fingerprint': fingerprint, 'created_at': now, 'expires_at': now + ttl},
+                 synchronize_session=False)
+        db.session.commit()
+        if taken:
+            db.session.refresh(record)
+            return record, True
+        return IdempotencyKey.query.filter_by(user_id=user_id, key=key).first(), False
+    if record is not None and record.expires_at >= now:
+        return record, False
+    if record is not None:
+        db.session.delete(record)
+        db.session.flush()
+
+    record = IdempotencyKey(user_id=user_id, key=key, fingerprint=fingerprint, expires_at=now + ttl)
+    record.created_at = now
+    db.session.add(record)
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # A concurrent request with the same key inserted first
+        db.session.rollback()
+        return IdempotencyKey.query.filter_by(user_id=user_id, key=key).first(), False
+    return record, True
+
+
+def _release(record_id):
+    from models import db, IdempotencyKey
+
+    db.session.rollback()
+    IdempotencyKey.query.filter_by(id=record_id).delete(synchronize_session=False)
+    db.session.commit()
+
+
+def idempotent(view):
+    """Store the view's response under the request's Idempotency-Key and replay it for retries"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        from models import db, IdempotencyKey
+
+        key = request.headers.get(HEADER)
+        if key is None:
+            return view(*args, **kwargs)
+        key = key.strip()
+        if not key or len(key) > MAX_KEY_LENGTH:
+            return jsonify(create_error_response('invalid_idempotency_key')), 400
+
+        identity = get_jwt_identity()
+        user_id = identity['id'] if identity else None
+        fingerprint = request_fingerprint()
+        record, reserved = _reserve(user_id, key, fingerprint, datetime.utcnow())
+        if not reserved:
+            return _existing_response(record, fingerprint)
+
+        record_id = record.id
+        try:
+            response = make_response(view(*args, **kwargs))
+        except Exception:
+            _release(record_id)
+            raise
+        if response.status_code >= 500 or response.is_streamed:
+            _release(record_id)
+            return response
+
+        record = db.session.get(IdempotencyKey, record_id)
+        record.status_code = response.status_code
+        record.response_body = response.get_data(as_text=True)
+        record.response_mimetype = response.mimetype
+        db.session.commit()
+
+        if next(_stored) % SWEEP_INTERVAL == 0:
+            purge_expired_keys()
+        return response
+    return wrapper
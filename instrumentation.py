@@ -0,0 +1,129 @@
+import random
+import time
+from flask import Response, g, has_request_context, request
+from sqlalchemy import event
+from metrics import registry
+
+try:
+    from pyinstrument import Profiler
+except ImportError:  # Profiling is optional
+    Profiler = None
+
+request_duration_seconds = registry.histogram(
+    'http_request_duration_seconds',
+    'Request latency by endpoint',
+    ['method', 'endpoint']
+)
+requests_total = registry.counter(
+    'http_requests_total',
+    'Requests by endpoint and status code',
+    ['method', 'endpoint', 'status']
+)
+request_db_queries = registry.histogram(
+    'http_request_db_queries',
+    'SQL statements executed per request',
+    ['endpoint'],
+    buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500)
+)
+request_db_seconds = registry.histogram(
+    'http_request_db_seconds',
+    'Total time spent in SQL per request',
+    ['endpoint']
+)
+
+# Statements kept per request for the slow request trace
+MAX_TRACED_QUERIES = 200
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_start_time', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start_times = conn.info.get('query_start_time')
+    if not start_times:
+        return
+    elapsed = time.perf_counter() - start_times.pop()
+
+    if not has_request_context() or 'sql_query_count' not in g:
+        return
+    g.sql_query_count += 1
+    g.sql_time += elapsed
+    if len(g.sql_trace) < MAX_TRACED_QUERIES:
+        g.sql_trace.append((elapsed, statement))
+
+
+def instrument_engine(engine):
+    """Count and time every statement executed on the engine"""
+    if not event.contains(engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+
+
+def _format_trace(trace):
+    lines = []
+    for elapsed, statement in trace:
+        statement = ' '.join(statement.split())
+        if len(statement) > 300:
+            statement = statement[:300] + '...'
+        lines.append(f'  {elapsed * 1000:8.2f}ms  {statement}')
+    return '\n'.join(lines)
+
+
+def init_instrumentation(app, db):
+    """Register request timing, SQL counting, slow request logging and /metrics"""
+    with app.app_context():
+        for engine in db.engines.values():
+            instrument_engine(engine)
+
+    slow_threshold = app.config.get('SLOW_REQUEST_THRESHOLD_MS', 500) / 1000.0
+    sample_rate = app.config.get('PROFILER_SAMPLE_RATE', 0.0)
+    profiling = Profiler is not None and sample_rate > 0
+
+    @app.before_request
+    def start_request_timer():
+        g.request_start_time = time.perf_counter()
+        g.sql_query_count = 0
+        g.sql_time = 0.0
+        g.sql_trace = []
+        if profiling and random.random() < sample_rate:
+            g.profiler = Profiler()
+            g.profiler.start()
+
+    @app.after_request
+    def record_request_metrics(response):
+        if 'request_start_time' not in g:
+            return response
+
+        duration = time.perf_counter() - g.request_start_time
+        endpoint = request.endpoint or 'unmatched'
+        requests_total.inc(method=request.method, endpoint=endpoint, status=response.status_code)
+        request_duration_seconds.observe(duration, method=request.method, endpoint=endpoint)
+        request_db_queries.observe(g.sql_query_count, endpoint=endpoint)
+        request_db_seconds.observe(g.sql_time, endpoint=endpoint)
+
+        profiler = g.pop('profiler', None)
+        if profiler is not None:
+            profiler.stop()
+
+        if duration >= slow_threshold:
+            app.logger.warning(
+                'Slow request %s %s (%s): %.1fms, %d queries, %.1fms in SQL\n%s',
+                request.method, request.path, endpoint, duration * 1000,
+                g.sql_query_count, g.sql_time * 1000, _format_trace(g.sql_trace)
+            )
+            if profiler is not None:
+                app.logger.warning('Profile for %s %s\n%s', request.method, request.path,
+                                   profiler.output_text(unicode=False, color=False))
+
+        if app.config.get('SERVER_TIMING_HEADER'):
+            response.headers['Server-Timing'] = (
+                f'db;dur={g.sql_time * 1000:.2f};desc="{g.sql_query_count} queries", '
+                f'total;dur={duration * 1000:.2f}'
+            )
+        return response
+
+    if app.config.get('METRICS_ENABLED', True):
+        @app.route('/metrics')
+        def metrics():
+            return Response(registry.render(), mimetype='text/plain; version=0.0.4')
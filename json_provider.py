@@ -0,0 +1,95 @@
+"""JSON provider for the Flask app.
+
+Encodes with orjson when it is installed and falls back to the standard
+library otherwise. Both paths write dates, times and datetimes as ISO 8601
+strings, so serializers can hand date/time values straight to jsonify()
+instead of calling isoformat() per row.
+"""
+import dataclasses
+import decimal
+import json
+import uuid
+from datetime import date, time
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # The fast encoder is optional
+    orjson = None
+
+
+def _default(value):
+    """Encode the types the standard library json module does not know"""
+    if isinstance(value, (date, time)):
+        return value.isoformat()
+    if isinstance(value, decimal.Decimal):
+        return float(value)
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return dataclasses.asdict(value)
+    if hasattr(value, '__html__'):
+        return str(value.__html__())
+    raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """JSON provider using orjson when available.
+
+    Configured by JSON_FAST_ENCODER (use orjson if installed), JSON_COMPACT
+    (no indentation; when None, indent only in debug mode) and JSON_SORT_KEYS.
+    """
+
+    default = staticmethod(_default)
+
+    def __init__(self, app):
+        super().__init__(app)
+        self.use_orjson = orjson is not None and app.config.get('JSON_FAST_ENCODER', True)
+        self.compact = app.config.get('JSON_COMPACT', True)
+        self.sort_keys = app.config.get('JSON_SORT_KEYS', False)
+
+    def _orjson_options(self, indent):
+        options = orjson.OPT_NON_STR_KEYS
+        if indent:
+            options |= orjson.OPT_INDENT_2
+        if self.sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        return options
+
+    def _indent(self):
+        if self.compact is None:
+            return self._app.debug
+        return not self.compact
+
+    def dumps_bytes(self, obj, indent=False):
+        """Encode obj as UTF-8 JSON bytes"""
+        if self.use_orjson:
+            try:
+                return orjson.dumps(obj, default=_default, option=self._orjson_options(indent))
+            except TypeError:
+                # e.g. integers beyond 64 bits, which the standard library handles
+                pass
+        return json.dumps(
+            obj, default=_default, ensure_ascii=False, sort_keys=self.sort_keys,
+            indent=2 if indent else None, separators=None if indent else (',', ':')
+        ).encode('utf-8')
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            # Explicit json.dumps() options, e.g. from extensions
+            kwargs.setdefault('default', _default)
+            return json.dumps(obj, **kwargs)
+        return self.dumps_bytes(obj).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        if self.use_orjson and not kwargs:
+            return orjson.loads(s)
+        return json.loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(
+            self.dumps_bytes(obj, indent=self._indent()) + b'\n', mimetype=self.mimetype
+        )
@@ -1,7 +1,11 @@
+import re
 from flask_bcrypt import Bcrypt
 from datetime import datetime, time
-# Import db from app.py
-from app import db
+from functools import lru_cache
+from sqlalchemy import event, inspect
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from geo import encode_geohash
+from extensions import db
 
 bcrypt = Bcrypt()
 
@@ -59,6 +63,9 @@ class OTP(db.Model):
     expires_at = db.Column(db.DateTime, nullable=False)
     used = db.Column(db.Boolean, default=False)
     
+    # Lookups, rate limiting and cleanup all filter by email first
+    __table_args__ = (db.Index('ix_otps_email_created_at', 'email', 'created_at'),)
+    
     def __init__(self, email=None, otp_code=None, expires_at=None):
         if email is not None:
             self.email = email
@@ -67,6 +74,27 @@ class OTP(db.Model):
         if expires_at is not None:
             self.expires_at = expires_at
 
+class IdempotencyKey(db.Model):
+    __tablename__ = 'idempotency_keys'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)
+    key = db.Column(db.String(255), nullable=False)
+    # sha256 of method, path and body: the same key with another request is rejected
+    fingerprint = db.Column(db.String(64), nullable=False)
+    # Empty while the first request is still running
+    status_code = db.Column(db.Integer, nullable=True)
+    response_body = db.Column(db.Text, nullable=True)
+    response_mimetype = db.Column(db.String(100), nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False)
+    
+    # One row per client key; expired rows are swept by expires_at
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'key', name='uq_idempotency_keys_user_key'),
+        db.Index('ix_idempotency_keys_expires_at', 'expires_at'),
+    )
+
 class Team(db.Model):
     __tablename__ = 'teams'
     
@@ -87,9 +115,11 @@ class Team(db.Model):
         if leader_id is not None:
             self.leader_id = leader_id
     
-    def to_dict(self):
-        # Count members without using len() on the relationship
-        members_count = db.session.query(TeamMember).filter(TeamMember.team_id == self.id).count()
+    def to_dict(self, members_count=None):
+        # List endpoints pass counts fetched in one grouped query; otherwise count
+        # members without loading the relationship
+        if members_count is None:
+            members_count = db.session.query(TeamMember).filter(TeamMember.team_id == self.id).count()
         return {
             'id': self.id,
             'name': self.name,
@@ -171,6 +201,28 @@ class Payment(db.Model):
             'completed_at': self.completed_at.isoformat() if self.completed_at else None
         }
 
+class PaymentEvent(db.Model):
+    """A payment gateway callback, queued until the webhook worker applies it"""
+    __tablename__ = 'payment_events'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    gateway = db.Column(db.String(30), nullable=False)  # vodafone_cash, fawry, card
+    # The gateway's id of the callback; redeliveries of the same callback are dropped
+    event_id = db.Column(db.String(100), nullable=False)
+    transaction_id = db.Column(db.String(100), nullable=False)
+    status = db.Column(db.String(20), nullable=False)  # gateway status mapped to Payment.status
+    amount = db.Column(db.Float, nullable=True)
+    payload = db.Column(db.JSON, nullable=True)
+    received_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    processed_at = db.Column(db.DateTime, nullable=True)
+    result = db.Column(db.String(20), nullable=True)  # applied, duplicate, invalid_transition, failed, ...
+    
+    # The worker polls unprocessed events in arrival order
+    __table_args__ = (
+        db.UniqueConstraint('gateway', 'event_id', name='uq_payment_events_gateway_event'),
+        db.Index('ix_payment_events_processed_at_id', 'processed_at', 'id'),
+    )
+
 class Field(db.Model):
     __tablename__ = 'fields'
     
@@ -184,8 +236,20 @@ class Field(db.Model):
     owner_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     latitude = db.Column(db.Float, nullable=True)
     longitude = db.Column(db.Float, nullable=True)
+    # Geohash of latitude/longitude, kept in sync on insert/update, for radius search
+    geohash = db.Column(db.String(12), nullable=True)
     opening_time = db.Column(db.Time, nullable=False, default=lambda: time(8, 0))  # Default 8:00 AM
     closing_time = db.Column(db.Time, nullable=False, default=lambda: time(22, 0))  # Default 10:00 PM
+    # Rating aggregates, maintained by update_field_rating() as reviews change
+    rating_sum = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rating_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rating_avg = db.Column(db.Float, nullable=False, default=0.0, server_default='0')
+    
+    __table_args__ = (
+        db.Index('ix_fields_rating', 'rating_avg', 'rating_count'),
+        # Covers radius searches: geohash range scans, bounding box and distance
+        db.Index('ix_fields_geo', 'geohash', 'latitude', 'longitude'),
+    )
     
     # Relationships
     bookings = db.relationship('Booking', backref='field', lazy=True)
@@ -218,15 +282,8 @@ class Field(db.Model):
             self.closing_time = closing_time
     
     def to_dict(self):
-        # Access facilities through a direct query to avoid relationship issues
-        from models import Facility
-        facilities_list = []
-        try:
-            facilities = Facility.query.filter_by(field_id=self.id).all()
-            facilities_list = [facility.to_dict() for facility in facilities]
-        except:
-            # If we can't access facilities, return empty list
-            pass
+        # List endpoints preload facilities with selectinload(Field.facilities)
+        facilities_list = [facility.to_dict() for facility in self.facilities]
         
         return {
             'id': self.id,
@@ -241,9 +298,16 @@ class Field(db.Model):
             'longitude': self.longitude,
             'opening_time': self.opening_time.isoformat() if self.opening_time else None,
             'closing_time': self.closing_time.isoformat() if self.closing_time else None,
+            'average_rating': round(self.rating_avg or 0, 2),
+            'reviews_count': self.rating_count or 0,
             'facilities': facilities_list
         }
 
+@event.listens_for(Field, 'before_insert')
+@event.listens_for(Field, 'before_update')
+def _set_field_geohash(mapper, connection, field):
+    field.geohash = encode_geohash(field.latitude, field.longitude)
+
 class Booking(db.Model):
     __tablename__ = 'bookings'
     
@@ -326,12 +390,36 @@ class Review(db.Model):
             'created_at': self.created_at.isoformat()
         }
 
+class FacilityType(db.Model):
+    __tablename__ = 'facility_types'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    # Normalized name, e.g. 'changing_rooms', see facility_code()
+    code = db.Column(db.String(100), unique=True, nullable=False)
+    name = db.Column(db.String(100), nullable=False)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'code': self.code,
+            'name': self.name
+        }
+
 class Facility(db.Model):
     __tablename__ = 'facilities'
     
     id = db.Column(db.Integer, primary_key=True)
-    field_id = db.Column(db.Integer, db.ForeignKey('fields.id'), nullable=False)
+    field_id = db.Column(db.Integer, db.ForeignKey('fields.id'), nullable=False, index=True)
     name = db.Column(db.String(100), nullable=False)
+    # Catalog entry for name, set on insert/update
+    facility_type_id = db.Column(db.Integer, db.ForeignKey('facility_types.id'), nullable=True)
+    # Joined into every facility query: the catalog is small and to_dict needs its code
+    facility_type = db.relationship('FacilityType', lazy='joined')
+    
+    __table_args__ = (
+        # Field ids per facility type, for facilities= filters
+        db.Index('ix_facilities_type_field', 'facility_type_id', 'field_id'),
+    )
     
     def __init__(self, field_id=None, name=None):
         if field_id is not None:
@@ -343,16 +431,95 @@ class Facility(db.Model):
         return {
             'id': self.id,
             'field_id': self.field_id,
-            'name': self.name
+            'name': self.name,
+            'code': self.facility_type.code if self.facility_type is not None else None
         }
 
+def facility_code(name):
+    """Catalog code of a facility name: 'Changing Rooms' -> 'changing_rooms'"""
+    from search_index import normalize_text
+    
+    return '_'.join(re.findall(r'[^\W_]+', normalize_text(name)))
+
+def get_facility_type_ids(connection, names):
+    """Catalog ids for facility names, adding the names missing from the catalog"""
+    codes = {}
+    for name in names:
+        code = facility_code(name)
+        if code:
+            codes.setdefault(code, name)
+    if not codes:
+        return {}
+    
+    types = FacilityType.__table__
+    select_ids = db.select(types.c.code, types.c.id).where(types.c.code.in_(list(codes)))
+    ids = dict(connection.execute(select_ids).all())
+    missing = [{'code': code, 'name': name} for code, name in codes.items() if code not in ids]
+    if missing:
+        # Names may be added by a concurrent transaction at the same time: skip
+        # the codes that exist by now and read every id back
+        connection.execute(_insert_ignore(connection, types), missing)
+        ids = dict(connection.execute(select_ids).all())
+    return {name: ids[facility_code(name)] for name in names if facility_code(name)}
+
+def _insert_ignore(connection, table):
+    """INSERT that skips rows violating a unique constraint"""
+    dialect = connection.dialect.name
+    if dialect == 'sqlite':
+        return sqlite.insert(table).on_conflict_do_nothing()
+    if dialect == 'postgresql':
+        return postgresql.insert(table).on_conflict_do_nothing()
+    if dialect in ('mysql', 'mariadb'):
+        return mysql.insert(table).prefix_with('IGNORE')
+    return db.insert(table)
+
+@event.listens_for(Facility, 'before_insert')
+def _set_facility_type(mapper, connection, facility):
+    facility.facility_type_id = get_facility_type_ids(connection, [facility.name]).get(facility.name)
+
+@event.listens_for(Facility, 'before_update')
+def _update_facility_type(mapper, connection, facility):
+    if inspect(facility).attrs.name.history.has_changes():
+        _set_facility_type(mapper, connection, facility)
+
+# Notification codes: (title key, message key, {param: key prefix of its localized value})
+NOTIFICATION_TEMPLATES = {
+    'new_review': ('new_review_received', 'new_review_message', {}),
+    'new_payment': ('new_payment_received', 'new_payment_message', {}),
+    'payment_status': ('payment_status_updated', 'payment_status_message', {'status': 'payment_status_'}),
+    'refund_processed': ('refund_processed', 'refund_processed_message', {}),
+}
+
+@lru_cache(maxsize=4096)
+def _render_notification(code, params, locale):
+    from translations import translate
+    
+    title_key, message_key, localized = NOTIFICATION_TEMPLATES[code]
+    params = dict(params)
+    for name, prefix in localized.items():
+        if name in params:
+            params[name] = translate(prefix + str(params[name]), locale)
+    return translate(title_key, locale), translate(message_key, locale, **params)
+
+def render_notification(code, params, locale):
+    """(title, message) of a coded notification in locale, cached per code, params and locale"""
+    items = tuple(sorted((params or {}).items()))
+    try:
+        return _render_notification(code, items, locale)
+    except TypeError:  # unhashable parameter values
+        return _render_notification.__wrapped__(code, items, locale)
+
 class Notification(db.Model):
     __tablename__ = 'notifications'
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
-    title = db.Column(db.String(100), nullable=False)
-    message = db.Column(db.Text, nullable=False)
+    # Coded notifications store a NOTIFICATION_TEMPLATES code and its parameters and are
+    # rendered in the reader's language; title and message hold free text otherwise
+    code = db.Column(db.String(30), nullable=True)
+    params = db.Column(db.JSON, nullable=True)
+    title = db.Column(db.String(100), nullable=True)
+    message = db.Column(db.Text, nullable=True)
     type = db.Column(db.String(50), nullable=False)  # booking_confirmation, booking_cancellation, payment_success, etc.
     is_read = db.Column(db.Boolean, default=False, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
@@ -360,12 +527,22 @@ class Notification(db.Model):
     # Relationship
     user = db.relationship('User', backref=db.backref('notifications', lazy=True))
     
-    def to_dict(self):
+    def render(self, locale=None):
+        """(title, message) in locale, the current request's language by default"""
+        if self.code not in NOTIFICATION_TEMPLATES:
+            return self.title, self.message
+        if locale is None:
+            from utils import get_language
+            locale = get_language()
+        return render_notification(self.code, self.params, locale)
+    
+    def to_dict(self, locale=None):
+        title, message = self.render(locale)
         return {
             'id': self.id,
             'user_id': self.user_id,
-            'title': self.title,
-            'message': self.message,
+            'title': title,
+            'message': message,
             'type': self.type,
             'is_read': self.is_read,
             'created_at': self.created_at.isoformat() if self.created_at else None
@@ -396,3 +573,56 @@ class Analytics(db.Model):
             'user_id': self.user_id,
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
+
+
+def count_team_members(team_ids):
+    """Member counts for several teams in one grouped query"""
+    if not team_ids:
+        return {}
+    rows = db.session.query(TeamMember.team_id, db.func.count(TeamMember.id)).filter(
+        TeamMember.team_id.in_(team_ids)
+    ).group_by(TeamMember.team_id).all()
+    counts = {team_id: 0 for team_id in team_ids}
+    counts.update(dict(rows))
+    return counts
+
+
+def _rating_average(rating_sum, rating_count):
+    return db.case((rating_count > 0, db.cast(rating_sum, db.Float) / rating_count), else_=0.0)
+
+
+def update_field_rating(field_id, added=None, removed=None):
+    """Apply a review rating change to the field's aggregates in one UPDATE.
+
+    Pass `added` for a new review, `removed` for a deleted one and both when a
+    rating changes. The statement is computed from the current column values,
+    so concurrent reviews of the same field do not lose updates.
+    """
+    new_sum = Field.rating_sum + ((added or 0) - (removed or 0))
+    new_count = Field.rating_count + ((added is not None) - (removed is not None))
+    # rating_avg goes first: MySQL evaluates SET clauses left to right using
+    # already updated values
+    db.session.execute(
+        db.update(Field).where(Field.id == field_id).ordered_values(
+            (Field.rating_avg, _rating_average(new_sum, new_count)),
+            (Field.rating_sum, new_sum),
+            (Field.rating_count, new_count)
+        )
+    )
+
+
+def recompute_field_ratings(field_ids=None):
+    """Rebuild rating aggregates from the reviews table, return the number of fields updated"""
+    rating_sum = db.select(db.func.coalesce(db.func.sum(Review.rating), 0)).where(
+        Review.field_id == Field.id
+    ).scalar_subquery()
+    rating_count = db.select(db.func.count(Review.id)).where(Review.field_id == Field.id).scalar_subquery()
+    statement = db.update(Field).ordered_values(
+        (Field.rating_avg, _rating_average(rating_sum, rating_count)),
+        (Field.rating_sum, rating_sum),
+        (Field.rating_count, rating_count)
+    )
+    if field_ids is not None:
+        statement = statement.where(Field.id.in_(field_ids))
+    result = db.session.execute(statement, execution_options={'synchronize_session': False})
+    return result.rowcount
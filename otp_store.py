@@ -0,0 +1,209 @@
+import random
+import string
+from datetime import datetime, timedelta
+from flask import current_app
+from prefork import fork_safe_lock
+
+
+class OTPRateLimitExceeded(Exception):
+    """Raised when an email has requested too many OTPs within the rate window"""
+
+    def __init__(self, retry_after):
+        super().__init__('Too many OTP requests')
+        self.retry_after = retry_after
+
+
+def generate_otp_code(length=6):
+    """Generate a numeric OTP code"""
+    return ''.join(random.choices(string.digits, k=length))
+
+
+class OTPStore:
+    """Interface for OTP storage backends"""
+
+    # Every N issued codes, sweep dead codes for all emails, not just the requester
+    sweep_interval = 100
+
+    def __init__(self, ttl_minutes=10, max_per_window=3, window_minutes=15):
+        self.ttl = timedelta(minutes=ttl_minutes)
+        self.max_per_window = max_per_window
+        self.window = timedelta(minutes=window_minutes)
+        self._issued = 0
+
+    def issue(self, email):
+        """Create and store a new OTP for the email, enforcing the rate limit"""
+        raise NotImplementedError
+
+    def verify(self, email, otp_code):
+        """Check an OTP and consume it. Returns True if the code was valid"""
+        raise NotImplementedError
+
+    def purge(self):
+        """Remove expired and used codes. Returns the number of codes removed"""
+        raise NotImplementedError
+
+    def _maybe_sweep(self):
+        self._issued += 1
+        if self._issued % self.sweep_interval == 0:
+            self.purge()
+
+    def _retry_after(self, oldest_created_at, now):
+        """Seconds until the oldest code in the window stops counting"""
+        remaining = (oldest_created_at + self.window - now).total_seconds()
+        return max(1, int(remaining))
+
+
+class DatabaseOTPStore(OTPStore):
+    """OTP store backed by the indexed `otps` table"""
+
+    def issue(self, email):
+        from models import db, OTP
+
+        now = datetime.utcnow()
+        window_start = now - self.window
+
+        # Drop this email's dead codes first so the table only holds live rows
+        self._purge_email(email, now, window_start)
+
+        recent = db.session.query(
+            db.func.count(OTP.id), db.func.min(OTP.created_at)
+        ).filter(
+            OTP.email == email,
+            OTP.created_at >= window_start
+        ).one()
+        if recent[0] >= self.max_per_window:
+            raise OTPRateLimitExceeded(self._retry_after(recent[1], now))
+
+        otp_code = generate_otp_code()
+        otp = OTP(email=email, otp_code=otp_code, expires_at=now + self.ttl)
+        otp.created_at = now
+        db.session.add(otp)
+        db.session.commit()
+        self._maybe_sweep()
+        return otp_code
+
+    def verify(self, email, otp_code):
+        from models import db, OTP
+
+        now = datetime.utcnow()
+        otp_record = OTP.query.filter(
+            OTP.email == email,
+            OTP.otp_code == otp_code,
+            OTP.used.is_(False),
+            OTP.expires_at >= now
+        ).first()
+        if not otp_record:
+            return False
+
+        # A successful reset invalidates every other outstanding code for the email
+        OTP.query.filter(
+            OTP.email == email,
+            OTP.used.is_(False)
+        ).update({'used': True}, synchronize_session=False)
+        db.session.commit()
+        return True
+
+    def purge(self):
+        from models import db, OTP
+
+        now = datetime.utcnow()
+        deleted = OTP.query.filter(
+            OTP.created_at < now - self.window,
+            db.or_(OTP.used.is_(True), OTP.expires_at < now)
+        ).delete(synchronize_session=False)
+        db.session.commit()
+        return deleted
+
+    def _purge_email(self, email, now, window_start):
+        from models import db, OTP
+
+        # Rows still inside the rate window are kept so they keep counting
+        OTP.query.filter(
+            OTP.email == email,
+            OTP.created_at < window_start,
+            db.or_(OTP.used.is_(True), OTP.expires_at < now)
+        ).delete(synchronize_session='fetch')  # the new code may reuse a deleted row's id
+
+
+class MemoryOTPStore(OTPStore):
+    """In-process OTP store with TTL expiry, for single-worker deployments and tests"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._codes = {}
+        self._lock = fork_safe_lock(self)
+
+    def issue(self, email):
+        now = datetime.utcnow()
+        with self._lock:
+            entries = self._live_entries(email, now)
+            if len(entries) >= self.max_per_window:
+                raise OTPRateLimitExceeded(self._retry_after(entries[0]['created_at'], now))
+
+            otp_code = generate_otp_code()
+            entries.append({
+                'otp_code': otp_code,
+                'created_at': now,
+                'expires_at': now + self.ttl,
+                'used': False
+            })
+            self._codes[email] = entries
+        self._maybe_sweep()
+        return otp_code
+
+    def verify(self, email, otp_code):
+        now = datetime.utcnow()
+        with self._lock:
+            entries = self._live_entries(email, now)
+            for entry in entries:
+                if entry['otp_code'] == otp_code and not entry['used'] and entry['expires_at'] >= now:
+                    for other in entries:
+                        other['used'] = True
+                    return True
+            return False
+
+    def purge(self):
+        now = datetime.utcnow()
+        removed = 0
+        with self._lock:
+            for email in list(self._codes):
+                before = len(self._codes[email])
+                removed += before - len(self._live_entries(email, now))
+        return removed
+
+    def _live_entries(self, email, now):
+        """Entries for the email that still count towards the rate window"""
+        window_start = now - self.window
+        entries = [
+            entry for entry in self._codes.get(email, [])
+            if entry['created_at'] >= window_start
+            or (not entry['used'] and entry['expires_at'] >= now)
+        ]
+        if entries:
+            self._codes[email] = entries
+        else:
+            self._codes.pop(email, None)
+        return entries
+
+
+OTP_STORES = {
+    'database': DatabaseOTPStore,
+    'memory': MemoryOTPStore
+}
+
+
+def create_otp_store(config):
+    """Build the OTP store selected by the OTP_STORE config value"""
+    name = config.get('OTP_STORE', 'database')
+    if name not in OTP_STORES:
+        raise ValueError(f"Unknown OTP_STORE {name!r}, expected one of {', '.join(sorted(OTP_STORES))}")
+    return OTP_STORES[name](
+        ttl_minutes=config.get('OTP_TTL_MINUTES', 10),
+        max_per_window=config.get('OTP_MAX_PER_WINDOW', 3),
+        window_minutes=config.get('OTP_RATE_WINDOW_MINUTES', 15)
+    )
+
+
+def get_otp_store():
+    """Get the OTP store for the current app"""
+    return current_app.extensions['otp_store']
@@ -0,0 +1,69 @@
+"""Fork safety for servers that load the app once and fork workers from it.
+
+With gunicorn's preload_app (or any server that forks after importing the
+app) everything create_app() builds in the master process is inherited by
+the workers. Read-only state such as translation catalogs, compiled code
+and empty caches is shared copy-on-write. Two kinds of state must not be
+shared and are reset in every child by an os.register_at_fork() hook:
+
+  * pooled database connections: two processes talking over one socket
+    corrupt each other's results, so each app's engines are disposed
+  * locks: a lock held by another thread at fork time stays locked forever
+    in the child, so objects registered with fork_safe_lock() get new ones
+
+Callbacks registered with after_fork() run in the child as well.
+"""
+import os
+import threading
+import weakref
+
+_apps = weakref.WeakKeyDictionary()
+# id(owner) -> (weak reference to owner, lock attribute names); keyed by id so
+# that unhashable owners (mappings) can register too
+_lock_owners = {}
+_callbacks = []
+
+
+def fork_safe_lock(owner, attribute='_lock'):
+    """A new lock for owner.<attribute>, replaced with a fresh one in forked children"""
+    key = id(owner)
+    entry = _lock_owners.get(key)
+    if entry is None or entry[0]() is not owner:
+        entry = _lock_owners[key] = (weakref.ref(owner, lambda ref: _forget(key, ref)), set())
+    entry[1].add(attribute)
+    return threading.Lock()
+
+
+def _forget(key, ref):
+    entry = _lock_owners.get(key)
+    if entry is not None and entry[0] is ref:
+        del _lock_owners[key]
+
+
+def after_fork(callback):
+    """Run callback() in every forked child process; usable as a decorator"""
+    _callbacks.append(callback)
+    return callback
+
+
+def init_prefork(app, db):
+    """Dispose app's inherited connection pools in forked children"""
+    _apps[app] = db
+
+
+def reinit_after_fork():
+    from database import dispose_engines
+
+    for ref, attributes in list(_lock_owners.values()):
+        owner = ref()
+        if owner is not None:
+            for attribute in attributes:
+                setattr(owner, attribute, threading.Lock())
+    for app, db in list(_apps.items()):
+        dispose_engines(app, db)
+    for callback in _callbacks:
+        callback()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=reinit_after_fork)
@@ -0,0 +1,71 @@
+from sqlalchemy import event
+
+
+class QueryCounter:
+    """Context manager that records every SQL statement run on the app's engines.
+
+    Usage:
+        with QueryCounter(app) as counter:
+            client.get('/api/fields')
+        print(counter.count, counter.statements)
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.statements = []
+        self._engines = []
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def __enter__(self):
+        from models import db
+
+        with self.app.app_context():
+            self._engines = list(db.engines.values())
+        for engine in self._engines:
+            event.listen(engine, 'before_cursor_execute', self._record)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        for engine in self._engines:
+            event.remove(engine, 'before_cursor_execute', self._record)
+        return False
+
+
+class QueryCountAssertionsMixin:
+    """unittest mixin that fails when a request's query count scales with its page size"""
+
+    page_sizes = (10, 100)
+
+    def count_queries(self, make_request):
+        """Run make_request() and return (response, number of SQL statements)"""
+        with QueryCounter(self.app) as counter:
+            response = make_request()
+        return response, counter
+
+    def assertQueriesDoNotScale(self, request_for_size, sizes=None):
+        """Call request_for_size(size) for each page size and compare the query counts.
+
+        request_for_size should return a test client response listing `size`
+        items. The counts must be identical, otherwise the endpoint issues
+        per-item queries (N+1).
+        """
+        counts = {}
+        statements = {}
+        for size in sizes or self.page_sizes:
+            response, counter = self.count_queries(lambda: request_for_size(size))
+            self.assertEqual(response.status_code, 200, response.get_data(as_text=True))
+            counts[size] = counter.count
+            statements[size] = counter.statements
+
+        if len(set(counts.values())) > 1:
+            largest = max(counts)
+            self.fail(
+                f'Query count scales with page size {counts}. Statements for {largest} items:\n'
+                + '\n'.join(statements[largest][:20])
+            )
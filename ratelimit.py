@@ -0,0 +1,257 @@
+"""Per-client rate limiting and load shedding.
+
+Every request spends tokens from its client's bucket: the JWT user when the
+request carries a valid token, the client address otherwise (behind
+PROXY_FIX_X_FOR proxies, the address they forwarded). Buckets hold
+RATELIMIT_BURST tokens and refill at RATELIMIT_PER_MINUTE tokens a minute.
+Most endpoints cost one token; the expensive ones (availability and club
+search, dashboards, exports) cost more, see DEFAULT_COSTS and
+RATELIMIT_COSTS. A client out of tokens gets 429 with Retry-After.
+
+Buckets live in process memory by default, so each gunicorn worker limits
+on its own. RATELIMIT_STORE=redis shares them between workers and hosts
+(pip install redis, RATELIMIT_REDIS_URL); other backends can be added to
+RATE_LIMIT_STORES.
+
+Load shedding: when the proxy in front of gunicorn stamps requests with
+X-Request-Start (nginx: proxy_set_header X-Request-Start "t=${msec};"),
+requests that waited in the queue longer than LOAD_SHED_QUEUE_MS get 503
+with Retry-After before any work is done for them.
+"""
+import math
+import time
+from flask import current_app, g, jsonify, request
+from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
+from metrics import registry
+from prefork import fork_safe_lock
+from utils import create_error_response
+
+try:
+    import redis
+except ImportError:  # Only needed for RATELIMIT_STORE=redis
+    redis = None
+
+# Tokens per request by endpoint; everything else costs 1
+DEFAULT_COSTS = {
+    'fields.search_available_fields': 5,
+    'clubs.search_clubs': 5,
+    'analytics.get_analytics_dashboard': 5,
+    'analytics.export_bookings_data': 20,
+    'analytics.export_payments_data': 20,
+    'analytics.export_users_data': 20,
+}
+
+# Never limited or shed: load balancer health checks and scrapes, and gateway
+# callbacks, which arrive in bursts from a few addresses and are cheap to queue
+EXEMPT_ENDPOINTS = ('health_check', 'metrics', 'static', 'payments.payment_webhook')
+
+rate_limited_total = registry.counter(
+    'http_rate_limited_total',
+    'Requests rejected with 429 by endpoint',
+    ['endpoint']
+)
+shed_total = registry.counter(
+    'http_shed_total',
+    'Requests rejected with 503 because they queued too long',
+    ['endpoint']
+)
+
+
+class RateLimitStore:
+    """Interface for token bucket backends"""
+
+    def consume(self, key, cost, rate, capacity, now=None):
+        """Take cost tokens from key's bucket.
+
+        rate is in tokens per second. Returns (allowed, tokens left, seconds
+        until cost tokens are available).
+        """
+        raise NotImplementedError
+
+    def clear(self):
+        """Forget every bucket"""
+        raise NotImplementedError
+
+
+class MemoryRateLimitStore(RateLimitStore):
+    """Token buckets in a dict, local to the process"""
+
+    # Every N requests, drop buckets that have refilled completely
+    sweep_interval = 1000
+
+    def __init__(self):
+        self._buckets = {}
+        self._calls = 0
+        self._lock = fork_safe_lock(self)
+
+    def consume(self, key, cost, rate, capacity, now=None):
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * rate)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            self._buckets[key] = (tokens, now)
+
+            self._calls += 1
+            if self._calls % self.sweep_interval == 0:
+                self._sweep(rate, capacity, now)
+        return allowed, tokens, 0 if allowed else _retry_after(tokens, cost, rate)
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+    def _sweep(self, rate, capacity, now):
+        full_after = capacity / rate if rate else math.inf
+        for key, (tokens, updated) in list(self._buckets.items()):
+            if now - updated >= full_after:
+                del self._buckets[key]
+
+
+# KEYS[1] bucket; ARGV cost, rate, capacity, now. Returns {allowed, tokens * 1000}
+TOKEN_BUCKET_SCRIPT = """
+local cost, rate, capacity, now = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3]), tonumber(ARGV[4])
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens, updated = tonumber(bucket[1]) or capacity, tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated) * rate)
+local allowed = 0
+if tokens >= cost then
+  tokens = tokens - cost
+  allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / math.max(rate, 0.001)) + 1)
+return {allowed, math.floor(tokens * 1000)}
+"""
+
+
+class RedisRateLimitStore(RateLimitStore):
+    """Token buckets in Redis, shared by every worker; updated atomically by a Lua script"""
+
+    def __init__(self, url, prefix='ratelimit:'):
+        if redis is None:
+            raise RuntimeError('RATELIMIT_STORE=redis needs the redis package (pip install redis)')
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+        self._script = self.client.register_script(TOKEN_BUCKET_SCRIPT)
+
+    def consume(self, key, cost, rate, capacity, now=None):
+        # Wall clock, so that all hosts agree on the refill
+        now = time.time() if now is None else now
+        allowed, tokens = self._script(keys=[self.prefix + key], args=[cost, rate, capacity, now])
+        tokens = tokens / 1000
+        return bool(allowed), tokens, 0 if allowed else _retry_after(tokens, cost, rate)
+
+    def clear(self):
+        for key in self.client.scan_iter(match=self.prefix + '*'):
+            self.client.delete(key)
+
+
+RATE_LIMIT_STORES = {
+    'memory': lambda config: MemoryRateLimitStore(),
+    'redis': lambda config: RedisRateLimitStore(config.get('RATELIMIT_REDIS_URL', 'redis://localhost:6379/0')),
+}
+
+
+def create_rate_limit_store(config):
+    """Build the store selected by the RATELIMIT_STORE config value"""
+    name = config.get('RATELIMIT_STORE', 'memory')
+    if name not in RATE_LIMIT_STORES:
+        raise ValueError(f"Unknown RATELIMIT_STORE {name!r}, expected one of {', '.join(sorted(RATE_LIMIT_STORES))}")
+    return RATE_LIMIT_STORES[name](config)
+
+
+def _retry_after(tokens, cost, rate):
+    return math.ceil((cost - tokens) / rate) if rate else math.inf
+
+
+def parse_request_start(header, now=None):
+    """Seconds since the proxy stamped X-Request-Start, or None.
+
+    Accepts 't=<seconds>' (nginx ${msec}) and bare seconds, milliseconds or
+    microseconds since the epoch.
+    """
+    if not header:
+        return None
+    value = header.strip()
+    if value.startswith('t='):
+        value = value[2:]
+    try:
+        started = float(value.split(';')[0])
+    except ValueError:
+        return None
+    if started > 1e14:
+        started /= 1e6
+    elif started > 1e11:
+        started /= 1e3
+    now = time.time() if now is None else now
+    return max(0.0, now - started)
+
+
+def client_key():
+    """Rate limit key of the current request: the JWT user, or the client address"""
+    try:
+        verify_jwt_in_request(optional=True)
+        identity = get_jwt_identity()
+    except Exception:  # expired or invalid tokens are rejected by the view itself
+        identity = None
+    if isinstance(identity, dict) and identity.get('id') is not None:
+        return f"user:{identity['id']}"
+    return f'ip:{request.remote_addr}'
+
+
+def init_rate_limiting(app):
+    """Register load shedding and per-client token buckets according to RATELIMIT_* / LOAD_SHED_*"""
+    shed_after = app.config.get('LOAD_SHED_QUEUE_MS', 0) / 1000.0
+    shed_retry_after = app.config.get('LOAD_SHED_RETRY_AFTER', 5)
+    limiting = app.config.get('RATELIMIT_ENABLED', True)
+    if not limiting and not shed_after:
+        return
+
+    capacity = app.config.get('RATELIMIT_BURST', 60)
+    rate = app.config.get('RATELIMIT_PER_MINUTE', 120) / 60.0
+    costs = dict(DEFAULT_COSTS, **app.config.get('RATELIMIT_COSTS', {}))
+    if limiting:
+        app.extensions['rate_limit_store'] = create_rate_limit_store(app.config)
+
+    @app.before_request
+    def limit_request():
+        endpoint = request.endpoint or 'unmatched'
+        if request.method == 'OPTIONS' or endpoint in EXEMPT_ENDPOINTS:
+            return None
+
+        if shed_after:
+            queued = parse_request_start(request.headers.get('X-Request-Start'))
+            if queued is not None and queued > shed_after:
+                shed_total.inc(endpoint=endpoint)
+                response = jsonify(create_error_response('server_overloaded'))
+                response.status_code = 503
+                response.headers['Retry-After'] = str(shed_retry_after)
+                return response
+
+        if not limiting:
+            return None
+        cost = costs.get(endpoint, 1)
+        if cost <= 0:
+            return None
+        allowed, remaining, retry_after = current_app.extensions['rate_limit_store'].consume(
+            client_key(), cost, rate, capacity
+        )
+        g.rate_limit_remaining = int(remaining)
+        if allowed:
+            return None
+        rate_limited_total.inc(endpoint=endpoint)
+        response = jsonify(create_error_response('rate_limit_exceeded'))
+        response.status_code = 429
+        response.headers['Retry-After'] = str(retry_after if retry_after != math.inf else 60)
+        return response
+
+    @app.after_request
+    def add_rate_limit_headers(response):
+        remaining = g.pop('rate_limit_remaining', None)
+        if remaining is not None:
+            response.headers['X-RateLimit-Limit'] = str(capacity)
+            response.headers['X-RateLimit-Remaining'] = str(remaining)
+        return response
@@ -10,6 +10,19 @@ from utils import t, create_response, create_error_response
 
 analytics_bp = Blueprint('analytics', __name__)
 
+def get_booked_hours(field_ids, start_date, end_date):
+    """Booked (non-cancelled) hours per field in a date range, from a single query"""
+    booked_hours = {}
+    bookings = db.session.query(Booking.field_id, Booking.start_time, Booking.end_time).filter(
+        Booking.field_id.in_(field_ids),
+        Booking.date.between(start_date, end_date),
+        Booking.status != 'cancelled'
+    )
+    for field_id, start_time, end_time in bookings:
+        booked_duration = datetime.combine(date.min, end_time) - datetime.combine(date.min, start_time)
+        booked_hours[field_id] = booked_hours.get(field_id, 0) + booked_duration.total_seconds() / 3600
+    return booked_hours
+
 @analytics_bp.route('/analytics/dashboard', methods=['GET'])
 @jwt_required()
 def get_analytics_dashboard():
@@ -64,8 +77,11 @@ def get_analytics_dashboard():
                 Payment.completed_at <= datetime.combine(end_date, datetime.max.time())
             ).scalar() or 0
             
-            # Average field rating
-            avg_rating = db.session.query(func.avg(Review.rating)).scalar() or 0
+            # Average field rating, from the rating aggregates stored on fields
+            rating_sum, rating_count = db.session.query(
+                func.sum(Field.rating_sum), func.sum(Field.rating_count)
+            ).one()
+            avg_rating = rating_sum / rating_count if rating_count else 0
             
             dashboard_data.update({
                 'total_users': total_users,
@@ -96,30 +112,16 @@ def get_analytics_dashboard():
             ).scalar() or 0
             
             # Average rating for owner's fields
-            avg_rating = db.session.query(func.avg(Review.rating)).filter(
-                Review.field_id.in_(field_ids)
-            ).scalar() or 0
+            rating_count = sum(field.rating_count for field in fields)
+            avg_rating = sum(field.rating_sum for field in fields) / rating_count if rating_count else 0
             
             # Field utilization (total booked hours / total available hours)
-            total_booked_hours = 0
-            total_available_hours = 0
+            booked_hours = get_booked_hours(field_ids, start_date, end_date)
+            total_booked_hours = sum(booked_hours.values())
             
-            for field in fields:
-                # Get bookings for this field in the date range
-                bookings = Booking.query.filter(
-                    Booking.field_id == field.id,
-                    Booking.date.between(start_date, end_date),
-                    Booking.status != 'cancelled'
-                ).all()
-                
-                # Calculate booked hours
-                for booking in bookings:
-                    booked_duration = datetime.combine(date.min, booking.end_time) - datetime.combine(date.min, booking.start_time)
-                    total_booked_hours += booked_duration.total_seconds() / 3600
-                
-                # Calculate available hours (assuming 14 hours per day: 8AM-10PM)
-                days_in_range = (end_date - start_date).days + 1
-                total_available_hours += days_in_range * 14  # 14 hours per day
+            # Calculate available hours (assuming 14 hours per day: 8AM-10PM)
+            days_in_range = (end_date - start_date).days + 1
+            total_available_hours = len(fields) * days_in_range * 14  # 14 hours per day
             
             utilization_rate = (total_booked_hours / total_available_hours * 100) if total_available_hours > 0 else 0
             
@@ -356,55 +358,44 @@ def get_field_performance():
         else:
             fields = Field.query.filter_by(owner_id=user.id).all()
         
-        # Calculate performance metrics for each field
+        # Calculate performance metrics for all fields with one grouped query per metric
+        field_ids = [field.id for field in fields]
+        
+        # Total bookings per field
+        bookings_per_field = dict(db.session.query(Booking.field_id, func.count(Booking.id)).filter(
+            Booking.field_id.in_(field_ids),
+            Booking.date.between(start_date, end_date),
+            Booking.status != 'cancelled'
+        ).group_by(Booking.field_id).all())
+        
+        # Total revenue per field
+        revenue_per_field = dict(db.session.query(Booking.field_id, func.sum(Payment.amount)).join(
+            Booking, Payment.booking_id == Booking.id
+        ).filter(
+            Booking.field_id.in_(field_ids),
+            Payment.status == 'completed',
+            Payment.completed_at >= datetime.combine(start_date, datetime.min.time()),
+            Payment.completed_at <= datetime.combine(end_date, datetime.max.time())
+        ).group_by(Booking.field_id).all())
+        
+        # Booked hours per field
+        booked_hours = get_booked_hours(field_ids, start_date, end_date)
+        
+        # Calculate available hours (assuming 14 hours per day: 8AM-10PM)
+        days_in_range = (end_date - start_date).days + 1
+        total_available_hours = days_in_range * 14  # 14 hours per day
+        
         performance_data = []
         for field in fields:
-            # Total bookings for this field
-            total_bookings = Booking.query.filter(
-                Booking.field_id == field.id,
-                Booking.date.between(start_date, end_date),
-                Booking.status != 'cancelled'
-            ).count()
-            
-            # Total revenue from this field
-            total_revenue = db.session.query(func.sum(Payment.amount)).join(Booking).filter(
-                Booking.field_id == field.id,
-                Payment.status == 'completed',
-                Payment.completed_at >= datetime.combine(start_date, datetime.min.time()),
-                Payment.completed_at <= datetime.combine(end_date, datetime.max.time())
-            ).scalar() or 0
-            
-            # Average rating for this field
-            avg_rating = db.session.query(func.avg(Review.rating)).filter(
-                Review.field_id == field.id
-            ).scalar() or 0
-            
-            # Calculate utilization rate
-            # Get bookings for this field in the date range
-            bookings = Booking.query.filter(
-                Booking.field_id == field.id,
-                Booking.date.between(start_date, end_date),
-                Booking.status != 'cancelled'
-            ).all()
-            
-            # Calculate booked hours
-            total_booked_hours = 0
-            for booking in bookings:
-                booked_duration = datetime.combine(date.min, booking.end_time) - datetime.combine(date.min, booking.start_time)
-                total_booked_hours += booked_duration.total_seconds() / 3600
-            
-            # Calculate available hours (assuming 14 hours per day: 8AM-10PM)
-            days_in_range = (end_date - start_date).days + 1
-            total_available_hours = days_in_range * 14  # 14 hours per day
-            
+            total_booked_hours = booked_hours.get(field.id, 0)
             utilization_rate = (total_booked_hours / total_available_hours * 100) if total_available_hours > 0 else 0
             
             performance_data.append({
                 'field_id': field.id,
                 'field_name': field.name,
-                'total_bookings': total_bookings,
-                'total_revenue': round(float(total_revenue), 2),
-                'average_rating': round(float(avg_rating), 2),
+                'total_bookings': bookings_per_field.get(field.id, 0),
+                'total_revenue': round(float(revenue_per_field.get(field.id) or 0), 2),
+                'average_rating': round(field.rating_avg, 2),
                 'utilization_rate': round(utilization_rate, 2)
             })
         
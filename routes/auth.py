@@ -1,10 +1,8 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import create_access_token, get_jwt_identity, jwt_required
-from models import db, User, OTP
-from datetime import datetime, timedelta
+from models import db, User
+from otp_store import get_otp_store, OTPRateLimitExceeded
 from utils import t, create_response, create_error_response
-import random
-import string
 
 auth_bp = Blueprint('auth', __name__)
 
@@ -84,18 +82,13 @@ def forgot_password():
         if not user:
             return jsonify(create_error_response('user_not_found')), 404
             
-        # Generate OTP
-        otp_code = ''.join(random.choices(string.digits, k=6))
-        expires_at = datetime.utcnow() + timedelta(minutes=10)  # OTP expires in 10 minutes
-        
-        # Save OTP to database
-        otp = OTP(
-            email=user.email,
-            otp_code=otp_code,
-            expires_at=expires_at
-        )
-        db.session.add(otp)
-        db.session.commit()
+        # Generate and store OTP (rate limited per email)
+        try:
+            otp_code = get_otp_store().issue(user.email)
+        except OTPRateLimitExceeded as e:
+            response = jsonify(create_error_response('too_many_otp_requests'))
+            response.headers['Retry-After'] = str(e.retry_after)
+            return response, 429
         
         # In a real application, you would send the OTP via email/SMS
         # For now, we'll just return it in the response
@@ -124,14 +117,12 @@ def reset_password():
         if not user:
             return jsonify(create_error_response('user_not_found')), 404
             
-        # Verify OTP
-        otp_record = OTP.query.filter_by(email=data['email'], otp_code=data['otp']).first()
-        if not otp_record or otp_record.used or otp_record.expires_at < datetime.utcnow():
+        # Verify and consume OTP
+        if not get_otp_store().verify(data['email'], data['otp']):
             return jsonify(create_error_response('invalid_otp')), 400
             
         # Update user password
         user.set_password(data['new_password'])
-        otp_record.used = True
         db.session.commit()
         
         return jsonify(create_response('password_reset_successfully')), 200
@@ -2,7 +2,9 @@ from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from models import db, Booking, Field, User, Notification
 from datetime import datetime, date, time
+from serialization import BOOKING_SCHEMA
 from utils import t, create_response, create_error_response
+from idempotency import idempotent
 import json
 
 bookings_bp = Blueprint('bookings', __name__)
@@ -26,6 +28,7 @@ def create_notification(user_id, title, message, notification_type):
 
 @bookings_bp.route('/bookings', methods=['POST'])
 @jwt_required()
+@idempotent
 def create_booking():
     try:
         current_user = get_jwt_identity()
@@ -210,15 +213,27 @@ def get_user_bookings(user_id):
         if per_page < 1 or per_page > 100:
             per_page = 10
         
+        # Sparse fieldsets (fields=id,date,start_time&include=field)
+        try:
+            fieldset = BOOKING_SCHEMA.from_request()
+        except ValueError as e:
+            return jsonify(create_error_response('invalid_data', str(e))), 400
+        
         # Get all bookings for the user with pagination
-        bookings = Booking.query.filter_by(user_id=user_id).paginate(
-            page=page,
-            per_page=per_page,
-            error_out=False
-        )
+        query = Booking.query.filter_by(user_id=user_id)
+        if fieldset:
+            bookings = fieldset.select(query).paginate(page=page, per_page=per_page, error_out=False)
+            bookings_data = fieldset.dump(bookings.items)
+        else:
+            bookings = query.paginate(
+                page=page,
+                per_page=per_page,
+                error_out=False
+            )
+            bookings_data = [booking.to_dict() for booking in bookings.items]
         
         return jsonify(create_response('user_bookings_retrieved_successfully', {
-            'bookings': [booking.to_dict() for booking in bookings.items],
+            'bookings': bookings_data,
             'pagination': {
                 'page': bookings.page,
                 'pages': bookings.pages,
@@ -267,15 +282,27 @@ def get_field_bookings(field_id):
         if per_page < 1 or per_page > 100:
             per_page = 10
         
+        # Sparse fieldsets (fields=id,date,start_time&include=field)
+        try:
+            fieldset = BOOKING_SCHEMA.from_request()
+        except ValueError as e:
+            return jsonify(create_error_response('invalid_data', str(e))), 400
+        
         # Get all bookings for the field with pagination
-        bookings = Booking.query.filter_by(field_id=field_id).paginate(
-            page=page,
-            per_page=per_page,
-            error_out=False
-        )
+        query = Booking.query.filter_by(field_id=field_id)
+        if fieldset:
+            bookings = fieldset.select(query).paginate(page=page, per_page=per_page, error_out=False)
+            bookings_data = fieldset.dump(bookings.items)
+        else:
+            bookings = query.paginate(
+                page=page,
+                per_page=per_page,
+                error_out=False
+            )
+            bookings_data = [booking.to_dict() for booking in bookings.items]
         
         return jsonify(create_response('field_bookings_retrieved_successfully', {
-            'bookings': [booking.to_dict() for booking in bookings.items],
+            'bookings': bookings_data,
             'pagination': {
                 'page': bookings.page,
                 'pages': bookings.pages,
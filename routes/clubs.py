@@ -1,10 +1,62 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from models import db, Team, TeamMember, User, Field, Booking, Review
+from models import db, Team, TeamMember, User, Field, Booking
+from sqlalchemy import func
+from search_index import apply_search
 from utils import t, create_response, create_error_response
 
 clubs_bp = Blueprint('clubs', __name__)
 
+def get_club_stats(owner_ids):
+    """Field, booking and review totals per club (field owner) using grouped queries.
+    
+    Review totals come from the rating aggregates stored on each field.
+
+    owner_ids may be a list of ids or a query selecting them.
+    """
+    stats = {}
+    
+    def club(owner_id):
+        return stats.setdefault(owner_id, {
+            'total_fields': 0,
+            'total_bookings': 0,
+            'total_reviews': 0,
+            'rating_sum': 0
+        })
+    
+    field_totals = db.session.query(
+        Field.owner_id, func.count(Field.id), func.sum(Field.rating_count), func.sum(Field.rating_sum)
+    ).filter(Field.owner_id.in_(owner_ids)).group_by(Field.owner_id)
+    for owner_id, count, review_count, rating_sum in field_totals:
+        club(owner_id)['total_fields'] = count
+        club(owner_id)['total_reviews'] = review_count or 0
+        club(owner_id)['rating_sum'] = rating_sum or 0
+    
+    booking_counts = db.session.query(Field.owner_id, func.count(Booking.id)).join(
+        Booking, Booking.field_id == Field.id
+    ).filter(Field.owner_id.in_(owner_ids)).group_by(Field.owner_id)
+    for owner_id, count in booking_counts:
+        club(owner_id)['total_bookings'] = count
+    
+    return stats
+
+def _average_rating(club_stats):
+    if not club_stats['total_reviews']:
+        return 0
+    return club_stats['rating_sum'] / club_stats['total_reviews']
+
+def _club_to_dict(club, club_stats, average_rating):
+    return {
+        'id': club.id,
+        'name': club.name,
+        'email': club.email,
+        'phone': club.phone,
+        'total_fields': club_stats['total_fields'],
+        'total_bookings': club_stats['total_bookings'],
+        'total_reviews': club_stats['total_reviews'],
+        'average_rating': round(average_rating, 2) if average_rating else 0
+    }
+
 @clubs_bp.route('/clubs', methods=['POST'])
 @jwt_required()
 def create_club():
@@ -117,27 +169,28 @@ def get_club_details(club_id):
         
         # Calculate club statistics
         total_fields = len(fields)
+        field_ids = [field.id for field in fields]
+        
+        # Bookings per field in one grouped query, ratings are stored on the fields
+        bookings_per_field = dict(db.session.query(Booking.field_id, func.count(Booking.id)).filter(
+            Booking.field_id.in_(field_ids)
+        ).group_by(Booking.field_id).all())
+        
         total_bookings = 0
         total_reviews = 0
-        total_rating = 0
         field_ratings = []
         
         field_details = []
         for field in fields:
-            # Get bookings for this field
-            bookings = Booking.query.filter_by(field_id=field.id).all()
-            total_bookings += len(bookings)
+            bookings_count = bookings_per_field.get(field.id, 0)
+            reviews_count = field.rating_count
+            total_bookings += bookings_count
+            total_reviews += reviews_count
             
-            # Get reviews for this field
-            reviews = Review.query.filter_by(field_id=field.id).all()
-            total_reviews += len(reviews)
-            
-            # Calculate average rating for this field
-            field_avg_rating = 0
-            if reviews:
-                field_avg_rating = sum(review.rating for review in reviews) / len(reviews)
+            # Average rating for this field
+            field_avg_rating = field.rating_avg
+            if reviews_count:
                 field_ratings.append(field_avg_rating)
-                total_rating += sum(review.rating for review in reviews)
             
             field_details.append({
                 'id': field.id,
@@ -145,9 +198,9 @@ def get_club_details(club_id):
                 'location': field.location,
                 'governorate': field.governorate,
                 'price_per_hour': field.price_per_hour,
-                'bookings_count': len(bookings),
-                'reviews_count': len(reviews),
-                'average_rating': round(field_avg_rating, 2) if reviews else 0
+                'bookings_count': bookings_count,
+                'reviews_count': reviews_count,
+                'average_rating': round(field_avg_rating, 2) if reviews_count else 0
             })
         
         # Calculate overall club rating
@@ -155,9 +208,10 @@ def get_club_details(club_id):
         if field_ratings:
             club_rating = sum(field_ratings) / len(field_ratings)
         
-        # Get teams registered at this club's fields
-        field_ids = [field.id for field in fields]
-        teams = Team.query.join(Booking).filter(Booking.field_id.in_(field_ids)).distinct(Team.id).all()
+        # Count teams registered at this club's fields
+        registered_teams = db.session.query(func.count(func.distinct(Booking.team_id))).filter(
+            Booking.field_id.in_(field_ids)
+        ).scalar()
         
         return jsonify(create_response('club_details_retrieved_successfully', {
             'club': {
@@ -169,7 +223,7 @@ def get_club_details(club_id):
                 'total_bookings': total_bookings,
                 'total_reviews': total_reviews,
                 'average_rating': round(club_rating, 2) if club_rating else 0,
-                'registered_teams': len(teams),
+                'registered_teams': registered_teams,
                 'fields': field_details
             }
         })), 200
@@ -183,7 +237,7 @@ def search_clubs():
         name = request.args.get('name')
         governorate = request.args.get('governorate')
         min_rating = request.args.get('min_rating', type=float)
-        sort_by = request.args.get('sort_by', 'id')  # Default sort by id
+        sort_by = request.args.get('sort_by', 'relevance' if name else 'id')  # Best matches first when searching
         sort_order = request.args.get('sort_order', 'asc')  # Default ascending
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 10, type=int)
@@ -194,62 +248,48 @@ def search_clubs():
         if per_page < 1 or per_page > 100:
             per_page = 10
         
-        # First, get all field owners (clubs)
-        owner_ids = db.session.query(Field.owner_id).distinct().all()
-        owner_ids = [owner_id[0] for owner_id in owner_ids]
+        # Build query for club owners (users who own at least one field)
+        query = User.query.filter(User.id.in_(db.session.query(Field.owner_id)))
         
-        # Build query for club owners
-        query = User.query.filter(User.id.in_(owner_ids))
-        
-        # Search by club name
+        # Full-text search by club name
+        relevance = None
         if name:
-            search_term = f"%{name.lower()}%"
-            query = query.filter(User.name.ilike(search_term))
+            query, relevance = apply_search(query, User, name)
+        
+        # Filter by governorate: the club needs at least one field there
+        if governorate:
+            query = query.filter(User.id.in_(
+                db.session.query(Field.owner_id).filter(func.lower(Field.governorate) == governorate.lower())
+            ))
         
-        # Get all clubs that match basic filters
+        # Get all clubs that match basic filters, with their stats
         clubs = query.all()
+        ranks = dict(query.with_entities(User.id, relevance)) if relevance is not None else {}
+        stats = get_club_stats(query.with_entities(User.id))
         
-        # Filter by governorate and rating
+        # Filter by rating
         filtered_clubs = []
         for club in clubs:
-            # Get club's fields
-            fields = Field.query.filter_by(owner_id=club.id).all()
-            
-            # Filter by governorate if provided
-            if governorate:
-                governorate_fields = [field for field in fields if field.governorate.lower() == governorate.lower()]
-                if not governorate_fields:
-                    continue  # Skip this club if no fields match governorate
-            
-            # Calculate club rating
-            total_reviews = 0
-            total_rating = 0
-            for field in fields:
-                reviews = Review.query.filter_by(field_id=field.id).all()
-                total_reviews += len(reviews)
-                total_rating += sum(review.rating for review in reviews)
-            
-            average_rating = 0
-            if total_reviews > 0:
-                average_rating = total_rating / total_reviews
+            club_stats = stats[club.id]
+            average_rating = _average_rating(club_stats)
             
             # Filter by minimum rating
             if min_rating is not None and average_rating < min_rating:
                 continue  # Skip this club if rating is below minimum
             
-            # Add club to filtered list with calculated rating
-            club_data = {
+            filtered_clubs.append({
                 'user': club,
-                'fields': fields,
+                'stats': club_stats,
                 'average_rating': average_rating
-            }
-            filtered_clubs.append(club_data)
+            })
         
         # Apply sorting
         if sort_by == 'name':
             filtered_clubs.sort(key=lambda x: x['user'].name.lower(), reverse=(sort_order == 'desc'))
         elif sort_by == 'rating':
             filtered_clubs.sort(key=lambda x: x['average_rating'], reverse=(sort_order == 'desc'))
+        elif sort_by == 'relevance' and ranks:
+            filtered_clubs.sort(key=lambda x: (ranks[x['user'].id], x['user'].id), reverse=(sort_order == 'desc'))
         else:
             # Default sort by id
             filtered_clubs.sort(key=lambda x: x['user'].id, reverse=(sort_order == 'desc'))
@@ -268,33 +308,10 @@ def search_clubs():
         paginated_clubs = filtered_clubs[start_idx:end_idx]
         
         # Format response data
-        clubs_data = []
-        for club_data in paginated_clubs:
-            club = club_data['user']
-            fields = club_data['fields']
-            average_rating = club_data['average_rating']
-            
-            # Get club statistics
-            total_fields = len(fields)
-            total_bookings = 0
-            total_reviews = 0
-            
-            for field in fields:
-                bookings = Booking.query.filter_by(field_id=field.id).all()
-                reviews = Review.query.filter_by(field_id=field.id).all()
-                total_bookings += len(bookings)
-                total_reviews += len(reviews)
-            
-            clubs_data.append({
-                'id': club.id,
-                'name': club.name,
-                'email': club.email,
-                'phone': club.phone,
-                'total_fields': total_fields,
-                'total_bookings': total_bookings,
-                'total_reviews': total_reviews,
-                'average_rating': round(average_rating, 2) if average_rating else 0
-            })
+        clubs_data = [
+            _club_to_dict(club_data['user'], club_data['stats'], club_data['average_rating'])
+            for club_data in paginated_clubs
+        ]
         
         return jsonify(create_response('clubs_searched_successfully', {
             'clubs': clubs_data,
@@ -328,36 +345,20 @@ def get_top_rated_clubs():
         if per_page < 1 or per_page > 100:
             per_page = 10
         
-        # First, get all field owners (clubs)
-        owner_ids = db.session.query(Field.owner_id).distinct().all()
-        owner_ids = [owner_id[0] for owner_id in owner_ids]
-        
-        # Get all clubs
+        # Get all clubs (users who own at least one field) and their stats
+        owner_ids = db.session.query(Field.owner_id)
         clubs = User.query.filter(User.id.in_(owner_ids)).all()
+        stats = get_club_stats(owner_ids)
         
         # Calculate ratings for all clubs
         club_ratings = []
         for club in clubs:
-            # Get club's fields
-            fields = Field.query.filter_by(owner_id=club.id).all()
-            
-            # Calculate club rating
-            total_reviews = 0
-            total_rating = 0
-            for field in fields:
-                reviews = Review.query.filter_by(field_id=field.id).all()
-                total_reviews += len(reviews)
-                total_rating += sum(review.rating for review in reviews)
-            
-            average_rating = 0
-            if total_reviews > 0:
-                average_rating = total_rating / total_reviews
-            
+            club_stats = stats[club.id]
             club_ratings.append({
                 'club': club,
-                'fields': fields,
-                'average_rating': average_rating,
-                'total_reviews': total_reviews
+                'stats': club_stats,
+                'average_rating': _average_rating(club_stats),
+                'total_reviews': club_stats['total_reviews']
             })
         
         # Sort by rating (descending) and then by number of reviews (descending) for ties
@@ -380,31 +381,10 @@ def get_top_rated_clubs():
         paginated_clubs = top_clubs[start_idx:end_idx]
         
         # Format response data
-        clubs_data = []
-        for club_data in paginated_clubs:
-            club = club_data['club']
-            fields = club_data['fields']
-            average_rating = club_data['average_rating']
-            
-            # Get club statistics
-            total_fields = len(fields)
-            total_bookings = 0
-            total_reviews = club_data['total_reviews']
-            
-            for field in fields:
-                bookings = Booking.query.filter_by(field_id=field.id).all()
-                total_bookings += len(bookings)
-            
-            clubs_data.append({
-                'id': club.id,
-                'name': club.name,
-                'email': club.email,
-                'phone': club.phone,
-                'total_fields': total_fields,
-                'total_bookings': total_bookings,
-                'total_reviews': total_reviews,
-                'average_rating': round(average_rating, 2) if average_rating else 0
-            })
+        clubs_data = [
+            _club_to_dict(club_data['club'], club_data['stats'], club_data['average_rating'])
+            for club_data in paginated_clubs
+        ]
         
         return jsonify(create_response('top_rated_clubs_retrieved_successfully', {
             'clubs': clubs_data,
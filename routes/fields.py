@@ -1,11 +1,189 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from models import db, Field, User, Booking
+from models import db, Field, User, Booking, Facility, FacilityType, facility_code
+from sqlalchemy.orm import selectinload
 from datetime import datetime, time
+from search_index import apply_search, search_terms
+from serialization import FIELD_SCHEMA
+from geo import bounding_box, covering_cells, haversine_km, parse_near, planar_distance_sq, planar_error_margin
 from utils import t, create_response, create_error_response
 
 fields_bp = Blueprint('fields', __name__)
 
+def get_near_params():
+    """(latitude, longitude, radius_km) from near= and radius_km=, or None without near.
+    
+    Raises ValueError for malformed coordinates or a non-positive radius.
+    """
+    near = request.args.get('near')
+    if not near:
+        return None
+    latitude, longitude = parse_near(near)
+    radius_km = request.args.get('radius_km', current_app.config.get('NEARBY_DEFAULT_RADIUS_KM', 10), type=float)
+    if radius_km <= 0:
+        raise ValueError('radius_km must be positive')
+    return latitude, longitude, min(radius_km, current_app.config.get('NEARBY_MAX_RADIUS_KM', 100))
+
+def filter_near(query, latitude, longitude, radius_km):
+    """Restrict query to fields within radius_km of a point.
+    
+    Geohash cell range scans and a bounding box narrow the candidates, then a
+    planar distance filters them in SQL. Fields within the approximation's
+    error band of the radius are decided by the exact haversine distance.
+    Returns (filtered query, planar distance expression to order by).
+    """
+    box = bounding_box(latitude, longitude, radius_km)
+    min_lat, min_lng, max_lat, max_lng = box
+    candidates = query.order_by(None).filter(
+        db.or_(*[db.and_(Field.geohash >= cell, Field.geohash < cell + '~') for cell in covering_cells(box)]),
+        Field.latitude.between(min_lat, max_lat),
+        Field.longitude.between(min_lng, max_lng)
+    )
+    
+    distance_sq = planar_distance_sq(Field.latitude, Field.longitude, latitude, longitude)
+    margin = planar_error_margin(latitude, box)
+    inner_sq = (radius_km * (1 - margin)) ** 2
+    outer_sq = (radius_km * (1 + margin)) ** 2
+    
+    # Fields near the edge of the circle
+    edge_ids = [
+        field_id
+        for field_id, field_lat, field_lng in candidates.filter(
+            distance_sq > inner_sq, distance_sq <= outer_sq
+        ).with_entities(Field.id, Field.latitude, Field.longitude)
+        if haversine_km(latitude, longitude, field_lat, field_lng) <= radius_km
+    ]
+    
+    return candidates.filter(db.or_(distance_sq <= inner_sq, Field.id.in_(edge_ids))), distance_sq
+
+def paginate_near(query, latitude, longitude, radius_km, page, per_page, fieldset=None):
+    """Distance-sorted page of the fields matched by query within radius_km.
+    
+    Counting and ordering happen in SQL on the planar distance; distance_km
+    reports the exact haversine distance. Fields are serialized with
+    fieldset when given, with to_dict() otherwise.
+    Returns (field dicts with distance_km, pagination dict).
+    """
+    nearby, distance_sq = filter_near(query, latitude, longitude, radius_km)
+    
+    # Count and order on ids only, so both can be answered from the geo index,
+    # then load full rows for the requested page
+    total = nearby.with_entities(db.func.count(Field.id)).scalar()
+    page_rows = nearby.with_entities(Field.id, Field.latitude, Field.longitude).order_by(
+        distance_sq, Field.id
+    ).limit(per_page).offset((page - 1) * per_page).all()
+    page_ids = [row.id for row in page_rows]
+    fields_by_id = {}
+    if page_ids and fieldset:
+        rows = fieldset.select(Field.query.filter(Field.id.in_(page_ids))).all()
+        fields_by_id = {field_data['id']: field_data for field_data in fieldset.dump(rows)}
+    elif page_ids:
+        fields_by_id = {
+            field.id: field.to_dict()
+            for field in Field.query.options(selectinload(Field.facilities)).filter(Field.id.in_(page_ids))
+        }
+    
+    fields = []
+    for field_id, field_lat, field_lng in page_rows:
+        field_data = fields_by_id[field_id]
+        field_data['distance_km'] = round(haversine_km(latitude, longitude, field_lat, field_lng), 3)
+        fields.append(field_data)
+    
+    pages = (total + per_page - 1) // per_page  # Ceiling division
+    return fields, {
+        'page': page,
+        'pages': pages,
+        'per_page': per_page,
+        'total': total,
+        'has_next': page < pages,
+        'has_prev': page > 1,
+        'next_num': page + 1 if page < pages else None,
+        'prev_num': page - 1 if page > 1 else None
+    }
+
+def get_facility_params():
+    """(facility codes, 'all' or 'any') from facilities= and facilities_match=.
+    
+    facilities= is a comma separated list of facility codes or names.
+    Raises ValueError for an unknown facilities_match.
+    """
+    codes = sorted({facility_code(name) for name in request.args.get('facilities', '').split(',')} - {''})
+    match = request.args.get('facilities_match', 'all').lower()
+    if match not in ('all', 'any'):
+        raise ValueError('facilities_match must be all or any')
+    return codes, match
+
+def filter_facilities(query, codes, match='all'):
+    """Restrict query to fields offering all (or any) of the facility codes.
+    
+    Evaluated in SQL on the (facility_type_id, field_id) index: one IN for
+    'any', grouped by field and counting distinct matched types for 'all'.
+    """
+    type_ids = [type_id for (type_id,) in db.session.query(FacilityType.id).filter(FacilityType.code.in_(codes))]
+    if not type_ids or (match == 'all' and len(type_ids) < len(codes)):
+        return query.filter(db.false())
+    
+    field_ids = db.session.query(Facility.field_id).filter(Facility.facility_type_id.in_(type_ids))
+    if match == 'all' and len(type_ids) > 1:
+        field_ids = field_ids.group_by(Facility.field_id).having(
+            db.func.count(db.distinct(Facility.facility_type_id)) == len(type_ids)
+        )
+    return query.filter(Field.id.in_(field_ids))
+
+def compute_field_facets(base_query, governorate=None, min_price=None, max_price=None):
+    """Field counts per governorate, price bucket and facility name.
+    
+    base_query carries every filter except governorate and price. Each facet
+    counts the fields matching all the other filters, so the governorates and
+    price buckets not currently selected still show how many fields they
+    would add. Governorate and price counts come from one grouped query,
+    facility counts from a second one over the fully filtered fields.
+    """
+    bucket_width = current_app.config.get('FACET_PRICE_BUCKET', 100)
+    bucket = db.cast(Field.price_per_hour / bucket_width, db.Integer)
+    price_conditions = []
+    if min_price is not None:
+        price_conditions.append(Field.price_per_hour >= min_price)
+    if max_price is not None:
+        price_conditions.append(Field.price_per_hour <= max_price)
+    in_price = db.case((db.and_(*price_conditions), 1), else_=0) if price_conditions else db.literal(1)
+    
+    governorates = {}
+    buckets = {}
+    grouped = base_query.order_by(None).with_entities(
+        Field.governorate, bucket, in_price, db.func.count(Field.id)
+    ).group_by(Field.governorate, bucket, in_price)
+    for field_governorate, field_bucket, field_in_price, count in grouped:
+        if field_in_price:
+            governorates[field_governorate] = governorates.get(field_governorate, 0) + count
+        if not governorate or field_governorate == governorate:
+            buckets[field_bucket] = buckets.get(field_bucket, 0) + count
+    
+    filtered_ids = base_query.order_by(None).with_entities(Field.id)
+    if governorate:
+        filtered_ids = filtered_ids.filter(Field.governorate == governorate)
+    for condition in price_conditions:
+        filtered_ids = filtered_ids.filter(condition)
+    facilities = db.session.query(
+        FacilityType.code, FacilityType.name, db.func.count(db.distinct(Facility.field_id))
+    ).join(Facility, Facility.facility_type_id == FacilityType.id).filter(
+        Facility.field_id.in_(filtered_ids)
+    ).group_by(FacilityType.code, FacilityType.name)
+    
+    return {
+        'governorate': [
+            {'value': value, 'count': count} for value, count in sorted(governorates.items())
+        ],
+        'price': [
+            {'min': index * bucket_width, 'max': (index + 1) * bucket_width, 'count': count}
+            for index, count in sorted(buckets.items())
+        ],
+        'facilities': [
+            {'code': code, 'name': name, 'count': count}
+            for code, name, count in sorted(facilities, key=lambda facility: (-facility[2], facility[0]))
+        ]
+    }
+
 @fields_bp.route('/fields', methods=['GET'])
 def get_fields():
     try:
@@ -13,11 +191,13 @@ def get_fields():
         governorate = request.args.get('governorate')
         min_price = request.args.get('min_price', type=float)
         max_price = request.args.get('max_price', type=float)
-        search = request.args.get('search')  # Search in name or location
-        sort_by = request.args.get('sort_by', 'id')  # Default sort by id
+        min_rating = request.args.get('min_rating', type=float)
+        search = request.args.get('search')  # Full-text search in name, location and description
+        sort_by = request.args.get('sort_by', 'relevance' if search else 'id')  # Best matches first when searching
         sort_order = request.args.get('sort_order', 'asc')  # Default ascending
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 10, type=int)
+        include_facets = request.args.get('facets', '').lower() in ('1', 'true', 'yes')
         
         # Validate pagination parameters
         if page < 1:
@@ -25,9 +205,43 @@ def get_fields():
         if per_page < 1 or per_page > 100:
             per_page = 10
         
+        # Radius search (near=lat,lng&radius_km=)
+        try:
+            near = get_near_params()
+        except ValueError:
+            return jsonify({'message': 'Invalid near or radius_km. Use near=lat,lng and a positive radius_km'}), 400
+        
+        # Facility filters (facilities=parking,showers&facilities_match=all|any)
+        try:
+            facility_codes, facilities_match = get_facility_params()
+        except ValueError:
+            return jsonify({'message': 'Invalid facilities_match. Use all or any'}), 400
+        
+        # Sparse fieldsets (fields=id,name,price_per_hour&include=facilities)
+        try:
+            fieldset = FIELD_SCHEMA.from_request()
+        except ValueError as e:
+            return jsonify({'message': str(e)}), 400
+        
         # Build query
         query = Field.query
         
+        # Filter by the precomputed average rating
+        if min_rating is not None:
+            query = query.filter(Field.rating_avg >= min_rating)
+        
+        # Full-text search in name, location and description
+        relevance = None
+        if search:
+            query, relevance = apply_search(query, Field, search)
+        
+        # Filter by facilities
+        if facility_codes:
+            query = filter_facilities(query, facility_codes, facilities_match)
+        
+        # Facets are counted without the governorate and price filters
+        facets_query = query
+        
         # Filter by governorate if provided
         if governorate:
             query = query.filter_by(governorate=governorate.lower())
@@ -38,15 +252,20 @@ def get_fields():
         if max_price is not None:
             query = query.filter(Field.price_per_hour <= max_price)
         
-        # Search in name or location
-        if search:
-            search_term = f"%{search.lower()}%"
-            query = query.filter(
-                db.or_(
-                    Field.name.ilike(search_term),
-                    Field.location.ilike(search_term)
-                )
+        # Facet counts, cached per filter combination
+        facets = None
+        if include_facets:
+            signature = (
+                governorate.lower() if governorate else None, min_price, max_price, min_rating,
+                tuple(search_terms(search)) if search else None, near,
+                tuple(facility_codes), facilities_match if facility_codes else None
             )
+            
+            def facets_factory():
+                base = filter_near(facets_query, *near)[0] if near else facets_query
+                return compute_field_facets(base, signature[0], min_price, max_price)
+            
+            facets = current_app.extensions['facet_cache'].get_or_set(('fields',) + signature, facets_factory)
         
         # Apply sorting
         if sort_by == 'name':
@@ -55,6 +274,10 @@ def get_fields():
             order_column = Field.price_per_hour
         elif sort_by == 'governorate':
             order_column = Field.governorate
+        elif sort_by == 'rating':
+            order_column = Field.rating_avg
+        elif sort_by == 'relevance' and relevance is not None:
+            order_column = relevance
         else:
             order_column = Field.id  # Default sort by id
         
@@ -63,15 +286,35 @@ def get_fields():
         else:
             query = query.order_by(order_column.asc())
         
-        # Apply pagination
-        paginated_fields = query.paginate(
-            page=page, 
-            per_page=per_page, 
-            error_out=False
-        )
+        # Keep rating ties stable, better reviewed fields first
+        if sort_by == 'rating':
+            query = query.order_by(Field.rating_count.desc(), Field.id.asc())
+        elif order_column is relevance:
+            query = query.order_by(Field.id.asc())
+        
+        # Nearby fields are ordered by distance
+        if near:
+            fields, pagination = paginate_near(query, *near, page, per_page, fieldset)
+            response = {'fields': fields, 'pagination': pagination}
+            if facets is not None:
+                response['facets'] = facets
+            return jsonify(response), 200
+        
+        # Apply pagination, selecting only the requested columns with a fieldset
+        # (otherwise facilities for the whole page are loaded in one query)
+        if fieldset:
+            paginated_fields = fieldset.select(query).paginate(page=page, per_page=per_page, error_out=False)
+            fields = fieldset.dump(paginated_fields.items)
+        else:
+            paginated_fields = query.options(selectinload(Field.facilities)).paginate(
+                page=page, 
+                per_page=per_page, 
+                error_out=False
+            )
+            fields = [field.to_dict() for field in paginated_fields.items]
         
-        return jsonify({
-            'fields': [field.to_dict() for field in paginated_fields.items],
+        response = {
+            'fields': fields,
             'pagination': {
                 'page': paginated_fields.page,
                 'pages': paginated_fields.pages,
@@ -82,10 +325,21 @@ def get_fields():
                 'next_num': paginated_fields.next_num,
                 'prev_num': paginated_fields.prev_num
             }
-        }), 200
+        }
+        if facets is not None:
+            response['facets'] = facets
+        return jsonify(response), 200
     except Exception as e:
         return jsonify({'message': 'Error fetching fields', 'error': str(e)}), 500
 
+@fields_bp.route('/facilities', methods=['GET'])
+def get_facility_types():
+    try:
+        facility_types = FacilityType.query.order_by(FacilityType.name).all()
+        return jsonify({'facilities': [facility_type.to_dict() for facility_type in facility_types]}), 200
+    except Exception as e:
+        return jsonify({'message': 'Error fetching facilities', 'error': str(e)}), 500
+
 @fields_bp.route('/fields/<int:id>', methods=['GET'])
 def get_field(id):
     try:
@@ -207,8 +461,8 @@ def search_available_fields():
         governorate = request.args.get('governorate')
         min_price = request.args.get('min_price', type=float)
         max_price = request.args.get('max_price', type=float)
-        search = request.args.get('search')  # Search in name or location
-        sort_by = request.args.get('sort_by', 'id')  # Default sort by id
+        search = request.args.get('search')  # Full-text search in name, location and description
+        sort_by = request.args.get('sort_by', 'relevance' if search else 'id')  # Best matches first when searching
         sort_order = request.args.get('sort_order', 'asc')  # Default ascending
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 10, type=int)
@@ -235,6 +489,24 @@ def search_available_fields():
                 'message': 'Start time must be before end time'
             }), 400
         
+        # Radius search (near=lat,lng&radius_km=)
+        try:
+            near = get_near_params()
+        except ValueError:
+            return jsonify({'message': 'Invalid near or radius_km. Use near=lat,lng and a positive radius_km'}), 400
+        
+        # Facility filters (facilities=parking,showers&facilities_match=all|any)
+        try:
+            facility_codes, facilities_match = get_facility_params()
+        except ValueError:
+            return jsonify({'message': 'Invalid facilities_match. Use all or any'}), 400
+        
+        # Sparse fieldsets (fields=id,name,price_per_hour&include=facilities)
+        try:
+            fieldset = FIELD_SCHEMA.from_request()
+        except ValueError as e:
+            return jsonify({'message': str(e)}), 400
+        
         # Validate pagination parameters
         if page < 1:
             page = 1
@@ -254,15 +526,14 @@ def search_available_fields():
         if max_price is not None:
             query = query.filter(Field.price_per_hour <= max_price)
         
-        # Search in name or location
+        # Full-text search in name, location and description
+        relevance = None
         if search:
-            search_term = f"%{search.lower()}%"
-            query = query.filter(
-                db.or_(
-                    Field.name.ilike(search_term),
-                    Field.location.ilike(search_term)
-                )
-            )
+            query, relevance = apply_search(query, Field, search)
+        
+        # Filter by facilities
+        if facility_codes:
+            query = filter_facilities(query, facility_codes, facilities_match)
         
         # Apply sorting
         if sort_by == 'name':
@@ -271,6 +542,8 @@ def search_available_fields():
             order_column = Field.price_per_hour
         elif sort_by == 'governorate':
             order_column = Field.governorate
+        elif sort_by == 'relevance' and relevance is not None:
+            order_column = relevance
         else:
             order_column = Field.id  # Default sort by id
         
@@ -279,65 +552,58 @@ def search_available_fields():
         else:
             query = query.order_by(order_column.asc())
         
-        # Get all fields that match filters
-        fields = query.all()
+        # Keep relevance ties stable
+        if order_column is relevance:
+            query = query.order_by(Field.id.asc())
         
-        # Filter fields that are available during the requested time
-        available_fields = []
+        # Only fields that are open for the whole requested time
+        query = query.filter(
+            Field.opening_time <= start_time,
+            Field.closing_time >= end_time
+        )
         
-        for field in fields:
-            # Check if the field is open during the requested time
-            field_opening = field.opening_time if field.opening_time else time(8, 0)
-            field_closing = field.closing_time if field.closing_time else time(22, 0)
-            
-            if start_time < field_opening or end_time > field_closing:
-                # Field is closed during requested time
-                continue
-            
-            # Check for overlapping bookings
-            overlapping_booking = Booking.query.filter(
-                Booking.field_id == field.id,
-                Booking.date == search_date,
-                Booking.start_time < end_time,
-                Booking.end_time > start_time,
-                Booking.status != 'cancelled'
-            ).first()
-            
-            # If no overlapping booking, field is available
-            if not overlapping_booking:
-                available_fields.append(field)
-        
-        # Apply pagination to available fields
-        # Since we've already filtered, we need to manually paginate
-        total = len(available_fields)
-        pages = (total + per_page - 1) // per_page  # Ceiling division
-        has_next = page < pages
-        has_prev = page > 1
-        next_num = page + 1 if has_next else None
-        prev_num = page - 1 if has_prev else None
-        
-        # Slice the available fields for pagination
-        start_idx = (page - 1) * per_page
-        end_idx = start_idx + per_page
-        paginated_fields = available_fields[start_idx:end_idx]
+        # Exclude fields with an overlapping booking, in the same query
+        overlapping_bookings = db.session.query(Booking.field_id).filter(
+            Booking.date == search_date,
+            Booking.start_time < end_time,
+            Booking.end_time > start_time,
+            Booking.status != 'cancelled'
+        )
+        query = query.filter(~Field.id.in_(overlapping_bookings))
+        
+        # Apply pagination, nearby fields are ordered by distance
+        if near:
+            fields, pagination = paginate_near(query, *near, page, per_page, fieldset)
+        else:
+            if fieldset:
+                available = fieldset.select(query).paginate(page=page, per_page=per_page, error_out=False)
+                fields = fieldset.dump(available.items)
+            else:
+                available = query.options(selectinload(Field.facilities)).paginate(
+                    page=page,
+                    per_page=per_page,
+                    error_out=False
+                )
+                fields = [field.to_dict() for field in available.items]
+            pagination = {
+                'page': available.page,
+                'pages': available.pages,
+                'per_page': available.per_page,
+                'total': available.total,
+                'has_next': available.has_next,
+                'has_prev': available.has_prev,
+                'next_num': available.next_num,
+                'prev_num': available.prev_num
+            }
         
         return jsonify({
             'message': 'Available fields retrieved successfully',
             'date': search_date.isoformat(),
             'start_time': start_time.isoformat(),
             'end_time': end_time.isoformat(),
-            'available_fields_count': len(available_fields),
-            'fields': [field.to_dict() for field in paginated_fields],
-            'pagination': {
-                'page': page,
-                'pages': pages,
-                'per_page': per_page,
-                'total': total,
-                'has_next': has_next,
-                'has_prev': has_prev,
-                'next_num': next_num,
-                'prev_num': prev_num
-            }
+            'available_fields_count': pagination['total'],
+            'fields': fields,
+            'pagination': pagination
         }), 200
     except Exception as e:
         return jsonify({'message': 'Error searching available fields', 'error': str(e)}), 500
\ No newline at end of file
@@ -1,20 +1,23 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from models import db, Payment, Booking, User, Notification, Analytics
 from datetime import datetime, date
+from serialization import PAYMENT_SCHEMA
 from utils import t, create_response, create_error_response
+from idempotency import idempotent
+from webhooks import InvalidWebhook, SIGNATURE_HEADER, enqueue_events, parse_events, verify_signature
 import json
 import uuid
 
 payments_bp = Blueprint('payments', __name__)
 
-def create_notification(user_id, title, message, notification_type):
+def create_notification(user_id, code, params, notification_type):
     """Helper function to create a notification"""
     try:
         notification = Notification(
             user_id=user_id,
-            title=title,
-            message=message,
+            code=code,
+            params=params,
             type=notification_type
         )
         db.session.add(notification)
@@ -27,6 +30,7 @@ def create_notification(user_id, title, message, notification_type):
 
 @payments_bp.route('/payments', methods=['POST'])
 @jwt_required()
+@idempotent
 def create_payment():
     try:
         current_user = get_jwt_identity()
@@ -72,8 +76,9 @@ def create_payment():
         if field_owner:
             notification = Notification(
                 user_id=field_owner.id,
-                title=t('new_payment_received'),
-                message=f"{user.name} has made a payment of ${data['amount']} for booking #{booking.id}",
+                code='new_payment',
+                params={'user': user.name, 'amount': payment.amount, 'currency': payment.currency,
+                        'booking': booking.id},
                 type='payment'
             )
             db.session.add(notification)
@@ -105,15 +110,27 @@ def get_user_payments():
         if per_page < 1 or per_page > 100:
             per_page = 10
         
+        # Sparse fieldsets (fields=id,amount,status&include=booking)
+        try:
+            fieldset = PAYMENT_SCHEMA.from_request()
+        except ValueError as e:
+            return jsonify({'message': str(e)}), 400
+        
         # Get all payments for the user with pagination
-        paginated_payments = Payment.query.filter_by(user_id=user.id).paginate(
-            page=page,
-            per_page=per_page,
-            error_out=False
-        )
+        query = Payment.query.filter_by(user_id=user.id)
+        if fieldset:
+            paginated_payments = fieldset.select(query).paginate(page=page, per_page=per_page, error_out=False)
+            payments_data = fieldset.dump(paginated_payments.items)
+        else:
+            paginated_payments = query.paginate(
+                page=page,
+                per_page=per_page,
+                error_out=False
+            )
+            payments_data = [payment.to_dict() for payment in paginated_payments.items]
         
         return jsonify({
-            'payments': [payment.to_dict() for payment in paginated_payments.items],
+            'payments': payments_data,
             'pagination': {
                 'page': paginated_payments.page,
                 'pages': paginated_payments.pages,
@@ -203,16 +220,10 @@ def update_payment_status(id):
         # Create notification for the user
         booking = Booking.query.get(payment.booking_id)
         if booking:
-            status_messages = {
-                'completed': 'Payment completed successfully',
-                'failed': 'Payment failed',
-                'refunded': 'Payment refunded'
-            }
-            
             notification = Notification(
                 user_id=booking.user_id,
-                title=t('payment_status_updated'),
-                message=f"Your payment for booking #{booking.id} has been {new_status}: {status_messages.get(new_status, '')}",
+                code='payment_status',
+                params={'booking': booking.id, 'status': new_status},
                 type='payment'
             )
             db.session.add(notification)
@@ -236,6 +247,26 @@ def update_payment_status(id):
         db.session.rollback()
         return jsonify(create_error_response('internal_server_error', str(e))), 500
 
+@payments_bp.route('/payments/webhooks/<gateway>', methods=['POST'])
+def payment_webhook(gateway):
+    """Queue gateway callbacks; the payment-events worker applies them"""
+    try:
+        body = request.get_data()
+        secret = current_app.config.get('PAYMENT_WEBHOOK_SECRETS', {}).get(gateway)
+        if secret is None:
+            return jsonify(create_error_response('unknown_gateway')), 404
+        if not verify_signature(secret, body, request.headers.get(SIGNATURE_HEADER)):
+            return jsonify(create_error_response('invalid_signature')), 401
+            
+        queued, duplicates = enqueue_events(gateway, parse_events(gateway, body))
+        return jsonify(create_response('payment_events_accepted', {'queued': queued, 'duplicates': duplicates})), 202
+        
+    except InvalidWebhook as e:
+        return jsonify(create_error_response(e.message_key)), e.status_code
+    except Exception as e:
+        db.session.rollback()
+        return jsonify(create_error_response('internal_server_error', str(e))), 500
+
 @payments_bp.route('/payments/<int:payment_id>/refund', methods=['POST'])
 @jwt_required()
 def refund_payment(payment_id):
@@ -275,8 +306,8 @@ def refund_payment(payment_id):
         # Create notification for refund success
         create_notification(
             user_id=user.id,
-            title="Refund Processed",
-            message=f"Your refund of {payment.amount} EGP for booking #{booking.id} has been processed successfully.",
+            code='refund_processed',
+            params={'amount': payment.amount, 'currency': payment.currency, 'booking': booking.id},
             notification_type="refund_processed"
         )
         
@@ -1,6 +1,6 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from models import db, Review, Field, User, Notification
+from models import db, Review, Field, User, Notification, update_field_rating
 from datetime import datetime
 from utils import t, create_response, create_error_response
 
@@ -62,13 +62,14 @@ def create_review():
         )
         
         db.session.add(review)
+        update_field_rating(field.id, added=rating)
         db.session.commit()
         
         # Create notification for the field owner
         notification = Notification(
             user_id=field.owner_id,
-            title=t('new_review_received'),
-            message=f"{user.name} has left a {rating}-star review for your field {field.name}",
+            code='new_review',
+            params={'user': user.name, 'rating': rating, 'field': field.name},
             type='review'
         )
         db.session.add(notification)
@@ -145,6 +146,8 @@ def update_review(id):
             rating = int(data['rating'])
             if rating < 1 or rating > 5:
                 return jsonify(create_error_response('invalid_rating')), 400
+            if rating != review.rating:
+                update_field_rating(review.field_id, added=rating, removed=review.rating)
             review.rating = rating
             
         # Update comment if provided
@@ -176,6 +179,7 @@ def delete_review(id):
         if review.user_id != user.id and user.role != 'admin':
             return jsonify(create_error_response('unauthorized')), 403
             
+        update_field_rating(review.field_id, removed=review.rating)
         db.session.delete(review)
         db.session.commit()
         
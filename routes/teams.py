@@ -1,6 +1,8 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from models import db, Team, TeamMember, User, Booking
+from models import db, Team, TeamMember, User, Booking, count_team_members
+from sqlalchemy.orm import joinedload, selectinload
+from search_index import apply_search
 from utils import t, create_response, create_error_response
 
 teams_bp = Blueprint('teams', __name__)
@@ -58,8 +60,8 @@ def get_teams():
             return jsonify({'message': 'User not found'}), 404
         
         # Get query parameters
-        search = request.args.get('search')  # Search in team name
-        sort_by = request.args.get('sort_by', 'id')  # Default sort by id
+        search = request.args.get('search')  # Full-text search in team name
+        sort_by = request.args.get('sort_by', 'relevance' if search else 'id')  # Best matches first when searching
         sort_order = request.args.get('sort_order', 'asc')  # Default ascending
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 10, type=int)
@@ -73,16 +75,18 @@ def get_teams():
         # Build query
         query = Team.query
         
-        # Search in team name
+        # Full-text search in team name
+        relevance = None
         if search:
-            search_term = f"%{search.lower()}%"
-            query = query.filter(Team.name.ilike(search_term))
+            query, relevance = apply_search(query, Team, search)
         
         # Apply sorting
         if sort_by == 'name':
             order_column = Team.name
         elif sort_by == 'created_at':
             order_column = Team.created_at
+        elif sort_by == 'relevance' and relevance is not None:
+            order_column = relevance
         else:
             order_column = Team.id  # Default sort by id
         
@@ -91,6 +95,10 @@ def get_teams():
         else:
             query = query.order_by(order_column.asc())
         
+        # Keep relevance ties stable
+        if order_column is relevance:
+            query = query.order_by(Team.id.asc())
+        
         # Apply pagination
         paginated_teams = query.paginate(
             page=page,
@@ -98,14 +106,9 @@ def get_teams():
             error_out=False
         )
         
-        teams_data = []
-        for team in paginated_teams.items:
-            # Get team members count
-            members_count = db.session.query(TeamMember).filter(TeamMember.team_id == team.id).count()
-            
-            team_data = team.to_dict()
-            team_data['members_count'] = members_count
-            teams_data.append(team_data)
+        # Get member counts for the whole page in one query
+        members_counts = count_team_members([team.id for team in paginated_teams.items])
+        teams_data = [team.to_dict(members_count=members_counts[team.id]) for team in paginated_teams.items]
         
         return jsonify({
             'message': 'Teams retrieved successfully',
@@ -132,20 +135,19 @@ def get_team(id):
         if not team:
             return jsonify(create_error_response('team_not_found')), 404
         
-        # Get team members
-        members = TeamMember.query.filter_by(team_id=id).all()
+        # Get team members along with their users
+        members = TeamMember.query.options(joinedload(TeamMember.user)).filter_by(team_id=id).all()
         members_data = []
         for member in members:
-            user = User.query.get(member.user_id)
-            if user:
+            if member.user:
                 members_data.append({
                     'id': member.id,
-                    'user': user.to_dict(),
+                    'user': member.user.to_dict(),
                     'role': member.role,
                     'joined_at': member.joined_at.isoformat() if member.joined_at else None
                 })
         
-        team_data = team.to_dict()
+        team_data = team.to_dict(members_count=len(members))
         team_data['members'] = members_data
         
         return jsonify({
@@ -352,18 +354,15 @@ def remove_team_member(team_id, member_id):
 @jwt_required()
 def get_team_schedule():
     try:
-        # Get all teams and their bookings
-        teams = Team.query.all()
+        # Get all teams with their bookings and member counts
+        teams = Team.query.options(selectinload(Team.bookings)).all()
+        members_counts = count_team_members([team.id for team in teams])
         schedule = []
         
         for team in teams:
-            # Get team bookings
-            bookings = Booking.query.filter_by(team_id=team.id).all()
-            booking_data = [booking.to_dict() for booking in bookings]
-            
             schedule.append({
-                'team': team.to_dict(),
-                'bookings': booking_data
+                'team': team.to_dict(members_count=members_counts[team.id]),
+                'bookings': [booking.to_dict() for booking in team.bookings]
             })
         
         return jsonify({
@@ -0,0 +1,22 @@
+"""URL rules that compile their url_for() builders on first use.
+
+Werkzeug compiles two Python functions per rule when the rule is added, so
+url_for() can build URLs for it. That is most of create_app()'s time, while
+this API matches URLs on every request but hardly ever builds them. Matching
+is unchanged; a rule's builders are compiled the first time url_for() needs
+them.
+"""
+from werkzeug.routing import Rule
+
+
+class LazyBuildRule(Rule):
+    def _compile_builder(self, append_unknown=True):
+        attribute = '_build_unknown' if append_unknown else '_build'
+        compile_builder = super()._compile_builder
+
+        def build(rule, *args, **kwargs):
+            builder = compile_builder(append_unknown).__get__(rule, None)
+            setattr(rule, attribute, builder)
+            return builder(*args, **kwargs)
+
+        return build
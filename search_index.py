@@ -0,0 +1,256 @@
+"""Full-text search over field, club and team names.
+
+Every searchable model has a companion index table keyed by the row's id and
+holding a normalized copy of its text columns: an FTS5 virtual table on
+SQLite, or an InnoDB table with a FULLTEXT index on MySQL. Index rows are
+written in the same transaction as the model rows (mapper events), created
+and dropped with the schema, and can be rebuilt with
+`flask rebuild-search-index`.
+
+Both documents and queries go through normalize_text(), which folds case,
+strips Arabic diacritics and tatweel and unifies alef/yaa/taa marbuta
+variants, so "ملعب الأهلى" finds "ملعب الاهلي". Every query term is matched
+as a prefix and results are ranked by relevance (bm25 on SQLite, where a
+name match weighs more than a location or description match).
+"""
+import re
+import unicodedata
+from collections import namedtuple
+from sqlalchemy import event
+from models import db, User, Field, Team
+
+SearchEntity = namedtuple('SearchEntity', ['model', 'columns', 'weights'])
+
+# Searchable text per model; weights rank matches per column (SQLite only)
+ENTITIES = [
+    SearchEntity(Field, ('name', 'location', 'description'), (10.0, 4.0, 1.0)),
+    SearchEntity(User, ('name',), (1.0,)),
+    SearchEntity(Team, ('name',), (1.0,)),
+]
+ENTITIES_BY_MODEL = {entity.model: entity for entity in ENTITIES}
+
+MAX_TERMS = 8
+
+# Letters folded together after diacritics are stripped. Hamza carriers on
+# alef, waw and yaa are already split off by NFKD decomposition.
+_LETTER_MAP = str.maketrans({
+    'ٱ': 'ا',  # alef wasla -> alef
+    'ى': 'ي',  # alef maksura -> yaa
+    'ی': 'ي',  # farsi yeh -> yaa
+    'ة': 'ه',  # taa marbuta -> haa
+    'ک': 'ك',  # keheh -> kaf
+    'ـ': None,      # tatweel
+    **{chr(0x0660 + digit): str(digit) for digit in range(10)},  # Arabic-Indic digits
+})
+_TERM_RE = re.compile(r'[^\W_]+')
+
+
+def normalize_text(text):
+    """Case-folded text without diacritics and with Arabic letter variants unified"""
+    if not text:
+        return ''
+    decomposed = unicodedata.normalize('NFKD', text)
+    stripped = ''.join(char for char in decomposed if not unicodedata.combining(char))
+    return stripped.translate(_LETTER_MAP).casefold()
+
+
+def search_terms(text):
+    """Normalized terms of a search query"""
+    return _TERM_RE.findall(normalize_text(text))[:MAX_TERMS]
+
+
+class SQLiteBackend:
+    """FTS5 virtual tables, one per searchable model, with rowid = model id"""
+
+    def table_name(self, entity):
+        return f'{entity.model.__tablename__}_fts'
+
+    def create(self, connection, entity):
+        connection.exec_driver_sql(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {self.table_name(entity)} "
+            f"USING fts5({', '.join(entity.columns)}, tokenize='unicode61', prefix='2 3')"
+        )
+
+    def drop(self, connection, entity):
+        connection.exec_driver_sql(f'DROP TABLE IF EXISTS {self.table_name(entity)}')
+
+    def delete(self, connection, entity, ids):
+        connection.execute(
+            db.text(f'DELETE FROM {self.table_name(entity)} WHERE rowid = :id'),
+            [{'id': row_id} for row_id in ids]
+        )
+
+    def insert(self, connection, entity, rows):
+        columns = ', '.join(entity.columns)
+        values = ', '.join(f':{column}' for column in entity.columns)
+        connection.execute(
+            db.text(f'INSERT INTO {self.table_name(entity)} (rowid, {columns}) VALUES (:id, {values})'),
+            rows
+        )
+
+    def matches(self, entity, terms):
+        table = self.table_name(entity)
+        weights = ', '.join(str(weight) for weight in entity.weights)
+        return db.text(
+            f'SELECT rowid AS id, bm25({table}, {weights}) AS search_rank '
+            f'FROM {table} WHERE {table} MATCH :query'
+        ).bindparams(
+            query=' '.join(f'"{term}"*' for term in terms)
+        ).columns(id=db.Integer, search_rank=db.Float).subquery(f'{table}_matches')
+
+
+class MySQLBackend:
+    """InnoDB tables with a FULLTEXT index, searched in boolean mode"""
+
+    def table_name(self, entity):
+        return f'{entity.model.__tablename__}_search'
+
+    def create(self, connection, entity):
+        columns = ', '.join(f'{column} TEXT' for column in entity.columns)
+        connection.exec_driver_sql(
+            f"CREATE TABLE IF NOT EXISTS {self.table_name(entity)} (id INTEGER PRIMARY KEY, {columns}, "
+            f"FULLTEXT ({', '.join(entity.columns)})) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4"
+        )
+
+    def drop(self, connection, entity):
+        connection.exec_driver_sql(f'DROP TABLE IF EXISTS {self.table_name(entity)}')
+
+    def delete(self, connection, entity, ids):
+        connection.execute(
+            db.text(f'DELETE FROM {self.table_name(entity)} WHERE id = :id'),
+            [{'id': row_id} for row_id in ids]
+        )
+
+    def insert(self, connection, entity, rows):
+        columns = ', '.join(entity.columns)
+        values = ', '.join(f':{column}' for column in entity.columns)
+        connection.execute(
+            db.text(f'REPLACE INTO {self.table_name(entity)} (id, {columns}) VALUES (:id, {values})'),
+            rows
+        )
+
+    def matches(self, entity, terms):
+        table = self.table_name(entity)
+        match = f"MATCH ({', '.join(entity.columns)}) AGAINST (:query IN BOOLEAN MODE)"
+        # Negated so that, as with bm25, lower ranks are better matches
+        return db.text(
+            f'SELECT id, -{match} AS search_rank FROM {table} WHERE {match}'
+        ).bindparams(
+            query=' '.join(f'+{term}*' for term in terms)
+        ).columns(id=db.Integer, search_rank=db.Float).subquery(f'{table}_matches')
+
+
+class LikeBackend:
+    """Fallback for other databases: LIKE on the model's own columns, unranked"""
+
+    def create(self, connection, entity):
+        pass
+
+    def drop(self, connection, entity):
+        pass
+
+    def delete(self, connection, entity, ids):
+        pass
+
+    def insert(self, connection, entity, rows):
+        pass
+
+    def matches(self, entity, terms):
+        model = entity.model
+        columns = [getattr(model, column) for column in entity.columns]
+        return db.select(model.id.label('id'), db.literal(0.0).label('search_rank')).where(
+            *[db.or_(*[column.ilike(f'%{term}%') for column in columns]) for term in terms]
+        ).subquery(f'{model.__tablename__}_matches')
+
+
+_BACKENDS = {'sqlite': SQLiteBackend(), 'mysql': MySQLBackend()}
+
+
+def get_backend(dialect_name):
+    return _BACKENDS.get(dialect_name, LikeBackend())
+
+
+def _document(entity, row_id, values):
+    document = {column: normalize_text(values[column]) for column in entity.columns}
+    document['id'] = row_id
+    return document
+
+
+def apply_search(query, model, text):
+    """Restrict query to rows of model matching text.
+
+    Returns (query, rank) where rank orders the best matches first when
+    sorted ascending, or (query, None) when text holds no searchable terms.
+    """
+    terms = search_terms(text)
+    if not terms:
+        return query, None
+    matches = get_backend(db.engine.dialect.name).matches(ENTITIES_BY_MODEL[model], terms)
+    return query.join(matches, matches.c.id == model.id), matches.c.search_rank
+
+
+def index_rows(model, rows):
+    """Add plain dict rows, as written by bulk inserts, to the search index"""
+    entity = ENTITIES_BY_MODEL[model]
+    connection = db.session.connection()
+    documents = [_document(entity, row['id'], row) for row in rows]
+    if documents:
+        get_backend(connection.dialect.name).insert(connection, entity, documents)
+
+
+def rebuild_search_index(chunk_size=5000):
+    """Recreate every index table from the model tables; returns rows indexed per table"""
+    connection = db.session.connection()
+    backend = get_backend(connection.dialect.name)
+    counts = {}
+    for entity in ENTITIES:
+        backend.drop(connection, entity)
+        backend.create(connection, entity)
+        columns = [getattr(entity.model, column) for column in entity.columns]
+        result = db.session.execute(db.select(entity.model.id, *columns).execution_options(yield_per=chunk_size))
+        count = 0
+        for rows in result.partitions():
+            backend.insert(connection, entity, [_document(entity, row.id, row._mapping) for row in rows])
+            count += len(rows)
+        counts[entity.model.__tablename__] = count
+    return counts
+
+
+def _create_index_tables(target, connection, **kw):
+    backend = get_backend(connection.dialect.name)
+    for entity in ENTITIES:
+        backend.create(connection, entity)
+
+
+def _drop_index_tables(target, connection, **kw):
+    backend = get_backend(connection.dialect.name)
+    for entity in ENTITIES:
+        backend.drop(connection, entity)
+
+
+event.listen(db.metadata, 'after_create', _create_index_tables)
+event.listen(db.metadata, 'before_drop', _drop_index_tables)
+
+
+def _register(entity):
+    def after_insert(mapper, connection, target):
+        document = _document(entity, target.id, {column: getattr(target, column) for column in entity.columns})
+        get_backend(connection.dialect.name).insert(connection, entity, [document])
+
+    def after_update(mapper, connection, target):
+        state = db.inspect(target)
+        if any(state.attrs[column].history.has_changes() for column in entity.columns):
+            backend = get_backend(connection.dialect.name)
+            backend.delete(connection, entity, [target.id])
+            after_insert(mapper, connection, target)
+
+    def after_delete(mapper, connection, target):
+        get_backend(connection.dialect.name).delete(connection, entity, [target.id])
+
+    event.listen(entity.model, 'after_insert', after_insert)
+    event.listen(entity.model, 'after_update', after_update)
+    event.listen(entity.model, 'after_delete', after_delete)
+
+
+for _entity in ENTITIES:
+    _register(_entity)
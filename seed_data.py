@@ -1,3 +1,5 @@
+import argparse
+import time
 from app import create_app
 from models import db, User, Field, Facility
 
@@ -108,5 +110,59 @@ def seed_data():
         db.session.commit()
         print("Sample data seeded successfully!")
 
+def seed_bulk(profile='small', chunk_size=None, **overrides):
+    """Load a synthetic data set with chunked executemany() inserts.
+
+    Uses datagen: one precomputed password hash for every user, autoflush
+    disabled and a commit per chunk.
+    """
+    from datagen import CHUNK_SIZE, PROFILES, generate_dataset
+    
+    app = create_app()
+    
+    with app.app_context():
+        db.create_all()
+        sizes = dict(PROFILES[profile])
+        sizes.update({key: value for key, value in overrides.items() if value is not None})
+        
+        started = time.perf_counter()
+        with db.session.no_autoflush:
+            counts = generate_dataset(chunk_size=chunk_size or CHUNK_SIZE, commit_chunks=True, **sizes)
+        elapsed = time.perf_counter() - started
+        
+        for table, count in counts.items():
+            print(f"{table}: {count}")
+        print(f"Bulk seeding finished in {elapsed:.1f}s ({sum(counts.values()) / elapsed:.0f} rows/s)")
+
+def main(argv=None):
+    from datagen import PROFILES
+    
+    parser = argparse.ArgumentParser(description="Seed the database with sample data")
+    parser.add_argument("--bulk", action="store_true", help="Load a synthetic data set with bulk inserts")
+    parser.add_argument("--profile", default="small", choices=sorted(PROFILES), help="Bulk data set size")
+    parser.add_argument("--owners", type=int, help="Override the number of owners")
+    parser.add_argument("--fields-per-owner", type=int)
+    parser.add_argument("--users-per-owner", type=int)
+    parser.add_argument("--bookings-per-field", type=int)
+    parser.add_argument("--reviews-per-field", type=int)
+    parser.add_argument("--notifications-per-user", type=int)
+    parser.add_argument("--chunk-size", type=int, help="Rows per insert and commit")
+    args = parser.parse_args(argv)
+    
+    if not args.bulk:
+        seed_data()
+        return
+    
+    seed_bulk(
+        args.profile,
+        chunk_size=args.chunk_size,
+        owners=args.owners,
+        fields_per_owner=args.fields_per_owner,
+        users_per_owner=args.users_per_owner,
+        bookings_per_field=args.bookings_per_field,
+        reviews_per_field=args.reviews_per_field,
+        notifications_per_user=args.notifications_per_user
+    )
+
 if __name__ == "__main__":
-    seed_data()
\ No newline at end of file
+    main()
\ No newline at end of file
@@ -0,0 +1,187 @@
+"""Sparse fieldsets for list endpoints.
+
+List endpoints accept `fields=` (comma separated attribute names) and
+`include=` (related objects to embed). When either is given, only the
+requested columns are selected, as plain result rows rather than ORM
+objects, and each included relation is loaded with one batched query for
+the whole page. Without them endpoints keep returning the full to_dict()
+output.
+
+Date and time values are left as they are: the app's JSON provider writes
+them as ISO 8601 strings, which saves an isoformat() call per value.
+"""
+from flask import request
+from models import db, Field, Facility, Booking, Payment, User
+
+
+class Relation:
+    """An embeddable relation: rows are matched on key, load(keys) returns {key: value}"""
+
+    def __init__(self, key, load, many=False):
+        self.key = key
+        self.load = load
+        self.many = many
+
+
+class Schema:
+    """Serializable columns and relations of a model.
+
+    columns maps each output name to (model attribute, formatter or None).
+    """
+
+    def __init__(self, model, columns, relations=None):
+        self.model = model
+        self.columns = columns
+        self.relations = relations or {}
+
+    def fieldset(self, fields=None, include=None):
+        """A Fieldset for the requested names, raising ValueError on unknown ones"""
+        fields = list(fields) if fields else list(self.columns)
+        include = list(include or [])
+        unknown = [name for name in fields if name not in self.columns]
+        unknown += [name for name in include if name not in self.relations]
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+        return Fieldset(self, fields, include)
+
+    def from_request(self):
+        """Fieldset from the fields= and include= query parameters, or None without them"""
+        fields = _split(request.args.get('fields'))
+        include = _split(request.args.get('include'))
+        if not fields and not include:
+            return None
+        return self.fieldset(fields, include)
+
+
+def _split(value):
+    return [name.strip() for name in (value or '').split(',') if name.strip()]
+
+
+class Fieldset:
+    """Requested columns and relations of a schema"""
+
+    def __init__(self, schema, fields, include):
+        self.schema = schema
+        # id always comes first, the rest in schema order
+        self.fields = ['id'] + [name for name in schema.columns if name in fields and name != 'id']
+        self.include = include
+
+    @property
+    def attributes(self):
+        """Model attributes to select: the requested columns and the relation keys"""
+        attributes = []
+        for name in self.fields:
+            attributes.append(self.schema.columns[name][0])
+        for name in self.include:
+            attributes.append(self.schema.relations[name].key)
+        return list(dict.fromkeys(attributes))
+
+    def select(self, query):
+        """query projected onto the requested columns"""
+        return query.with_entities(*[getattr(self.schema.model, attribute) for attribute in self.attributes])
+
+    def dump(self, rows):
+        """Serialize result rows from select(), loading included relations in one query each.
+
+        Values are read from the row tuples by position.
+        """
+        positions = {attribute: index for index, attribute in enumerate(self.attributes)}
+        names = self.fields
+        indexes = [positions[self.schema.columns[name][0]] for name in names]
+        formatters = [(name, positions[self.schema.columns[name][0]], self.schema.columns[name][1])
+                      for name in names if self.schema.columns[name][1]]
+
+        items = []
+        for row in rows:
+            item = dict(zip(names, [row[index] for index in indexes]))
+            for name, index, formatter in formatters:
+                item[name] = formatter(row[index])
+            items.append(item)
+
+        for name in self.include:
+            relation = self.schema.relations[name]
+            keys = [row[positions[relation.key]] for row in rows]
+            loaded = relation.load([key for key in set(keys) if key is not None]) if keys else {}
+            for item, key in zip(items, keys):
+                item[name] = loaded.get(key, [] if relation.many else None)
+        return items
+
+
+def _load_facilities(field_ids):
+    facilities = {}
+    for facility in Facility.query.filter(Facility.field_id.in_(field_ids)).order_by(Facility.id):
+        facilities.setdefault(facility.field_id, []).append(facility.to_dict())
+    return facilities
+
+
+def _load_users(user_ids):
+    return {
+        user_id: {'id': user_id, 'name': name}
+        for user_id, name in db.session.query(User.id, User.name).filter(User.id.in_(user_ids))
+    }
+
+
+def _load_fields(field_ids):
+    return {
+        field_id: {'id': field_id, 'name': name, 'location': location, 'governorate': governorate}
+        for field_id, name, location, governorate in db.session.query(
+            Field.id, Field.name, Field.location, Field.governorate
+        ).filter(Field.id.in_(field_ids))
+    }
+
+
+def _load_bookings(booking_ids):
+    fieldset = BOOKING_SCHEMA.fieldset()
+    rows = fieldset.select(Booking.query.filter(Booking.id.in_(booking_ids))).all()
+    return {item['id']: item for item in fieldset.dump(rows)}
+
+
+FIELD_SCHEMA = Schema(Field, {
+    'id': ('id', None),
+    'name': ('name', None),
+    'location': ('location', None),
+    'governorate': ('governorate', None),
+    'price_per_hour': ('price_per_hour', None),
+    'description': ('description', None),
+    'image': ('image', None),
+    'owner_id': ('owner_id', None),
+    'latitude': ('latitude', None),
+    'longitude': ('longitude', None),
+    'opening_time': ('opening_time', None),
+    'closing_time': ('closing_time', None),
+    'average_rating': ('rating_avg', lambda value: round(value or 0, 2)),
+    'reviews_count': ('rating_count', lambda value: value or 0),
+}, relations={
+    'facilities': Relation('id', _load_facilities, many=True),
+    'owner': Relation('owner_id', _load_users),
+})
+
+BOOKING_SCHEMA = Schema(Booking, {
+    'id': ('id', None),
+    'user_id': ('user_id', None),
+    'team_id': ('team_id', None),
+    'field_id': ('field_id', None),
+    'date': ('date', None),
+    'start_time': ('start_time', None),
+    'end_time': ('end_time', None),
+    'total_price': ('total_price', None),
+    'status': ('status', None),
+}, relations={
+    'field': Relation('field_id', _load_fields),
+    'user': Relation('user_id', _load_users),
+})
+
+PAYMENT_SCHEMA = Schema(Payment, {
+    'id': ('id', None),
+    'booking_id': ('booking_id', None),
+    'user_id': ('user_id', None),
+    'amount': ('amount', None),
+    'currency': ('currency', None),
+    'payment_method': ('payment_method', None),
+    'transaction_id': ('transaction_id', None),
+    'status': ('status', None),
+    'created_at': ('created_at', None),
+    'completed_at': ('completed_at', None),
+}, relations={
+    'booking': Relation('booking_id', _load_bookings),
+})
@@ -1,19 +1,19 @@
 import unittest
-from app import create_app
+import pytest
+from testing import get_test_app
 from models import db, User, Field
 from datetime import datetime, date, time
 
+@pytest.mark.usefixtures('db_transaction')
 class AdvancedSearchTestCase(unittest.TestCase):
     def setUp(self):
         """Set up test environment"""
-        self.app = create_app()
+        self.app = get_test_app()
         self.app.config['TESTING'] = True
         self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
         self.client = self.app.test_client()
         
         with self.app.app_context():
-            db.create_all()
-            
             # Create test user (field owner)
             owner = User(name='Test Owner', email='owner@example.com', password='password123', role='owner')
             db.session.add(owner)
@@ -40,12 +40,6 @@ class AdvancedSearchTestCase(unittest.TestCase):
             
             db.session.commit()
 
-    def tearDown(self):
-        """Clean up after tests"""
-        with self.app.app_context():
-            db.session.remove()
-            db.drop_all()
-
     def test_fields_search_by_name(self):
         """Test searching fields by name"""
         with self.app.app_context():
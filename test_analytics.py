@@ -1,19 +1,19 @@
 import unittest
-from app import create_app
+import pytest
+from testing import get_test_app
 from models import db, User, Field, Booking, Payment, Review, Analytics
 from datetime import datetime, date, time
 
+@pytest.mark.usefixtures('db_transaction')
 class AnalyticsTestCase(unittest.TestCase):
     def setUp(self):
         """Set up test environment"""
-        self.app = create_app()
+        self.app = get_test_app()
         self.app.config['TESTING'] = True
         self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
         self.client = self.app.test_client()
         
         with self.app.app_context():
-            db.create_all()
-            
             # Create test users
             admin_user = User(name='Admin User', email='admin@example.com', password='password123', role='admin')
             owner_user = User(name='Owner User', email='owner@example.com', password='password123', role='owner')
@@ -98,12 +98,6 @@ class AnalyticsTestCase(unittest.TestCase):
             
             db.session.commit()
 
-    def tearDown(self):
-        """Clean up after tests"""
-        with self.app.app_context():
-            db.session.remove()
-            db.drop_all()
-
     def test_create_analytics_record(self):
         """Test creating an analytics record"""
         with self.app.app_context():
@@ -0,0 +1,129 @@
+import unittest
+from testing import get_test_app
+from models import db, User, Field, Booking, Payment, Review, Notification
+from datagen import generate_dataset
+from seed_data import seed_bulk
+from benchmarks.run import percentile, summarize, compare_to_baseline
+from benchmarks.scenarios import BenchmarkContext, get_scenarios
+from datetime import date
+import random
+
+class DataGeneratorTestCase(unittest.TestCase):
+    def setUp(self):
+        """Set up test client and database"""
+        self.app = get_test_app()
+        self.app.config['TESTING'] = True
+
+        with self.app.app_context():
+            db.create_all()
+
+    def tearDown(self):
+        """Clean up after tests"""
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def test_generate_dataset_counts(self):
+        """Test that the generator creates the requested number of rows"""
+        with self.app.app_context():
+            counts = generate_dataset(owners=3, fields_per_owner=2, users_per_owner=4, bookings_per_field=10,
+                                      reviews_per_field=3, notifications_per_user=2, today=date(2030, 1, 1))
+
+            self.assertEqual(counts['users'], 3 + 12)
+            self.assertEqual(User.query.filter_by(role='owner').count(), 3)
+            self.assertEqual(Field.query.count(), 6)
+            self.assertEqual(Booking.query.count(), 60)
+            self.assertEqual(Review.query.count(), 18)
+            self.assertEqual(Notification.query.count(), 24)
+            # Coded like the routes' notifications, so reading them renders templates
+            self.assertEqual(Notification.query.filter(Notification.code.is_(None)).count(), 0)
+            title, message = Notification.query.first().render('en')
+            self.assertIn('#', message)
+            self.assertEqual(Payment.query.count(), counts['payments'])
+            self.assertGreaterEqual(Booking.query.filter_by(status='confirmed').count(), counts['payments'])
+
+            # Users can log in with the shared password
+            self.assertTrue(User.query.first().check_password('password123'))
+
+    def test_generated_bookings_do_not_overlap(self):
+        """Test that each field gets distinct booking slots"""
+        with self.app.app_context():
+            generate_dataset(owners=2, fields_per_owner=2, users_per_owner=2, bookings_per_field=200)
+            slots = db.session.query(Booking.field_id, Booking.date, Booking.start_time).all()
+            self.assertEqual(len(slots), len(set(slots)))
+
+    def test_generate_dataset_twice(self):
+        """Test that the generator appends to an existing database"""
+        with self.app.app_context():
+            generate_dataset(owners=1, fields_per_owner=1, users_per_owner=1)
+            generate_dataset(owners=1, fields_per_owner=1, users_per_owner=1)
+            self.assertEqual(User.query.count(), 4)
+            self.assertEqual(Field.query.count(), 2)
+
+    def test_chunked_commits(self):
+        """Test that small chunks produce the same data as a single insert"""
+        with self.app.app_context():
+            counts = generate_dataset(owners=2, fields_per_owner=2, users_per_owner=3, bookings_per_field=15,
+                                      chunk_size=7, commit_chunks=True)
+            self.assertEqual(Booking.query.count(), counts['bookings'])
+            self.assertEqual(Payment.query.count(), counts['payments'])
+            self.assertEqual(User.query.count(), counts['users'])
+
+    def test_seed_bulk(self):
+        """Test bulk seeding with profile overrides"""
+        seed_bulk('small', owners=2, bookings_per_field=5, chunk_size=10)
+        with self.app.app_context():
+            self.assertEqual(User.query.filter_by(role='owner').count(), 2)
+            self.assertEqual(Booking.query.count(), 2 * 3 * 5)
+
+class BenchmarkStatsTestCase(unittest.TestCase):
+    def test_percentile(self):
+        """Test interpolated percentiles"""
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 0), 1)
+        self.assertEqual(percentile(values, 100), 100)
+        self.assertAlmostEqual(percentile(values, 50), 50.5)
+        self.assertAlmostEqual(percentile(values, 99), 99.01)
+        self.assertEqual(percentile([], 95), 0.0)
+
+    def test_summarize(self):
+        """Test scenario summary"""
+        result = summarize([30.0, 10.0, 20.0], errors=1, elapsed=2.0)
+        self.assertEqual(result['requests'], 3)
+        self.assertEqual(result['errors'], 1)
+        self.assertEqual(result['rps'], 1.5)
+        self.assertEqual(result['p50_ms'], 20.0)
+
+    def test_compare_to_baseline(self):
+        """Test that slower or failing scenarios are reported as regressions"""
+        baselines = {'field_search': {'p95_ms': 10.0, 'rps': 100.0}}
+        ok = {'field_search': {'p95_ms': 11.0, 'rps': 95.0, 'errors': 0}}
+        slow = {'field_search': {'p95_ms': 15.0, 'rps': 60.0, 'errors': 0}}
+        failing = {'club_search': {'p95_ms': 1.0, 'rps': 1.0, 'errors': 3}}
+
+        self.assertEqual(compare_to_baseline(ok, baselines), [])
+        self.assertEqual(len(compare_to_baseline(slow, baselines)), 2)
+        self.assertEqual(len(compare_to_baseline(failing, baselines)), 1)
+
+    def test_scenarios_build_requests(self):
+        """Test that every scenario builds a request"""
+        context = BenchmarkContext([1, 2, 3], {'user': 'token', 'owner': 'token'}, date(2030, 1, 1))
+        rng = random.Random(0)
+        for scenario in get_scenarios():
+            method, path, body, role = scenario.build(context, rng)
+            self.assertIn(method, ('GET', 'POST'))
+            self.assertTrue(path.startswith('/api/'))
+            self.assertIn(role, (None, 'user', 'owner'))
+
+        with self.assertRaises(ValueError):
+            get_scenarios(['no_such_scenario'])
+
+    def test_booking_slots_are_unique(self):
+        """Test that booking creation never reuses a slot"""
+        context = BenchmarkContext([1, 2, 3], {}, date(2030, 1, 1))
+        slots = [context.next_free_slot() for _ in range(100)]
+        self.assertEqual(len(slots), len(set(slots)))
+        self.assertTrue(all(8 <= hour <= 21 for _, _, hour in slots))
+
+if __name__ == '__main__':
+    unittest.main()
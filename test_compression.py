@@ -0,0 +1,97 @@
+import unittest
+import gzip
+import json
+import zlib
+from flask import Response
+from config import Config
+from app import create_app
+from compression import negotiate_encoding, compress_stream, GzipCompressor
+
+class NegotiationTestCase(unittest.TestCase):
+    def test_negotiate_encoding(self):
+        """Test Accept-Encoding negotiation with q-values and wildcards"""
+        self.assertEqual(negotiate_encoding('gzip, deflate, br', ('br', 'gzip')), 'br')
+        self.assertEqual(negotiate_encoding('gzip, deflate, br', ('gzip',)), 'gzip')
+        self.assertEqual(negotiate_encoding('br;q=0.5, gzip;q=0.8', ('br', 'gzip')), 'gzip')
+        self.assertEqual(negotiate_encoding('gzip;q=0, *;q=0.1', ('gzip',)), None)
+        self.assertEqual(negotiate_encoding('*', ('br', 'gzip')), 'br')
+        self.assertIsNone(negotiate_encoding('identity', ('gzip',)))
+        self.assertIsNone(negotiate_encoding(None, ('gzip',)))
+
+    def test_compress_stream(self):
+        """Test that every chunk is flushed and the stream decompresses to the input"""
+        chunks = list(compress_stream(iter([b'a' * 100, b'', b'b' * 100]), GzipCompressor(5)))
+        decompressor = zlib.decompressobj(31)
+        self.assertEqual(decompressor.decompress(chunks[0]), b'a' * 100)
+        self.assertEqual(gzip.decompress(b''.join(chunks)), b'a' * 100 + b'b' * 100)
+
+class CompressionTestCase(unittest.TestCase):
+    def setUp(self):
+        """Set up test app with a few routes of known size"""
+        self.app = create_app()
+        self.app.config['TESTING'] = True
+
+        @self.app.route('/test/large')
+        def large():
+            return {'items': [{'id': i, 'name': f'Field {i}'} for i in range(200)]}
+
+        @self.app.route('/test/small')
+        def small():
+            return {'status': 'ok'}
+
+        @self.app.route('/test/stream')
+        def stream():
+            def rows():
+                yield 'id,name\n'
+                for i in range(500):
+                    yield f'{i},Field {i}\n'
+            return Response(rows(), mimetype='text/csv')
+
+        @self.app.route('/test/image')
+        def image():
+            return Response(b'\x89PNG' * 1000, mimetype='image/png')
+
+        self.client = self.app.test_client()
+
+    def test_large_json_is_gzipped(self):
+        """Test that large buffered responses are compressed"""
+        response = self.client.get('/test/large', headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response.headers['Vary'])
+        body = response.get_data()
+        self.assertEqual(int(response.headers['Content-Length']), len(body))
+        self.assertEqual(len(json.loads(gzip.decompress(body))['items']), 200)
+
+    def test_not_compressed(self):
+        """Test small bodies, binary types and clients without gzip"""
+        response = self.client.get('/test/small', headers={'Accept-Encoding': 'gzip'})
+        self.assertNotIn('Content-Encoding', response.headers)
+        self.assertIn('Accept-Encoding', response.headers['Vary'])
+
+        response = self.client.get('/test/image', headers={'Accept-Encoding': 'gzip'})
+        self.assertNotIn('Content-Encoding', response.headers)
+
+        response = self.client.get('/test/large')
+        self.assertNotIn('Content-Encoding', response.headers)
+        self.assertEqual(len(response.get_json()['items']), 200)
+
+    def test_streamed_response(self):
+        """Test that generator responses are compressed as a stream"""
+        response = self.client.get('/test/stream', headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertNotIn('Content-Length', response.headers)
+        lines = gzip.decompress(response.get_data()).decode().splitlines()
+        self.assertEqual(lines[0], 'id,name')
+        self.assertEqual(len(lines), 501)
+
+    def test_disabled(self):
+        """Test that COMPRESS_ENABLED=False turns compression off"""
+        class UncompressedConfig(Config):
+            COMPRESS_ENABLED = False
+
+        app = create_app(UncompressedConfig)
+        response = app.test_client().get('/api/fields?per_page=100', headers={'Accept-Encoding': 'gzip'})
+        self.assertNotIn('Content-Encoding', response.headers)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+import os
+import tempfile
+import unittest
+from app import create_app
+from config import Config
+import sqlite3
+from database import default_pool_settings, build_engine_options, pool_checkout_seconds, pool_checkout_timeouts, _timed_pool_class
+from models import db
+from sqlalchemy import exc, text
+
+class DatabaseConfigTestCase(unittest.TestCase):
+    def setUp(self):
+        """Set up a file-backed SQLite app with one replica"""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        primary = os.path.join(self.tmpdir.name, 'primary.db')
+        replica = os.path.join(self.tmpdir.name, 'replica.db')
+
+        class TestConfig(Config):
+            TESTING = True
+            SQLALCHEMY_DATABASE_URI = f'sqlite:///{primary}'
+            DATABASE_REPLICA_URIS = [f'sqlite:///{replica}']
+
+        self.app = create_app(TestConfig)
+
+    def tearDown(self):
+        """Clean up after tests"""
+        with self.app.app_context():
+            db.session.remove()
+            for engine in db.engines.values():
+                engine.dispose()
+        self.tmpdir.cleanup()
+
+    def test_pool_settings_split_budget_between_workers(self):
+        """Test that the connection budget is divided between workers"""
+        pool_size, max_overflow = default_pool_settings({
+            'GUNICORN_WORKERS': 4, 'GUNICORN_THREADS': 8, 'DB_MAX_CONNECTIONS': 40
+        })
+        self.assertEqual(pool_size, 9)
+        self.assertEqual(max_overflow, 1)
+        self.assertLessEqual((pool_size + max_overflow) * 4, 40)
+
+    def test_explicit_pool_size_wins(self):
+        """Test that DB_POOL_SIZE overrides the derived default"""
+        options = build_engine_options({'DB_POOL_SIZE': 25, 'DB_MAX_OVERFLOW': 5}, 'mysql+pymysql://u:p@localhost/db')
+        self.assertEqual(options['pool_size'], 25)
+        self.assertEqual(options['max_overflow'], 5)
+        self.assertTrue(options['pool_pre_ping'])
+
+    def test_memory_sqlite_has_no_pool_options(self):
+        """Test that in-memory SQLite keeps the driver defaults"""
+        self.assertEqual(build_engine_options({}, 'sqlite:///:memory:'), {})
+
+    def test_sqlite_pragmas_applied(self):
+        """Test that WAL journal mode is enabled on new connections"""
+        with self.app.app_context():
+            journal_mode = db.session.execute(text('PRAGMA journal_mode')).scalar()
+            self.assertEqual(journal_mode.lower(), 'wal')
+
+    def test_replica_bind_configured(self):
+        """Test that replica URIs become binds"""
+        with self.app.app_context():
+            self.assertIn('replica_1', db.engines)
+            self.assertEqual(db.engines['replica_1'].pool.size(), db.engines[None].pool.size())
+
+    def test_pool_checkout_wait_recorded(self):
+        """Test that pool checkouts are exported as metrics"""
+        before = pool_checkout_seconds.get(bind='default')['count']
+        with self.app.app_context():
+            db.session.execute(text('SELECT 1'))
+            db.session.remove()
+        after = pool_checkout_seconds.get(bind='default')['count']
+        self.assertGreater(after, before)
+
+    def test_only_pool_timeouts_counted(self):
+        """Test that connection errors are not counted as pool checkout timeouts"""
+        def refuse():
+            raise sqlite3.OperationalError('connection refused')
+
+        pool = _timed_pool_class('timeouts')(refuse, pool_size=1, max_overflow=0, timeout=0.01)
+        with self.assertRaises(sqlite3.OperationalError):
+            pool.connect()
+        self.assertEqual(pool_checkout_timeouts.get(bind='timeouts'), 0)
+
+        pool = _timed_pool_class('timeouts')(lambda: sqlite3.connect(':memory:'), pool_size=1, max_overflow=0, timeout=0.01)
+        held = pool.connect()
+        with self.assertRaises(exc.TimeoutError):
+            pool.connect()
+        self.assertEqual(pool_checkout_timeouts.get(bind='timeouts'), 1)
+        held.close()
+
+if __name__ == '__main__':
+    unittest.main()
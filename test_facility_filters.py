@@ -0,0 +1,122 @@
+import unittest
+import pytest
+from testing import get_test_app
+from sqlalchemy import event
+from models import db, User, Field, Facility, FacilityType, facility_code, get_facility_type_ids
+
+@pytest.mark.usefixtures('db_transaction')
+class FacilityFiltersTestCase(unittest.TestCase):
+    def setUp(self):
+        """Set up test client and database"""
+        self.app = get_test_app()
+        self.app.config['TESTING'] = True
+        self.client = self.app.test_client()
+
+        with self.app.app_context():
+            owner = User(name='Owner', email='owner@example.com', password='password123', role='owner')
+            db.session.add(owner)
+            db.session.flush()
+
+            for name, facilities in [
+                ('Nasr', ['Parking', 'Showers', 'Floodlights']),
+                ('Maadi', ['parking', 'Changing Rooms']),
+                ('Dokki', ['Showers']),
+                ('Haram', []),
+            ]:
+                field = Field(name=name, location=name, governorate='cairo', price_per_hour=200.0,
+                              owner_id=owner.id)
+                db.session.add(field)
+                db.session.flush()
+                db.session.add_all([Facility(field_id=field.id, name=facility) for facility in facilities])
+            db.session.commit()
+
+    def field_names(self, query, url='/api/fields'):
+        response = self.client.get(f'{url}?{query}')
+        self.assertEqual(response.status_code, 200, response.get_json())
+        return sorted(field['name'] for field in response.get_json()['fields'])
+
+    def test_catalog(self):
+        """Test that facility names are normalized into one catalog entry each"""
+        self.assertEqual(facility_code(' Changing  Rooms '), 'changing_rooms')
+        with self.app.app_context():
+            self.assertEqual(FacilityType.query.count(), 4)
+            self.assertEqual(Facility.query.filter(Facility.facility_type_id.is_(None)).count(), 0)
+
+        response = self.client.get('/api/facilities')
+        self.assertEqual([facility['code'] for facility in response.get_json()['facilities']],
+                         ['changing_rooms', 'floodlights', 'parking', 'showers'])
+
+    def test_catalog_code_and_renames(self):
+        """Test that facilities report their catalog code and only renames touch the catalog"""
+        with self.app.app_context():
+            facility = Facility.query.filter_by(name='Changing Rooms').one()
+            self.assertEqual(facility.to_dict()['code'], 'changing_rooms')
+
+            statements = []
+            listener = lambda conn, cursor, statement, *args: statements.append(statement)
+            event.listen(db.engine, 'before_cursor_execute', listener)
+            try:
+                facility.field_id = Field.query.filter_by(name='Haram').one().id
+                db.session.flush()
+                self.assertFalse([s for s in statements if 'facility_types' in s and 'JOIN' not in s])
+
+                facility.name = 'Sauna'
+                db.session.commit()
+            finally:
+                event.remove(db.engine, 'before_cursor_execute', listener)
+            self.assertEqual(Facility.query.filter_by(name='Sauna').one().to_dict()['code'], 'sauna')
+
+    def test_catalog_insert_race(self):
+        """Test that a name added concurrently to the catalog is read back instead of failing"""
+        with self.app.app_context():
+            connection = db.session.connection()
+            types = FacilityType.__table__
+            real_execute = connection.execute
+
+            def execute(statement, *args, **kwargs):
+                # Another request inserts 'sauna' between our SELECT and INSERT
+                if getattr(statement, 'is_insert', False) and statement.table is types:
+                    real_execute(db.insert(types).values(code='sauna', name='Sauna'))
+                return real_execute(statement, *args, **kwargs)
+
+            connection.execute = execute
+            try:
+                ids = get_facility_type_ids(connection, ['Sauna', 'Ball Rental'])
+            finally:
+                del connection.execute
+            self.assertEqual(set(ids), {'Sauna', 'Ball Rental'})
+            self.assertEqual(FacilityType.query.filter_by(code='sauna').count(), 1)
+
+    def test_all_and_any(self):
+        """Test AND and OR facility filters"""
+        self.assertEqual(self.field_names('facilities=parking'), ['Maadi', 'Nasr'])
+        self.assertEqual(self.field_names('facilities=parking,showers'), ['Nasr'])
+        self.assertEqual(self.field_names('facilities=Parking,Showers&facilities_match=any'), ['Dokki', 'Maadi', 'Nasr'])
+        self.assertEqual(self.field_names('facilities=parking,sauna'), [])
+        self.assertEqual(self.field_names('facilities=parking,sauna&facilities_match=any'), ['Maadi', 'Nasr'])
+
+    def test_available_fields_filter(self):
+        """Test facility filters on available fields"""
+        url = '/api/fields/available'
+        query = 'date=2030-01-01&start_time=10:00&end_time=11:00&facilities=showers'
+        self.assertEqual(self.field_names(query, url), ['Dokki', 'Nasr'])
+
+    def test_invalid_match(self):
+        """Test validation of facilities_match"""
+        response = self.client.get('/api/fields?facilities=parking&facilities_match=some')
+        self.assertEqual(response.status_code, 400)
+
+    def test_rebuild_command(self):
+        """Test that the rebuild command links facilities written outside the ORM"""
+        with self.app.app_context():
+            db.session.execute(db.update(Facility).values(facility_type_id=None))
+            db.session.commit()
+        self.assertEqual(self.field_names('facilities=parking'), [])
+
+        result = self.app.test_cli_runner().invoke(args=['rebuild-facility-index'])
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn('Linked 6 facilities to 4 facility types', result.output)
+        self.assertEqual(self.field_names('facilities=parking'), ['Maadi', 'Nasr'])
+
+if __name__ == '__main__':
+    unittest.main()
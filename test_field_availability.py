@@ -1,19 +1,19 @@
 import unittest
-from app import create_app
+import pytest
+from testing import get_test_app
 from models import db, User, Field, Booking
 from datetime import datetime, date, time
 
+@pytest.mark.usefixtures('db_transaction')
 class FieldAvailabilityTestCase(unittest.TestCase):
     def setUp(self):
         """Set up test environment"""
-        self.app = create_app()
+        self.app = get_test_app()
         self.app.config['TESTING'] = True
         self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
         self.client = self.app.test_client()
         
         with self.app.app_context():
-            db.create_all()
-            
             # Create test user
             user = User(name='Test User', email='test@example.com', password='password123', role='user')
             db.session.add(user)
@@ -34,12 +34,6 @@ class FieldAvailabilityTestCase(unittest.TestCase):
             db.session.commit()
             self.field_id = field.id
 
-    def tearDown(self):
-        """Clean up after tests"""
-        with self.app.app_context():
-            db.session.remove()
-            db.drop_all()
-
     def test_field_opening_hours(self):
         """Test that field opening hours are properly set"""
         with self.app.app_context():
@@ -0,0 +1,101 @@
+import unittest
+import pytest
+from testing import get_test_app
+from models import db, User, Field, Facility
+from cache import TTLCache
+from query_counter import QueryCounter
+
+class TTLCacheTestCase(unittest.TestCase):
+    def test_expiry_and_eviction(self):
+        """Test that entries expire and the least recently used entry is evicted"""
+        cache = TTLCache(maxsize=2, ttl=60)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        self.assertEqual(cache.get('a'), 1)
+        cache.set('c', 3)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get_or_set('a', lambda: 10), 1)
+
+        cache.ttl = 0
+        cache.clear()
+        self.assertEqual(cache.get_or_set('a', lambda: 10), 10)
+        self.assertIsNone(cache.get('a'))
+
+@pytest.mark.usefixtures('db_transaction')
+class FieldFacetsTestCase(unittest.TestCase):
+    def setUp(self):
+        """Set up test client and database"""
+        self.app = get_test_app()
+        self.app.config['TESTING'] = True
+        self.client = self.app.test_client()
+
+        with self.app.app_context():
+            owner = User(name='Owner', email='owner@example.com', password='password123', role='owner')
+            db.session.add(owner)
+            db.session.flush()
+
+            for name, governorate, price, facilities in [
+                ('Nasr', 'cairo', 150.0, ['Parking', 'Showers']),
+                ('Maadi', 'cairo', 250.0, ['Parking']),
+                ('Heliopolis', 'cairo', 420.0, []),
+                ('Dokki', 'giza', 180.0, ['Parking', 'Cafeteria']),
+                ('Haram', 'giza', 260.0, ['Showers']),
+            ]:
+                field = Field(name=name, location=name, governorate=governorate,
+                              price_per_hour=price, owner_id=owner.id)
+                db.session.add(field)
+                db.session.flush()
+                db.session.add_all([Facility(field_id=field.id, name=facility) for facility in facilities])
+            db.session.commit()
+
+    def get_facets(self, query=''):
+        response = self.client.get(f'/api/fields?facets=true&{query}')
+        self.assertEqual(response.status_code, 200)
+        return response.get_json()['facets']
+
+    def test_facets_without_filters(self):
+        """Test counts per governorate, price bucket and facility"""
+        facets = self.get_facets()
+        self.assertEqual(facets['governorate'], [{'value': 'cairo', 'count': 3}, {'value': 'giza', 'count': 2}])
+        self.assertEqual([(bucket['min'], bucket['count']) for bucket in facets['price']],
+                         [(100, 2), (200, 2), (400, 1)])
+        self.assertEqual(facets['facilities'], [
+            {'code': 'parking', 'name': 'Parking', 'count': 3},
+            {'code': 'showers', 'name': 'Showers', 'count': 2},
+            {'code': 'cafeteria', 'name': 'Cafeteria', 'count': 1}
+        ])
+
+    def test_facets_ignore_their_own_filter(self):
+        """Test that each facet counts the other filters but not its own"""
+        facets = self.get_facets('governorate=cairo&max_price=300')
+        # Governorates are counted within the price range, across all governorates
+        self.assertEqual(facets['governorate'], [{'value': 'cairo', 'count': 2}, {'value': 'giza', 'count': 2}])
+        # Price buckets are counted within the governorate, across all prices
+        self.assertEqual([(bucket['min'], bucket['count']) for bucket in facets['price']],
+                         [(100, 1), (200, 1), (400, 1)])
+        # Facilities are counted over the listed fields
+        self.assertEqual([(facility['code'], facility['count']) for facility in facets['facilities']],
+                         [('parking', 2), ('showers', 1)])
+
+    def test_facets_with_search(self):
+        """Test that facets follow the search filter"""
+        facets = self.get_facets('search=dokki')
+        self.assertEqual(facets['governorate'], [{'value': 'giza', 'count': 1}])
+
+    def test_facets_are_opt_in_and_cached(self):
+        """Test that facets are only computed on request and cached per filter signature"""
+        self.assertNotIn('facets', self.client.get('/api/fields').get_json())
+
+        cache = self.app.extensions['facet_cache']
+        with QueryCounter(self.app) as first:
+            self.get_facets('governorate=giza')
+        with QueryCounter(self.app) as second:
+            self.get_facets('governorate=giza')
+        self.assertEqual(cache.hits, 1)
+        self.assertEqual(second.count, first.count - 2)
+
+        self.get_facets('governorate=cairo')
+        self.assertEqual(len(cache), 2)
+
+if __name__ == '__main__':
+    unittest.main()
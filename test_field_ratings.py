@@ -0,0 +1,129 @@
+import unittest
+import pytest
+from testing import get_test_app
+from models import db, User, Field, Review, update_field_rating
+from flask_jwt_extended import create_access_token
+
+@pytest.mark.usefixtures('db_transaction')
+class FieldRatingsTestCase(unittest.TestCase):
+    def setUp(self):
+        """Set up test client and database"""
+        self.app = get_test_app()
+        self.app.config['TESTING'] = True
+        self.client = self.app.test_client()
+
+        with self.app.app_context():
+            owner = User(name='Owner', email='owner@example.com', password='password123', role='owner')
+            players = [User(name=f'Player {i}', email=f'player{i}@example.com', password='password123')
+                       for i in range(3)]
+            db.session.add_all([owner] + players)
+            db.session.flush()
+
+            fields = [Field(name=f'Field {i}', location='Nasr City', governorate='cairo',
+                            price_per_hour=200.0, owner_id=owner.id) for i in range(3)]
+            db.session.add_all(fields)
+            db.session.commit()
+
+            self.field_ids = [field.id for field in fields]
+            self.tokens = [create_access_token(identity={'id': player.id, 'role': player.role})
+                           for player in players]
+
+    def review(self, player, field_id, rating):
+        return self.client.post('/api/reviews', json={'field_id': field_id, 'rating': rating},
+                                headers={'Authorization': f'Bearer {self.tokens[player]}'})
+
+    def get_field(self, field_id):
+        with self.app.app_context():
+            return db.session.get(Field, field_id)
+
+    def test_create_update_delete_review(self):
+        """Test that review changes keep the field aggregates in sync"""
+        field_id = self.field_ids[0]
+        self.assertEqual(self.review(0, field_id, 5).status_code, 201)
+        response = self.review(1, field_id, 2)
+        self.assertEqual(response.status_code, 201)
+        review_id = response.get_json()[0]['review']['id']
+
+        field = self.get_field(field_id)
+        self.assertEqual((field.rating_sum, field.rating_count), (7, 2))
+        self.assertAlmostEqual(field.rating_avg, 3.5)
+
+        # Change a rating
+        response = self.client.put(f'/api/reviews/{review_id}', json={'rating': 4},
+                                   headers={'Authorization': f'Bearer {self.tokens[1]}'})
+        self.assertEqual(response.status_code, 200)
+        field = self.get_field(field_id)
+        self.assertEqual((field.rating_sum, field.rating_count), (9, 2))
+        self.assertAlmostEqual(field.rating_avg, 4.5)
+
+        # Comment-only updates leave the aggregates alone
+        self.client.put(f'/api/reviews/{review_id}', json={'comment': 'Nice'},
+                        headers={'Authorization': f'Bearer {self.tokens[1]}'})
+        self.assertEqual(self.get_field(field_id).rating_sum, 9)
+
+        # Delete a review
+        response = self.client.delete(f'/api/reviews/{review_id}',
+                                      headers={'Authorization': f'Bearer {self.tokens[1]}'})
+        self.assertEqual(response.status_code, 200)
+        field = self.get_field(field_id)
+        self.assertEqual((field.rating_sum, field.rating_count), (5, 1))
+        self.assertAlmostEqual(field.rating_avg, 5.0)
+
+    def test_rejected_review_does_not_change_aggregates(self):
+        """Test that a duplicate review is not counted"""
+        field_id = self.field_ids[0]
+        self.review(0, field_id, 4)
+        self.assertEqual(self.review(0, field_id, 1).status_code, 409)
+        field = self.get_field(field_id)
+        self.assertEqual((field.rating_sum, field.rating_count), (4, 1))
+
+    def test_fields_list_includes_ratings(self):
+        """Test that field listings return the stored ratings"""
+        self.review(0, self.field_ids[1], 3)
+        response = self.client.get('/api/fields')
+        fields = {field['id']: field for field in response.get_json()['fields']}
+        self.assertEqual(fields[self.field_ids[1]]['average_rating'], 3.0)
+        self.assertEqual(fields[self.field_ids[1]]['reviews_count'], 1)
+        self.assertEqual(fields[self.field_ids[0]]['average_rating'], 0)
+
+    def test_sort_by_rating_and_min_rating(self):
+        """Test sort_by=rating and min_rating on /api/fields"""
+        first, second, third = self.field_ids
+        self.review(0, first, 2)
+        self.review(0, second, 5)
+        self.review(1, third, 4)
+        self.review(2, third, 5)
+
+        response = self.client.get('/api/fields?sort_by=rating&sort_order=desc')
+        self.assertEqual([field['id'] for field in response.get_json()['fields']], [second, third, first])
+
+        response = self.client.get('/api/fields?min_rating=4')
+        self.assertEqual(sorted(field['id'] for field in response.get_json()['fields']), sorted([second, third]))
+
+    def test_recompute_ratings_command(self):
+        """Test that the recompute command repairs drifted aggregates"""
+        field_id = self.field_ids[0]
+        self.review(0, field_id, 3)
+        self.review(1, field_id, 5)
+
+        with self.app.app_context():
+            # Simulate drift, e.g. reviews imported without going through the API
+            db.session.add(Review(user_id=1, field_id=field_id, rating=1))
+            update_field_rating(self.field_ids[1], added=5)
+            db.session.commit()
+
+        result = self.app.test_cli_runner().invoke(args=['recompute-ratings'])
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn('Recomputed ratings for 3 fields', result.output)
+
+        field = self.get_field(field_id)
+        self.assertEqual((field.rating_sum, field.rating_count), (9, 3))
+        self.assertAlmostEqual(field.rating_avg, 3.0)
+        field = self.get_field(self.field_ids[1])
+        self.assertEqual((field.rating_sum, field.rating_count, field.rating_avg), (0, 0, 0.0))
+
+        result = self.app.test_cli_runner().invoke(args=['recompute-ratings', '--field-id', str(field_id)])
+        self.assertIn('Recomputed ratings for 1 fields', result.output)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import unittest
+import pytest
+from testing import get_test_app
+from conftest import SeededConfig, SEED_PROFILE, worker_database_url
+from models import db, User, Field, Booking
+
+@pytest.mark.usefixtures('db_transaction')
+class RollbackTestCase(unittest.TestCase):
+    def setUp(self):
+        """Set up test app on the shared session schema"""
+        self.app = get_test_app()
+        self.client = self.app.test_client()
+
+    def _add_user(self):
+        with self.app.app_context():
+            db.session.add(User(name='Rollback', email='rollback@example.com', password='x', role='user'))
+            db.session.commit()
+            return User.query.filter_by(email='rollback@example.com').count()
+
+    def test_commit_is_rolled_back_first(self):
+        """Test that a committed row does not outlive the test"""
+        self.assertEqual(self._add_user(), 1)
+
+    def test_commit_is_rolled_back_second(self):
+        """Test that the same unique row can be committed again by the next test"""
+        self.assertEqual(self._add_user(), 1)
+
+    def test_commit_visible_to_requests(self):
+        """Test that rows committed in setup are visible to requests of the same test"""
+        self._add_user()
+        response = self.client.post('/api/register', json={
+            'name': 'Rollback', 'email': 'rollback@example.com', 'password': 'password123'
+        })
+        self.assertEqual(response.status_code, 409)
+
+@pytest.mark.usefixtures('seeded_db')
+class SeededTestCase(unittest.TestCase):
+    def setUp(self):
+        """Set up test app on the seeded template database"""
+        self.app = get_test_app(SeededConfig)
+
+    def test_seeded_counts(self):
+        """Test that the seeded database holds the SEED_PROFILE data set"""
+        with self.app.app_context():
+            fields = SEED_PROFILE['owners'] * SEED_PROFILE['fields_per_owner']
+            self.assertEqual(Field.query.count(), fields)
+            self.assertEqual(Booking.query.count(), fields * SEED_PROFILE['bookings_per_field'])
+            Booking.query.delete()
+            db.session.commit()
+
+    def test_seeded_counts_after_delete(self):
+        """Test that deleting seeded rows is rolled back too"""
+        self.test_seeded_counts()
+
+class WorkerDatabaseTestCase(unittest.TestCase):
+    def test_worker_database_url(self):
+        """Test that every xdist worker gets its own database"""
+        self.assertTrue(worker_database_url('gw0').endswith('test_gw0.db'))
+        self.assertNotEqual(worker_database_url('gw0'), worker_database_url('gw1'))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+import unittest
+import pytest
+from testing import get_test_app
+from models import db, User, Field, Team
+from search_index import normalize_text, search_terms
+from flask_jwt_extended import create_access_token
+
+class NormalizationTestCase(unittest.TestCase):
+    def test_arabic_normalization(self):
+        """Test that diacritics, tatweel and letter variants are folded"""
+        self.assertEqual(normalize_text('مَلْعَب'), 'ملعب')
+        self.assertEqual(normalize_text('الأهلى'), normalize_text('الاهلي'))
+        self.assertEqual(normalize_text('إستاد'), normalize_text('استاد'))
+        self.assertEqual(normalize_text('آمال'), normalize_text('امال'))
+        self.assertEqual(normalize_text('مدينة نصـــر'), 'مدينه نصر')
+        self.assertEqual(normalize_text('Café ZAMALEK ١٢'), 'cafe zamalek 12')
+
+    def test_search_terms(self):
+        """Test query tokenization"""
+        self.assertEqual(search_terms('  Nasr-City, "field"* '), ['nasr', 'city', 'field'])
+        self.assertEqual(search_terms('%%'), [])
+
+@pytest.mark.usefixtures('db_transaction')
+class FullTextSearchTestCase(unittest.TestCase):
+    def setUp(self):
+        """Set up test client and database"""
+        self.app = get_test_app()
+        self.app.config['TESTING'] = True
+        self.client = self.app.test_client()
+
+        with self.app.app_context():
+            ahly = User(name='النادي الأهلي', email='ahly@example.com', password='password123', role='owner')
+            zamalek = User(name='Zamalek Club', email='zamalek@example.com', password='password123', role='owner')
+            player = User(name='Player', email='player@example.com', password='password123')
+            db.session.add_all([ahly, zamalek, player])
+            db.session.flush()
+
+            fields = [
+                Field(name='ملعب الأهلي', location='مدينة نصر', governorate='cairo', price_per_hour=400.0,
+                      owner_id=ahly.id),
+                Field(name='Zamalek Field', location='Mohandessin', governorate='giza', price_per_hour=350.0,
+                      owner_id=zamalek.id, description='Near the Zamalek club house'),
+                Field(name='Maadi Arena', location='Maadi', governorate='cairo', price_per_hour=300.0,
+                      owner_id=zamalek.id, description='Five-a-side pitches next to Zamalek fans cafe'),
+            ]
+            db.session.add_all(fields)
+            db.session.add_all([Team(name='Zamalek Legends', leader_id=player.id),
+                                Team(name='Maadi Stars', leader_id=player.id)])
+            db.session.commit()
+
+            self.field_ids = [field.id for field in fields]
+            self.token = create_access_token(identity={'id': player.id, 'role': player.role})
+
+    def search_fields(self, term, extra=''):
+        response = self.client.get('/api/fields', query_string=f'search={term}{extra}')
+        self.assertEqual(response.status_code, 200)
+        return [field['name'] for field in response.get_json()['fields']]
+
+    def test_prefix_and_relevance(self):
+        """Test prefix matching with name matches ranked above description matches"""
+        self.assertEqual(self.search_fields('zama'), ['Zamalek Field', 'Maadi Arena'])
+        self.assertEqual(self.search_fields('maadi'), ['Maadi Arena'])
+        self.assertEqual(self.search_fields('zamalek mohandessin'), ['Zamalek Field'])
+        self.assertEqual(self.search_fields('zamalek', '&sort_by=price'), ['Maadi Arena', 'Zamalek Field'])
+        self.assertEqual(self.search_fields('tennis'), [])
+
+    def test_arabic_search(self):
+        """Test that Arabic searches ignore hamza, yaa and taa marbuta variants"""
+        self.assertEqual(self.search_fields('الاهلى'), ['ملعب الأهلي'])
+        self.assertEqual(self.search_fields('مدينه'), ['ملعب الأهلي'])
+        self.assertEqual(self.search_fields('مَلْعَب'), ['ملعب الأهلي'])
+
+    def test_index_follows_updates_and_deletes(self):
+        """Test that the index is kept in sync with the fields table"""
+        with self.app.app_context():
+            field = db.session.get(Field, self.field_ids[2])
+            field.name = 'Heliopolis Arena'
+            db.session.commit()
+        self.assertEqual(self.search_fields('heliop'), ['Heliopolis Arena'])
+        self.assertEqual(self.search_fields('maadi'), ['Heliopolis Arena'])  # still in location
+
+        with self.app.app_context():
+            db.session.delete(db.session.get(Field, self.field_ids[2]))
+            db.session.commit()
+        self.assertEqual(self.search_fields('heliop'), [])
+
+    def test_available_fields_search(self):
+        """Test full-text search on available fields"""
+        response = self.client.get('/api/fields/available?date=2030-01-01&start_time=10:00&end_time=11:00&search=zamalek')
+        self.assertEqual([field['name'] for field in response.get_json()['fields']], ['Zamalek Field', 'Maadi Arena'])
+
+    def test_club_and_team_search(self):
+        """Test full-text search on clubs and teams"""
+        response = self.client.get('/api/clubs/search', query_string='name=الاهلى')
+        self.assertEqual([club['name'] for club in response.get_json()[0]['clubs']], ['النادي الأهلي'])
+
+        response = self.client.get('/api/teams?search=legend', headers={'Authorization': f'Bearer {self.token}'})
+        self.assertEqual([team['name'] for team in response.get_json()['teams']], ['Zamalek Legends'])
+
+    def test_rebuild_command(self):
+        """Test that the rebuild command indexes rows written outside the ORM"""
+        with self.app.app_context():
+            db.session.execute(db.update(Field).where(Field.id == self.field_ids[1]).values(name='Dokki Pitch'))
+            db.session.commit()
+        self.assertEqual(self.search_fields('dokki'), [])
+
+        result = self.app.test_cli_runner().invoke(args=['rebuild-search-index'])
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn('Indexed 3 fields', result.output)
+        self.assertEqual(self.search_fields('dokki'), ['Dokki Pitch'])
+
+if __name__ == '__main__':
+    unittest.main()
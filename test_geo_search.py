@@ -0,0 +1,135 @@
+import unittest
+import pytest
+import random
+from testing import get_test_app
+from models import db, User, Field, Booking
+from geo import encode_geohash, haversine_km, bounding_box, covering_cells
+from datetime import date, time
+
+# Tahrir Square, Cairo
+CENTER = (30.0444, 31.2357)
+
+class GeoHelpersTestCase(unittest.TestCase):
+    def test_encode_geohash(self):
+        """Test geohash encoding against a known value"""
+        self.assertEqual(encode_geohash(57.64911, 10.40744), 'u4pruydqq')
+        self.assertEqual(encode_geohash(57.64911, 10.40744, precision=5), 'u4pru')
+        self.assertIsNone(encode_geohash(None, 31.2))
+
+    def test_haversine(self):
+        """Test great-circle distances"""
+        self.assertAlmostEqual(haversine_km(30.0, 31.0, 30.0, 31.0), 0.0)
+        # One degree of latitude is about 111 km
+        self.assertAlmostEqual(haversine_km(30.0, 31.0, 31.0, 31.0), 111.2, delta=0.1)
+
+    def test_covering_cells_contain_every_point_in_the_box(self):
+        """Test that the covering cells include every point of the bounding box"""
+        rng = random.Random(1)
+        for radius in (0.5, 3, 25, 100):
+            box = bounding_box(*CENTER, radius)
+            cells = covering_cells(box)
+            self.assertLessEqual(len(cells), 19)
+            for _ in range(500):
+                lat = rng.uniform(box[0], box[2])
+                lng = rng.uniform(box[1], box[3])
+                geohash = encode_geohash(lat, lng)
+                self.assertTrue(any(geohash.startswith(cell) for cell in cells), (radius, lat, lng))
+
+@pytest.mark.usefixtures('db_transaction')
+class NearbyFieldsTestCase(unittest.TestCase):
+    def setUp(self):
+        """Set up test client and database"""
+        self.app = get_test_app()
+        self.app.config['TESTING'] = True
+        self.client = self.app.test_client()
+
+        with self.app.app_context():
+            owner = User(name='Owner', email='owner@example.com', password='password123', role='owner')
+            db.session.add(owner)
+            db.session.flush()
+
+            # Fields roughly 0.5, 2, 4 and 30 km north of the center, and one without coordinates
+            self.fields = {}
+            for name, km_north in [('half', 0.5), ('two', 2), ('four', 4), ('thirty', 30)]:
+                field = Field(name=name, location='Cairo', governorate='cairo', price_per_hour=200.0,
+                              owner_id=owner.id, latitude=CENTER[0] + km_north / 111.2, longitude=CENTER[1])
+                db.session.add(field)
+                self.fields[name] = field
+            db.session.add(Field(name='nowhere', location='Cairo', governorate='cairo',
+                                 price_per_hour=200.0, owner_id=owner.id))
+            db.session.commit()
+            self.owner_id = owner.id
+            self.field_ids = {name: field.id for name, field in self.fields.items()}
+
+    def test_geohash_is_maintained(self):
+        """Test that geohashes follow the coordinates"""
+        with self.app.app_context():
+            field = db.session.get(Field, self.field_ids['two'])
+            self.assertEqual(field.geohash, encode_geohash(field.latitude, field.longitude))
+            field.latitude, field.longitude = 29.9792, 31.1342
+            db.session.commit()
+            self.assertEqual(db.session.get(Field, field.id).geohash, encode_geohash(29.9792, 31.1342))
+
+    def test_near_sorted_by_distance(self):
+        """Test that nearby fields come back closest first with distances"""
+        response = self.client.get(f'/api/fields?near={CENTER[0]},{CENTER[1]}&radius_km=5')
+        self.assertEqual(response.status_code, 200)
+        data = response.get_json()
+        self.assertEqual([field['name'] for field in data['fields']], ['half', 'two', 'four'])
+        self.assertEqual(data['pagination']['total'], 3)
+        self.assertAlmostEqual(data['fields'][0]['distance_km'], 0.5, delta=0.01)
+
+    def test_radius_boundary(self):
+        """Test that the radius is applied with the exact distance"""
+        url = f'/api/fields?near={CENTER[0]},{CENTER[1]}&radius_km='
+        self.assertEqual([f['name'] for f in self.client.get(url + '1.99').get_json()['fields']], ['half'])
+        self.assertEqual([f['name'] for f in self.client.get(url + '2.01').get_json()['fields']], ['half', 'two'])
+
+    def test_near_pagination_and_filters(self):
+        """Test paging through nearby fields combined with other filters"""
+        url = f'/api/fields?near={CENTER[0]},{CENTER[1]}&radius_km=50&per_page=2'
+        first = self.client.get(url).get_json()
+        second = self.client.get(url + '&page=2').get_json()
+        self.assertEqual([f['name'] for f in first['fields']], ['half', 'two'])
+        self.assertEqual([f['name'] for f in second['fields']], ['four', 'thirty'])
+        self.assertEqual(first['pagination']['pages'], 2)
+        self.assertTrue(first['pagination']['has_next'])
+
+        response = self.client.get(url + '&search=thirty')
+        self.assertEqual([f['name'] for f in response.get_json()['fields']], ['thirty'])
+
+    def test_invalid_near(self):
+        """Test validation of near and radius_km"""
+        for query in ['near=abc', 'near=30.0', 'near=95,31', f'near={CENTER[0]},{CENTER[1]}&radius_km=-1']:
+            self.assertEqual(self.client.get(f'/api/fields?{query}').status_code, 400, query)
+
+    def test_available_near(self):
+        """Test radius search on available fields"""
+        with self.app.app_context():
+            db.session.add(Booking(user_id=self.owner_id, field_id=self.field_ids['half'], date=date(2030, 1, 1),
+                                   start_time=time(10, 0), end_time=time(11, 0), total_price=200.0))
+            db.session.commit()
+
+        response = self.client.get(
+            f'/api/fields/available?date=2030-01-01&start_time=10:00&end_time=11:00'
+            f'&near={CENTER[0]},{CENTER[1]}&radius_km=5'
+        )
+        self.assertEqual(response.status_code, 200)
+        data = response.get_json()
+        self.assertEqual([field['name'] for field in data['fields']], ['two', 'four'])
+        self.assertEqual(data['available_fields_count'], 2)
+        self.assertIn('distance_km', data['fields'][0])
+
+    def test_rebuild_geohashes_command(self):
+        """Test that the rebuild command fills in missing geohashes"""
+        with self.app.app_context():
+            db.session.execute(db.update(Field).values(geohash=None))
+            db.session.commit()
+
+        result = self.app.test_cli_runner().invoke(args=['rebuild-geohashes'])
+        self.assertIn('Updated geohashes for 4 fields', result.output)
+        response = self.client.get(f'/api/fields?near={CENTER[0]},{CENTER[1]}&radius_km=5')
+        self.assertEqual(response.get_json()['pagination']['total'], 3)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,47 @@
+import unittest
+import os
+import runpy
+from unittest import mock
+from benchmarks.workers import parse_model
+
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'gunicorn.conf.py')
+
+def load_config(**env):
+    with mock.patch.dict(os.environ, env), mock.patch('multiprocessing.cpu_count', return_value=4):
+        return runpy.run_path(CONFIG_PATH)
+
+class GunicornConfigTestCase(unittest.TestCase):
+    def test_worker_defaults(self):
+        """Test worker counts derived from CPU cores for each worker class"""
+        config = load_config(GUNICORN_WORKER_CLASS='gthread')
+        self.assertEqual((config['workers'], config['threads']), (5, 4))
+        self.assertTrue(config['preload_app'])
+        self.assertGreater(config['max_requests_jitter'], 0)
+
+        config = load_config(GUNICORN_WORKER_CLASS='sync')
+        self.assertEqual((config['workers'], config['threads']), (9, 1))
+
+        config = load_config(GUNICORN_WORKER_CLASS='gevent', WEB_CONCURRENCY='2', GUNICORN_ACCESS_LOG='')
+        self.assertEqual(config['workers'], 2)
+        self.assertIsNone(config['accesslog'])
+
+    def test_pool_sized_for_worker_model(self):
+        """Test that the app's pool settings see the worker counts gunicorn runs with"""
+        from database import default_pool_settings
+        with mock.patch.dict(os.environ, {'GUNICORN_WORKER_CLASS': 'gthread'}), \
+                mock.patch('multiprocessing.cpu_count', return_value=4):
+            os.environ.pop('WEB_CONCURRENCY', None)
+            os.environ.pop('GUNICORN_THREADS', None)
+            runpy.run_path(CONFIG_PATH)
+            self.assertEqual((os.environ['WEB_CONCURRENCY'], os.environ['GUNICORN_THREADS']), ('5', '4'))
+            config = {'GUNICORN_WORKERS': int(os.environ['WEB_CONCURRENCY']),
+                      'GUNICORN_THREADS': int(os.environ['GUNICORN_THREADS']), 'DB_MAX_CONNECTIONS': 20}
+        self.assertEqual(default_pool_settings(config), (4, 0))
+
+    def test_parse_model(self):
+        """Test the worker model syntax of the benchmark"""
+        self.assertEqual(parse_model('gthread:3x4'), ('gthread', 3, 4))
+        self.assertEqual(parse_model('sync:5'), ('sync', 5, 1))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,154 @@
+import unittest
+import pytest
+from datetime import datetime, timedelta
+from testing import get_test_app
+from flask_jwt_extended import create_access_token
+from models import db, User, Field, Booking, Payment, IdempotencyKey
+from idempotency import purge_expired_keys
+
+@pytest.mark.usefixtures('db_transaction')
+class IdempotencyTestCase(unittest.TestCase):
+    def setUp(self):
+        """Set up a user, a field and a token"""
+        self.app = get_test_app()
+        self.app.config['TESTING'] = True
+        self.client = self.app.test_client()
+        
+        with self.app.app_context():
+            user = User(name='Test User', email='test@example.com', password='password123', role='user')
+            db.session.add(user)
+            db.session.commit()
+            self.user_id = user.id
+            
+            field = Field(name='Test Field', location='Test Location', governorate='Cairo',
+                          price_per_hour=100.0, owner_id=user.id)
+            db.session.add(field)
+            db.session.commit()
+            self.field_id = field.id
+            
+            self.headers = {'Authorization': f"Bearer {create_access_token(identity={'id': user.id, 'role': 'user'})}"}
+        
+        self.booking = {'field_id': self.field_id, 'date': '2030-01-10', 'start_time': '10:00', 'end_time': '12:00'}
+
+    def _post(self, path, payload, key):
+        return self.client.post(path, json=payload, headers=dict(self.headers, **{'Idempotency-Key': key}))
+
+    def test_retry_replays_booking(self):
+        """Test that a retried booking returns the stored response without a second insert"""
+        first = self._post('/api/bookings', self.booking, 'booking-1')
+        self.assertEqual(first.status_code, 201)
+        self.assertNotIn('Idempotent-Replayed', first.headers)
+        
+        retry = self._post('/api/bookings', self.booking, 'booking-1')
+        self.assertEqual(retry.status_code, 201)
+        self.assertEqual(retry.headers['Idempotent-Replayed'], 'true')
+        self.assertEqual(retry.get_json(), first.get_json())
+        
+        with self.app.app_context():
+            self.assertEqual(Booking.query.count(), 1)
+
+    def test_retry_replays_payment(self):
+        """Test that a retried payment does not create a second pending payment"""
+        booking_id = self._post('/api/bookings', self.booking, 'booking-2').get_json()[0]['booking']['id']
+        payment = {'booking_id': booking_id, 'amount': 200, 'payment_method': 'visa'}
+        first = self._post('/api/payments', payment, 'payment-2')
+        retry = self._post('/api/payments', payment, 'payment-2')
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(retry.get_json()[0]['payment']['id'], first.get_json()[0]['payment']['id'])
+        
+        with self.app.app_context():
+            self.assertEqual(Payment.query.filter_by(booking_id=booking_id).count(), 1)
+
+    def test_error_responses_are_replayed(self):
+        """Test that client errors are stored and replayed like successes"""
+        missing = {'field_id': 9999, 'date': '2030-01-10', 'start_time': '10:00', 'end_time': '12:00'}
+        self.assertEqual(self._post('/api/bookings', missing, 'missing').status_code, 404)
+        retry = self._post('/api/bookings', missing, 'missing')
+        self.assertEqual(retry.status_code, 404)
+        self.assertEqual(retry.headers['Idempotent-Replayed'], 'true')
+
+    def test_key_reused_for_other_request(self):
+        """Test that a key sent with a different body is rejected"""
+        self._post('/api/bookings', self.booking, 'booking-3')
+        other = dict(self.booking, start_time='14:00', end_time='15:00')
+        response = self._post('/api/bookings', other, 'booking-3')
+        self.assertEqual(response.status_code, 422)
+        
+        with self.app.app_context():
+            self.assertEqual(Booking.query.count(), 1)
+
+    def test_request_in_progress(self):
+        """Test that a retry is rejected while the first request has not finished"""
+        with self.app.test_request_context('/api/bookings', method='POST', json=self.booking):
+            from idempotency import request_fingerprint
+            fingerprint = request_fingerprint()
+        with self.app.app_context():
+            db.session.add(IdempotencyKey(user_id=self.user_id, key='running', fingerprint=fingerprint,
+                                          expires_at=datetime.utcnow() + timedelta(hours=1)))
+            db.session.commit()
+        
+        response = self._post('/api/bookings', self.booking, 'running')
+        self.assertEqual(response.status_code, 409)
+        with self.app.app_context():
+            self.assertEqual(Booking.query.count(), 0)
+
+    def test_abandoned_request_is_taken_over(self):
+        """Test that a key left in progress past the lock is taken over by the next retry"""
+        with self.app.test_request_context('/api/bookings', method='POST', json=self.booking):
+            from idempotency import request_fingerprint
+            fingerprint = request_fingerprint()
+        with self.app.app_context():
+            record = IdempotencyKey(user_id=self.user_id, key='abandoned', fingerprint=fingerprint,
+                                    expires_at=datetime.utcnow() + timedelta(hours=1))
+            record.created_at = datetime.utcnow() - timedelta(seconds=self.app.config['IDEMPOTENCY_LOCK_SECONDS'] + 1)
+            db.session.add(record)
+            db.session.commit()
+        
+        response = self._post('/api/bookings', self.booking, 'abandoned')
+        self.assertEqual(response.status_code, 201)
+        retry = self._post('/api/bookings', self.booking, 'abandoned')
+        self.assertEqual(retry.headers['Idempotent-Replayed'], 'true')
+        with self.app.app_context():
+            self.assertEqual(Booking.query.count(), 1)
+            self.assertEqual(IdempotencyKey.query.count(), 1)
+
+    def test_keys_are_per_user(self):
+        """Test that two users can use the same key"""
+        with self.app.app_context():
+            other = User(name='Other User', email='other@example.com', password='password123', role='user')
+            db.session.add(other)
+            db.session.commit()
+            other_headers = {'Authorization': f"Bearer {create_access_token(identity={'id': other.id, 'role': 'user'})}"}
+        
+        self._post('/api/bookings', self.booking, 'shared')
+        other_booking = dict(self.booking, start_time='14:00', end_time='15:00')
+        response = self.client.post('/api/bookings', json=other_booking,
+                                    headers=dict(other_headers, **{'Idempotency-Key': 'shared'}))
+        self.assertEqual(response.status_code, 201)
+        self.assertNotIn('Idempotent-Replayed', response.headers)
+
+    def test_expired_key_runs_again(self):
+        """Test that an expired key is replaced and purge removes expired keys"""
+        self._post('/api/bookings', self.booking, 'expiring')
+        with self.app.app_context():
+            IdempotencyKey.query.update({'expires_at': datetime.utcnow() - timedelta(minutes=1)})
+            db.session.commit()
+        
+        response = self._post('/api/bookings', self.booking, 'expiring')
+        self.assertEqual(response.status_code, 409)  # the slot is taken now
+        self.assertNotIn('Idempotent-Replayed', response.headers)
+        
+        with self.app.app_context():
+            self.assertEqual(purge_expired_keys(datetime.utcnow() + timedelta(days=2)), 1)
+            self.assertEqual(IdempotencyKey.query.count(), 0)
+
+    def test_invalid_and_missing_key(self):
+        """Test key validation and that requests without a key are not stored"""
+        self.assertEqual(self._post('/api/bookings', self.booking, 'x' * 256).status_code, 400)
+        response = self.client.post('/api/bookings', json=self.booking, headers=self.headers)
+        self.assertEqual(response.status_code, 201)
+        with self.app.app_context():
+            self.assertEqual(IdempotencyKey.query.count(), 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import unittest
+from app import create_app
+from config import Config
+from models import db, User, Field
+from instrumentation import request_db_queries, requests_total
+
+class InstrumentationTestCase(unittest.TestCase):
+    def setUp(self):
+        """Set up test environment"""
+
+        class TestConfig(Config):
+            TESTING = True
+            SERVER_TIMING_HEADER = True
+            SLOW_REQUEST_THRESHOLD_MS = 0
+
+        self.app = create_app(TestConfig)
+        self.client = self.app.test_client()
+
+        with self.app.app_context():
+            db.create_all()
+
+            user = User(name='Owner', email='owner@example.com', password='password123', role='owner')
+            db.session.add(user)
+            db.session.commit()
+            for i in range(3):
+                db.session.add(Field(name=f'Field {i}', location='Nasr City', governorate='cairo',
+                                     price_per_hour=100.0, owner_id=user.id))
+            db.session.commit()
+
+    def tearDown(self):
+        """Clean up after tests"""
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def test_queries_counted_per_request(self):
+        """Test that SQL statements are counted for each request"""
+        before = request_db_queries.get(endpoint='fields.get_fields')['count']
+        response = self.client.get('/api/fields')
+        self.assertEqual(response.status_code, 200)
+
+        state = request_db_queries.get(endpoint='fields.get_fields')
+        self.assertEqual(state['count'], before + 1)
+        self.assertIn('Server-Timing', response.headers)
+        self.assertIn('queries', response.headers['Server-Timing'])
+
+    def test_slow_request_logs_query_trace(self):
+        """Test that requests over the threshold log their SQL"""
+        with self.assertLogs(self.app.logger, level='WARNING') as logs:
+            self.client.get('/api/fields')
+        self.assertIn('Slow request GET /api/fields', logs.output[0])
+        self.assertIn('SELECT', logs.output[0])
+
+    def test_metrics_endpoint(self):
+        """Test that metrics are exposed in Prometheus text format"""
+        self.client.get('/api/fields')
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        body = response.get_data(as_text=True)
+        self.assertIn('# TYPE http_request_duration_seconds histogram', body)
+        self.assertIn('http_request_duration_seconds_bucket{method="GET",endpoint="fields.get_fields",le="+Inf"}', body)
+        self.assertGreater(requests_total.get(method='GET', endpoint='fields.get_fields', status=200), 0)
+
+if __name__ == '__main__':
+    unittest.main()
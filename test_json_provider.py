@@ -0,0 +1,65 @@
+import unittest
+import json
+from datetime import date, time, datetime
+from decimal import Decimal
+from config import Config
+from app import create_app
+from json_provider import FastJSONProvider, orjson
+
+SAMPLE = {
+    'date': date(2030, 1, 2),
+    'time': time(10, 30),
+    'datetime': datetime(2030, 1, 2, 10, 30, 15, 250),
+    'amount': Decimal('12.50'),
+    'name': 'ملعب الأهلي',
+    'counts': {3: 'three'},
+    'big': 2 ** 70,
+    'pair': (1, 2),
+}
+
+EXPECTED = {
+    'date': '2030-01-02',
+    'time': '10:30:00',
+    'datetime': '2030-01-02T10:30:15.000250',
+    'amount': 12.5,
+    'name': 'ملعب الأهلي',
+    'counts': {'3': 'three'},
+    'big': 2 ** 70,
+    'pair': [1, 2],
+}
+
+class StandardLibraryConfig(Config):
+    JSON_FAST_ENCODER = False
+
+class JSONProviderTestCase(unittest.TestCase):
+    def test_fast_and_standard_paths_agree(self):
+        """Test that both encoders produce the same documents"""
+        for config_class in (Config, StandardLibraryConfig):
+            app = create_app(config_class)
+            self.assertIsInstance(app.json, FastJSONProvider)
+            self.assertEqual(json.loads(app.json.dumps(SAMPLE)), EXPECTED, config_class)
+            self.assertEqual(app.json.loads(app.json.dumps(SAMPLE)), EXPECTED, config_class)
+
+    @unittest.skipIf(orjson is None, 'orjson is not installed')
+    def test_uses_orjson(self):
+        """Test that orjson is used when installed"""
+        self.assertTrue(create_app().json.use_orjson)
+        self.assertFalse(create_app(StandardLibraryConfig).json.use_orjson)
+
+    def test_compact_response(self):
+        """Test that responses are compact UTF-8 JSON"""
+        for config_class in (Config, StandardLibraryConfig):
+            app = create_app(config_class)
+            with app.test_request_context():
+                response = app.json.response({'when': date(2030, 1, 2), 'name': 'ملعب'})
+            self.assertEqual(response.mimetype, 'application/json')
+            self.assertEqual(response.get_data(), '{"when":"2030-01-02","name":"ملعب"}\n'.encode('utf-8'))
+
+    def test_jsonify_in_routes(self):
+        """Test that API responses go through the provider"""
+        app = create_app()
+        response = app.test_client().get('/healthz')
+        self.assertEqual(response.get_data(), b'{"status":"ok"}\n')
+
+if __name__ == '__main__':
+    unittest.main()
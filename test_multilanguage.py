@@ -1,19 +1,19 @@
 import unittest
-from app import create_app
+import pytest
+from testing import get_test_app
 from models import db, User
 import json
 
+@pytest.mark.usefixtures('db_transaction')
 class MultiLanguageTestCase(unittest.TestCase):
     def setUp(self):
         """Set up test environment"""
-        self.app = create_app()
+        self.app = get_test_app()
         self.app.config['TESTING'] = True
         self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
         self.client = self.app.test_client()
         
         with self.app.app_context():
-            db.create_all()
-            
             # Create a test user
             user = User(name='Test User', email='test@example.com', role='user')
             user.set_password('password123')
@@ -23,12 +23,6 @@ class MultiLanguageTestCase(unittest.TestCase):
             # Store user ID for later use
             self.user_id = user.id
 
-    def tearDown(self):
-        """Clean up after tests"""
-        with self.app.app_context():
-            db.session.remove()
-            db.drop_all()
-
     def test_english_response(self):
         """Test that English responses work correctly"""
         # Test login with English
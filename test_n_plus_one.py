@@ -0,0 +1,157 @@
+import unittest
+import pytest
+from testing import get_test_app
+from models import db, User, Field, Facility, Booking, Payment, Review, Notification, Team, TeamMember
+from query_counter import QueryCounter, QueryCountAssertionsMixin
+from flask_jwt_extended import create_access_token
+from datetime import date, time, timedelta
+
+@pytest.mark.usefixtures('db_transaction')
+class NPlusOneTestCase(QueryCountAssertionsMixin, unittest.TestCase):
+    """Every list endpoint must run the same number of queries for 10 and 100 items"""
+
+    def setUp(self):
+        """Set up more than 100 items for every list endpoint"""
+        self.app = get_test_app()
+        self.app.config['TESTING'] = True
+        self.client = self.app.test_client()
+
+        with self.app.app_context():
+            admin = User(name='Admin', email='admin@example.com', password='password123', role='admin')
+            player = User(name='Player', email='player@example.com', password='password123', role='user')
+            small_owner = User(name='Small Club', email='small@example.com', password='password123', role='owner')
+            big_owner = User(name='Big Club', email='big@example.com', password='password123', role='owner')
+            db.session.add_all([admin, player, small_owner, big_owner])
+            db.session.flush()
+
+            # 110 single-field clubs, plus a club with 10 and a club with 100 fields
+            owners = []
+            for i in range(110):
+                owner = User(name=f'Club {i}', email=f'club{i}@example.com', password='password123', role='owner')
+                owners.append(owner)
+            db.session.add_all(owners)
+            db.session.flush()
+
+            fields = []
+            for owner_id, count in [(owner.id, 1) for owner in owners] + [(small_owner.id, 10), (big_owner.id, 100)]:
+                for j in range(count):
+                    fields.append(Field(name=f'Field {owner_id}-{j}', location='Nasr City', governorate='cairo',
+                                        price_per_hour=100.0, owner_id=owner_id))
+            db.session.add_all(fields)
+            db.session.flush()
+            for field in fields:
+                db.session.add_all([Facility(field_id=field.id, name='Parking'),
+                                    Facility(field_id=field.id, name='Showers')])
+
+            # Teams with two members each
+            teams = [Team(name=f'Team {i}', leader_id=player.id) for i in range(110)]
+            db.session.add_all(teams)
+            db.session.flush()
+            for i, team in enumerate(teams):
+                db.session.add_all([TeamMember(team_id=team.id, user_id=player.id, role='leader'),
+                                    TeamMember(team_id=team.id, user_id=owners[i].id)])
+
+            # Bookings, payments, reviews and notifications on the first field
+            busy_field = fields[0]
+            bookings = []
+            for i in range(110):
+                bookings.append(Booking(user_id=player.id, team_id=teams[i].id, field_id=busy_field.id,
+                                        date=date(2030, 1, 1) + timedelta(days=i),
+                                        start_time=time(10, 0), end_time=time(11, 0),
+                                        total_price=100.0, status='confirmed'))
+            db.session.add_all(bookings)
+            db.session.flush()
+            for i, booking in enumerate(bookings):
+                db.session.add(Payment(booking_id=booking.id, user_id=player.id, amount=100.0, payment_method='visa'))
+                db.session.add(Review(user_id=player.id, field_id=fields[i].id, rating=4))
+                db.session.add(Review(user_id=player.id, field_id=busy_field.id, rating=5))
+                db.session.add(Notification(user_id=player.id, title='Booking', message='Booked', type='booking'))
+
+            # Bookings with 10 and 100 payments
+            for booking, count in [(bookings[1], 9), (bookings[2], 99)]:
+                for _ in range(count):
+                    db.session.add(Payment(booking_id=booking.id, user_id=player.id, amount=10.0, payment_method='visa'))
+            db.session.commit()
+
+            self.busy_field_id = busy_field.id
+            self.player_id = player.id
+            self.booking_10_payments = bookings[1].id
+            self.booking_100_payments = bookings[2].id
+            self.tokens = {
+                user.email: create_access_token(identity={'id': user.id, 'role': user.role})
+                for user in [admin, player, small_owner, big_owner, owners[0]]
+            }
+
+    def get(self, url, email=None):
+        headers = {'Authorization': f'Bearer {self.tokens[email]}'} if email else {}
+        return self.client.get(url, headers=headers)
+
+    def test_query_counter(self):
+        """Test that the counter sees every statement"""
+        with QueryCounter(self.app) as counter:
+            self.get('/api/fields?per_page=10')
+        self.assertGreater(counter.count, 0)
+        self.assertTrue(any('FROM fields' in statement for statement in counter.statements))
+
+    def test_fields_list(self):
+        self.assertQueriesDoNotScale(lambda size: self.get(f'/api/fields?per_page={size}'))
+
+    def test_available_fields(self):
+        self.assertQueriesDoNotScale(lambda size: self.get(
+            f'/api/fields/available?date=2031-01-01&start_time=10:00&end_time=11:00&per_page={size}'))
+
+    def test_field_reviews(self):
+        self.assertQueriesDoNotScale(lambda size: self.get(
+            f'/api/fields/{self.busy_field_id}/reviews?per_page={size}'))
+
+    def test_user_bookings(self):
+        self.assertQueriesDoNotScale(lambda size: self.get(
+            f'/api/bookings/user/{self.player_id}?per_page={size}', 'player@example.com'))
+
+    def test_field_bookings(self):
+        self.assertQueriesDoNotScale(lambda size: self.get(
+            f'/api/bookings/field/{self.busy_field_id}?per_page={size}', 'club0@example.com'))
+
+    def test_user_payments(self):
+        self.assertQueriesDoNotScale(lambda size: self.get(
+            f'/api/payments?per_page={size}', 'player@example.com'))
+
+    def test_booking_payments(self):
+        booking_ids = {10: self.booking_10_payments, 100: self.booking_100_payments}
+        self.assertQueriesDoNotScale(lambda size: self.get(
+            f'/api/payments/booking/{booking_ids[size]}', 'player@example.com'))
+
+    def test_notifications(self):
+        self.assertQueriesDoNotScale(lambda size: self.get(
+            f'/api/notifications?per_page={size}', 'player@example.com'))
+
+    def test_teams_list(self):
+        self.assertQueriesDoNotScale(lambda size: self.get(
+            f'/api/teams?per_page={size}', 'player@example.com'))
+
+    def test_teams_schedule(self):
+        def request_for_size(size):
+            # The schedule is not paginated, so shrink the data set instead
+            with self.app.app_context():
+                keep = [team.id for team in Team.query.order_by(Team.id).limit(size)]
+                Booking.query.filter(~Booking.team_id.in_(keep)).update({'team_id': None}, synchronize_session=False)
+                TeamMember.query.filter(~TeamMember.team_id.in_(keep)).delete(synchronize_session=False)
+                Team.query.filter(~Team.id.in_(keep)).delete(synchronize_session=False)
+                db.session.commit()
+            return self.get('/api/teams/schedule', 'player@example.com')
+
+        self.assertQueriesDoNotScale(request_for_size, sizes=(100, 10))
+
+    def test_clubs_search(self):
+        self.assertQueriesDoNotScale(lambda size: self.get(f'/api/clubs/search?per_page={size}'))
+
+    def test_top_rated_clubs(self):
+        self.assertQueriesDoNotScale(lambda size: self.get(
+            f'/api/clubs/top-rated?limit={size}&per_page={size}'))
+
+    def test_field_performance(self):
+        owners = {10: 'small@example.com', 100: 'big@example.com'}
+        self.assertQueriesDoNotScale(lambda size: self.get('/api/analytics/fields/performance', owners[size]))
+
+if __name__ == '__main__':
+    unittest.main()
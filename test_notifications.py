@@ -1,19 +1,21 @@
 import unittest
-from app import create_app
-from models import db, User, Notification
+import pytest
+from testing import get_test_app
+from flask_jwt_extended import create_access_token
+from models import db, User, Notification, render_notification, _render_notification
+from translations import translate
 from datetime import datetime
 
+@pytest.mark.usefixtures('db_transaction')
 class NotificationsTestCase(unittest.TestCase):
     def setUp(self):
         """Set up test environment"""
-        self.app = create_app()
+        self.app = get_test_app()
         self.app.config['TESTING'] = True
         self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
         self.client = self.app.test_client()
         
         with self.app.app_context():
-            db.create_all()
-            
             # Create test user
             user = User(name='Test User', email='test@example.com', password='password123', role='user')
             db.session.add(user)
@@ -38,12 +40,6 @@ class NotificationsTestCase(unittest.TestCase):
             
             db.session.commit()
 
-    def tearDown(self):
-        """Clean up after tests"""
-        with self.app.app_context():
-            db.session.remove()
-            db.drop_all()
-
     def test_create_notification(self):
         """Test creating a notification"""
         with self.app.app_context():
@@ -130,5 +126,47 @@ class NotificationsTestCase(unittest.TestCase):
             
             self.assertEqual(unread_count, 2)
 
+    def test_coded_notification_rendered_per_locale(self):
+        """Test that coded notifications are rendered in the reader's language"""
+        with self.app.app_context():
+            notification = Notification(
+                user_id=self.user_id,
+                code='payment_status',
+                params={'booking': 7, 'status': 'completed'},
+                type='payment'
+            )
+            db.session.add(notification)
+            db.session.commit()
+            notification_id = notification.id
+            token = create_access_token(identity={'id': self.user_id, 'role': 'user'})
+            
+            english = notification.to_dict('en')
+            self.assertEqual(english['title'], translate('payment_status_updated', 'en'))
+            self.assertEqual(english['message'], 'Your payment for booking #7 has been completed')
+            arabic = notification.to_dict('ar')
+            self.assertEqual(arabic['message'], translate('payment_status_message', 'ar', booking=7,
+                                                          status=translate('payment_status_completed', 'ar')))
+            
+            stored = db.session.execute(db.text(
+                'SELECT title, message FROM notifications WHERE id = :id'), {'id': notification_id}).one()
+            self.assertEqual(tuple(stored), (None, None))
+        
+        response = self.client.get(f'/api/notifications/{notification_id}', headers={
+            'Authorization': f'Bearer {token}', 'Accept-Language': 'ar'
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()[0]['notification']['message'], arabic['message'])
+
+    def test_render_cache(self):
+        """Test that rendered templates are cached per code, params and locale"""
+        _render_notification.cache_clear()
+        for _ in range(3):
+            render_notification('new_review', {'user': 'Ali', 'rating': 4, 'field': 'Arena'}, 'en')
+        render_notification('new_review', {'field': 'Arena', 'rating': 4, 'user': 'Ali'}, 'ar')
+        info = _render_notification.cache_info()
+        self.assertEqual((info.hits, info.misses), (2, 2))
+        self.assertEqual(render_notification('new_review', {'user': 'Ali', 'rating': 4, 'field': 'Arena'}, 'en'),
+                         ('New review received', 'Ali has left a 4-star review for your field Arena'))
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
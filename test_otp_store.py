@@ -0,0 +1,115 @@
+import unittest
+from app import create_app
+from models import db, User, OTP
+import warnings
+from sqlalchemy.exc import SAWarning
+from otp_store import DatabaseOTPStore, MemoryOTPStore, OTPRateLimitExceeded, create_otp_store
+from datetime import datetime, timedelta
+import json
+
+class OTPStoreTestCase(unittest.TestCase):
+    def setUp(self):
+        """Set up test environment"""
+        self.app = create_app()
+        self.app.config['TESTING'] = True
+        self.client = self.app.test_client()
+
+        with self.app.app_context():
+            db.create_all()
+
+            # Create test user
+            user = User(name='Test User', email='test@example.com', role='user')
+            user.set_password('password123')
+            db.session.add(user)
+            db.session.commit()
+
+    def tearDown(self):
+        """Clean up after tests"""
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def test_database_store_issue_and_verify(self):
+        """Test that a database OTP can be verified exactly once"""
+        with self.app.app_context():
+            store = DatabaseOTPStore()
+            otp_code = store.issue('test@example.com')
+
+            self.assertTrue(store.verify('test@example.com', otp_code))
+            self.assertFalse(store.verify('test@example.com', otp_code))
+
+    def test_database_store_rate_limit(self):
+        """Test that the database store limits OTPs per email"""
+        with self.app.app_context():
+            store = DatabaseOTPStore(max_per_window=2)
+            store.issue('test@example.com')
+            store.issue('test@example.com')
+
+            with self.assertRaises(OTPRateLimitExceeded) as context:
+                store.issue('test@example.com')
+            self.assertGreater(context.exception.retry_after, 0)
+
+            # Other emails are not affected
+            store.issue('other@example.com')
+
+    def test_database_store_purges_dead_codes(self):
+        """Test that expired and used codes outside the window are removed"""
+        with self.app.app_context():
+            old = datetime.utcnow() - timedelta(hours=1)
+            expired = OTP(email='test@example.com', otp_code='111111', expires_at=old)
+            expired.created_at = old
+            used = OTP(email='test@example.com', otp_code='222222', expires_at=old + timedelta(days=1))
+            used.created_at = old
+            used.used = True
+            db.session.add_all([expired, used])
+            db.session.commit()
+
+            store = DatabaseOTPStore()
+            with warnings.catch_warnings():
+                # The session must not keep the purged rows around
+                warnings.simplefilter('error', SAWarning)
+                store.issue('test@example.com')
+
+            # Only the freshly issued code remains
+            self.assertEqual(OTP.query.filter_by(email='test@example.com').count(), 1)
+
+    def test_unknown_store(self):
+        """Test that an unknown OTP_STORE is an error"""
+        self.assertIsInstance(create_otp_store({'OTP_STORE': 'memory'}), MemoryOTPStore)
+        with self.assertRaises(ValueError):
+            create_otp_store({'OTP_STORE': 'redis'})
+
+    def test_memory_store_expiry(self):
+        """Test that expired codes are rejected by the memory store"""
+        store = MemoryOTPStore(ttl_minutes=0)
+        otp_code = store.issue('test@example.com')
+
+        self.assertFalse(store.verify('test@example.com', otp_code))
+
+    def test_memory_store_rate_limit(self):
+        """Test that the memory store limits OTPs per email"""
+        store = MemoryOTPStore(max_per_window=1)
+        otp_code = store.issue('test@example.com')
+
+        with self.assertRaises(OTPRateLimitExceeded):
+            store.issue('test@example.com')
+
+        self.assertTrue(store.verify('test@example.com', otp_code))
+
+    def test_forgot_password_rate_limited(self):
+        """Test that the forgot password endpoint returns 429 when rate limited"""
+        self.app.extensions['otp_store'] = MemoryOTPStore(max_per_window=1)
+
+        response = self.client.post('/api/forgot-password',
+                                  data=json.dumps({'email': 'test@example.com'}),
+                                  content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+
+        response = self.client.post('/api/forgot-password',
+                                  data=json.dumps({'email': 'test@example.com'}),
+                                  content_type='application/json')
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response.headers)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,19 +1,19 @@
 import unittest
-from app import create_app
+import pytest
+from testing import get_test_app
 from models import db, User, Field
 from datetime import datetime, date, time
 
+@pytest.mark.usefixtures('db_transaction')
 class PaginationTestCase(unittest.TestCase):
     def setUp(self):
         """Set up test environment"""
-        self.app = create_app()
+        self.app = get_test_app()
         self.app.config['TESTING'] = True
         self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
         self.client = self.app.test_client()
         
         with self.app.app_context():
-            db.create_all()
-            
             # Create test user
             user = User(name='Test User', email='test@example.com', password='password123', role='user')
             db.session.add(user)
@@ -33,12 +33,6 @@ class PaginationTestCase(unittest.TestCase):
             
             db.session.commit()
 
-    def tearDown(self):
-        """Clean up after tests"""
-        with self.app.app_context():
-            db.session.remove()
-            db.drop_all()
-
     def test_fields_pagination(self):
         """Test pagination for fields endpoint"""
         with self.app.app_context():
@@ -0,0 +1,81 @@
+import unittest
+import json
+import os
+from app import create_app, db
+from cache import TTLCache
+from translations import catalog
+import prefork
+
+def run_in_child(function):
+    """Run function() in a forked child and return its JSON-encodable result"""
+    read_end, write_end = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(read_end)
+        try:
+            result = {'value': function()}
+        except Exception as e:
+            result = {'error': repr(e)}
+        os.write(write_end, json.dumps(result).encode())
+        os._exit(0)
+    os.close(write_end)
+    with os.fdopen(read_end) as pipe:
+        data = pipe.read()
+    os.waitpid(pid, 0)
+    return json.loads(data)
+
+@unittest.skipUnless(hasattr(os, 'fork'), 'needs os.fork')
+class PreforkTestCase(unittest.TestCase):
+    def setUp(self):
+        """Set up an app that has already used its connection pool, as a preloaded master"""
+        self.app = create_app()
+        self.app.config['TESTING'] = True
+        with self.app.app_context():
+            db.create_all()
+            db.session.execute(db.text('SELECT 1'))
+            db.session.remove()
+
+    def tearDown(self):
+        """Clean up after tests"""
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def test_child_gets_fresh_pools(self):
+        """Test that forked children dispose the inherited connection pools"""
+        with self.app.app_context():
+            parent_pool = id(db.engine.pool)
+
+        def child():
+            with self.app.app_context():
+                fresh = id(db.engine.pool) != parent_pool
+                return [fresh, db.session.execute(db.text('SELECT 1')).scalar()]
+
+        self.assertEqual(run_in_child(child), {'value': [True, 1]})
+        with self.app.app_context():
+            self.assertEqual(id(db.engine.pool), parent_pool)
+
+    def test_locks_reset_in_child(self):
+        """Test that a lock held at fork time is usable in the child"""
+        cache = TTLCache(maxsize=10, ttl=60)
+        cache.set('shared', 'value')
+        cache._lock.acquire()
+        try:
+            result = run_in_child(lambda: [cache._lock.locked(), cache.get('shared')])
+        finally:
+            cache._lock.release()
+        self.assertEqual(result, {'value': [False, 'value']})
+
+    def test_after_fork_callbacks(self):
+        """Test that after_fork callbacks run in the child and state is inherited"""
+        calls = []
+        callback = prefork.after_fork(lambda: calls.append('child'))
+        try:
+            self.assertEqual(run_in_child(lambda: [calls, list(catalog.loaded())]),
+                             {'value': [['child'], list(catalog.locales)]})
+            self.assertEqual(calls, [])
+        finally:
+            prefork._callbacks.remove(callback)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,124 @@
+import unittest
+import time
+from config import Config
+from app import create_app
+from flask_jwt_extended import create_access_token
+from ratelimit import MemoryRateLimitStore, create_rate_limit_store, parse_request_start, DEFAULT_COSTS
+
+class TokenBucketTestCase(unittest.TestCase):
+    def test_memory_store(self):
+        """Test that buckets drain by cost and refill over time"""
+        store = MemoryRateLimitStore()
+        self.assertEqual(store.consume('a', 4, 1.0, 5, now=0), (True, 1, 0))
+        allowed, remaining, retry_after = store.consume('a', 4, 1.0, 5, now=0)
+        self.assertFalse(allowed)
+        self.assertEqual(retry_after, 3)
+        self.assertTrue(store.consume('b', 4, 1.0, 5, now=0)[0])
+        self.assertTrue(store.consume('a', 4, 1.0, 5, now=3)[0])
+        # Never refills above capacity
+        self.assertEqual(store.consume('a', 1, 1.0, 5, now=1000)[1], 4)
+
+    def test_sweep_drops_full_buckets(self):
+        """Test that idle buckets are dropped"""
+        store = MemoryRateLimitStore()
+        store.sweep_interval = 2
+        store.consume('idle', 1, 1.0, 5, now=0)
+        store.consume('busy', 1, 1.0, 5, now=10)
+        self.assertEqual(list(store._buckets), ['busy'])
+
+    def test_parse_request_start(self):
+        """Test X-Request-Start in nginx, milliseconds and microseconds formats"""
+        self.assertAlmostEqual(parse_request_start('t=1000.5', now=1001.0), 0.5)
+        self.assertAlmostEqual(parse_request_start('1700000000250', now=1700000000.5), 0.25)
+        self.assertAlmostEqual(parse_request_start('1700000000250000', now=1700000000.5), 0.25)
+        self.assertEqual(parse_request_start('t=2000', now=1000), 0.0)
+        self.assertIsNone(parse_request_start('garbage'))
+        self.assertIsNone(parse_request_start(None))
+
+    def test_unknown_store(self):
+        """Test that an unknown RATELIMIT_STORE is an error"""
+        self.assertIsInstance(create_rate_limit_store({'RATELIMIT_STORE': 'memory'}), MemoryRateLimitStore)
+        with self.assertRaises(ValueError):
+            create_rate_limit_store({'RATELIMIT_STORE': 'memcached'})
+
+class LimitedConfig(Config):
+    RATELIMIT_BURST = 10
+    RATELIMIT_PER_MINUTE = 1
+    RATELIMIT_COSTS = {'auth.login': 4}
+    LOAD_SHED_QUEUE_MS = 500
+
+class RateLimitTestCase(unittest.TestCase):
+    def setUp(self):
+        """Set up an app with a small burst"""
+        self.app = create_app(LimitedConfig)
+        self.app.config['TESTING'] = True
+        self.client = self.app.test_client()
+
+    def test_cost_weights_and_429(self):
+        """Test that weighted endpoints drain the bucket faster and 429 carries Retry-After"""
+        statuses = [self.client.post('/api/login', json={}).status_code for _ in range(3)]
+        self.assertEqual(statuses, [400, 400, 429])
+        response = self.client.post('/api/login', json={})
+        self.assertGreaterEqual(int(response.headers['Retry-After']), 1)
+        self.assertEqual(response.get_json()[0]['message'], 'Too many requests, please try again later')
+
+    def test_default_costs(self):
+        """Test that the expensive endpoints cost more than one token"""
+        self.assertEqual(DEFAULT_COSTS['analytics.export_bookings_data'], 20)
+        with self.app.test_request_context('/api/fields/available'):
+            from flask import request
+            self.assertIn(request.endpoint, DEFAULT_COSTS)
+
+    def test_clients_are_limited_separately(self):
+        """Test that users with tokens and anonymous addresses have their own buckets"""
+        with self.app.app_context():
+            token = create_access_token(identity={'id': 1, 'role': 'user'})
+        for _ in range(3):
+            self.client.post('/api/login', json={})
+        self.assertEqual(self.client.post('/api/login', json={}).status_code, 429)
+        
+        response = self.client.post('/api/login', json={}, headers={'Authorization': f'Bearer {token}'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.headers['X-RateLimit-Limit'], '10')
+        self.assertEqual(response.headers['X-RateLimit-Remaining'], '6')
+        
+        other = self.client.post('/api/login', json={}, environ_base={'REMOTE_ADDR': '10.0.0.2'})
+        self.assertEqual(other.status_code, 400)
+
+    def test_clients_behind_proxy(self):
+        """Test that anonymous clients behind one proxy are limited by their forwarded address"""
+        proxy = {'REMOTE_ADDR': '10.0.0.1'}
+        first = {'X-Forwarded-For': '203.0.113.7'}
+        for _ in range(3):
+            self.client.post('/api/login', json={}, headers=first, environ_base=proxy)
+        self.assertEqual(self.client.post('/api/login', json={}, headers=first, environ_base=proxy).status_code, 429)
+        
+        second = {'X-Forwarded-For': '198.51.100.4'}
+        response = self.client.post('/api/login', json={}, headers=second, environ_base=proxy)
+        self.assertEqual(response.status_code, 400)
+        # Only the hop added by the trusted proxy counts, not what the client sent
+        spoofed = {'X-Forwarded-For': '198.51.100.99, 203.0.113.7'}
+        self.assertEqual(self.client.post('/api/login', json={}, headers=spoofed, environ_base=proxy).status_code, 429)
+
+    def test_load_shedding(self):
+        """Test that requests queued past the threshold get 503 and health checks do not"""
+        queued = {'X-Request-Start': f't={time.time() - 2:.3f}'}
+        response = self.client.get('/api/fields', headers=queued)
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.headers['Retry-After'], '5')
+        self.assertEqual(self.client.get('/healthz', headers=queued).status_code, 200)
+        
+        fresh = {'X-Request-Start': f't={time.time():.3f}'}
+        self.assertNotEqual(self.client.get('/healthz', headers=fresh).status_code, 503)
+
+    def test_disabled(self):
+        """Test that RATELIMIT_ENABLED=False turns limiting off"""
+        class UnlimitedConfig(LimitedConfig):
+            RATELIMIT_ENABLED = False
+
+        client = create_app(UnlimitedConfig).test_client()
+        statuses = {client.post('/api/login', json={}).status_code for _ in range(5)}
+        self.assertEqual(statuses, {400})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+import os
+import tempfile
+import unittest
+from app import create_app
+from config import Config
+from models import db, User, Field
+from flask_jwt_extended import create_access_token
+import json
+
+class ReadReplicaTestCase(unittest.TestCase):
+    def setUp(self):
+        """Set up a primary and a replica SQLite file with different data"""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        primary = os.path.join(self.tmpdir.name, 'primary.db')
+        replica = os.path.join(self.tmpdir.name, 'replica.db')
+
+        class TestConfig(Config):
+            TESTING = True
+            SQLALCHEMY_DATABASE_URI = f'sqlite:///{primary}'
+            DATABASE_REPLICA_URIS = [f'sqlite:///{replica}']
+
+        self.app = create_app(TestConfig)
+        self.client = self.app.test_client()
+
+        with self.app.app_context():
+            db.create_all()
+            db.metadata.create_all(db.engines['replica_1'])
+
+            owner = User(name='Owner', email='owner@example.com', password='password123', role='owner')
+            db.session.add(owner)
+            db.session.commit()
+            self.owner_id = owner.id
+            db.session.add(Field(name='Primary Field', location='Nasr City', governorate='cairo',
+                                 price_per_hour=100.0, owner_id=owner.id))
+            db.session.commit()
+            self.token = create_access_token(identity={'id': owner.id, 'role': 'owner'})
+
+            # The replica lags behind: same owner, different field
+            with db.engines['replica_1'].begin() as connection:
+                connection.execute(User.__table__.insert(), [{
+                    'id': self.owner_id, 'name': 'Owner', 'email': 'owner@example.com',
+                    'password': 'password123', 'role': 'owner'
+                }])
+                connection.execute(Field.__table__.insert(), [{
+                    'name': 'Replica Field', 'location': 'Haram', 'governorate': 'giza',
+                    'price_per_hour': 100.0, 'owner_id': self.owner_id
+                }])
+
+    def tearDown(self):
+        """Clean up after tests"""
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+            for engine in db.engines.values():
+                engine.dispose()
+        self.tmpdir.cleanup()
+
+    def test_get_fields_reads_from_replica(self):
+        """Test that field listing is served by the replica"""
+        response = self.client.get('/api/fields')
+        self.assertEqual(response.status_code, 200)
+        names = [field['name'] for field in response.get_json()['fields']]
+        self.assertEqual(names, ['Replica Field'])
+
+    def test_write_goes_to_primary_and_sticks(self):
+        """Test that writes hit the primary and later reads stay there"""
+        response = self.client.post('/api/fields',
+                                    data=json.dumps({
+                                        'name': 'New Field', 'location': 'Dokki',
+                                        'governorate': 'giza', 'price_per_hour': 150
+                                    }),
+                                    content_type='application/json',
+                                    headers={'Authorization': f'Bearer {self.token}'})
+        self.assertEqual(response.status_code, 201)
+        field_id = response.get_json()[0]['field']['id']
+
+        with self.app.app_context():
+            self.assertIsNotNone(db.session.get(Field, field_id))
+
+        # Same client carries the sticky cookie and reads its own write
+        response = self.client.get(f'/api/fields/{field_id}')
+        self.assertEqual(response.status_code, 200)
+
+        # A client without the cookie is served by the lagging replica
+        response = self.app.test_client().get(f'/api/fields/{field_id}')
+        self.assertEqual(response.status_code, 404)
+
+    def test_non_routed_blueprints_use_primary(self):
+        """Test that blueprints outside REPLICA_READ_BLUEPRINTS read from the primary"""
+        response = self.client.get('/api/payments',
+                                   headers={'Authorization': f'Bearer {self.token}'})
+        self.assertEqual(response.status_code, 200)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+import unittest
+import pytest
+from testing import get_test_app
+from models import db, User, Field, Facility, Booking, Payment
+from query_counter import QueryCounter
+from flask_jwt_extended import create_access_token
+from datetime import date, time
+
+@pytest.mark.usefixtures('db_transaction')
+class SparseFieldsetsTestCase(unittest.TestCase):
+    def setUp(self):
+        """Set up test client and database"""
+        self.app = get_test_app()
+        self.app.config['TESTING'] = True
+        self.client = self.app.test_client()
+
+        with self.app.app_context():
+            owner = User(name='Owner', email='owner@example.com', password='password123', role='owner')
+            player = User(name='Player', email='player@example.com', password='password123')
+            db.session.add_all([owner, player])
+            db.session.flush()
+
+            for i in range(3):
+                field = Field(name=f'Field {i}', location='Maadi', governorate='cairo', price_per_hour=200.0 + i,
+                              owner_id=owner.id, description='A long description', latitude=30.0, longitude=31.0)
+                db.session.add(field)
+                db.session.flush()
+                db.session.add(Facility(field_id=field.id, name='Parking'))
+                booking = Booking(user_id=player.id, field_id=field.id, date=date(2030, 1, 1),
+                                  start_time=time(10, 0), end_time=time(11, 0), total_price=200.0)
+                db.session.add(booking)
+                db.session.flush()
+                db.session.add(Payment(booking_id=booking.id, user_id=player.id, amount=200.0,
+                                       payment_method='visa'))
+            db.session.commit()
+
+            self.player_id = player.id
+            self.headers = {'Authorization': f"Bearer {create_access_token(identity={'id': player.id, 'role': 'user'})}"}
+
+    def test_fields_selects_only_requested_columns(self):
+        """Test that fields= projects the query onto the requested columns"""
+        with QueryCounter(self.app) as counter:
+            response = self.client.get('/api/fields?fields=name,price_per_hour')
+        self.assertEqual(response.status_code, 200)
+        fields = response.get_json()['fields']
+        self.assertEqual(fields[0], {'id': 1, 'name': 'Field 0', 'price_per_hour': 200.0})
+        self.assertFalse(any('description' in statement for statement in counter.statements))
+        self.assertFalse(any('facilities' in statement for statement in counter.statements))
+
+    def test_include_loads_relations_in_one_query(self):
+        """Test that include= embeds relations with one query per relation"""
+        response = self.client.get('/api/fields?fields=name,opening_time&include=facilities,owner')
+        field = response.get_json()['fields'][0]
+        self.assertEqual(field['opening_time'], '08:00:00')
+        self.assertEqual([facility['name'] for facility in field['facilities']], ['Parking'])
+        self.assertEqual(field['owner']['name'], 'Owner')
+
+        with QueryCounter(self.app) as small:
+            self.client.get('/api/fields?fields=name&include=facilities&per_page=1')
+        with QueryCounter(self.app) as large:
+            self.client.get('/api/fields?fields=name&include=facilities&per_page=3')
+        self.assertEqual(small.count, large.count)
+
+    def test_default_output_unchanged(self):
+        """Test that list responses keep the full representation without fields="""
+        field = self.client.get('/api/fields').get_json()['fields'][0]
+        self.assertIn('description', field)
+        self.assertEqual(len(field['facilities']), 1)
+
+    def test_near_with_fieldset(self):
+        """Test sparse fieldsets combined with radius search"""
+        response = self.client.get('/api/fields?near=30.0,31.0&radius_km=1&fields=name')
+        self.assertEqual(set(response.get_json()['fields'][0]), {'id', 'name', 'distance_km'})
+
+    def test_bookings_and_payments(self):
+        """Test sparse fieldsets on booking and payment lists"""
+        response = self.client.get(f'/api/bookings/user/{self.player_id}?fields=date,start_time&include=field',
+                                   headers=self.headers)
+        booking = response.get_json()[0]['bookings'][0]
+        self.assertEqual(booking['date'], '2030-01-01')
+        self.assertEqual(booking['field']['name'], 'Field 0')
+        self.assertNotIn('total_price', booking)
+
+        response = self.client.get('/api/payments?fields=amount&include=booking', headers=self.headers)
+        payment = response.get_json()['payments'][0]
+        self.assertEqual(set(payment), {'id', 'amount', 'booking'})
+        self.assertEqual(payment['booking']['start_time'], '10:00:00')
+
+    def test_unknown_fields(self):
+        """Test that unknown field and relation names are rejected"""
+        self.assertEqual(self.client.get('/api/fields?fields=name,password').status_code, 400)
+        self.assertEqual(self.client.get('/api/fields?include=bookings').status_code, 400)
+        response = self.client.get(f'/api/bookings/user/{self.player_id}?fields=secret', headers=self.headers)
+        self.assertEqual(response.status_code, 400)
+
+if __name__ == '__main__':
+    unittest.main()
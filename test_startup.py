@@ -0,0 +1,65 @@
+import inspect
+import unittest
+import subprocess
+import sys
+from unittest import mock
+from werkzeug.routing import Map, Rule
+from flask import url_for
+from app import create_app
+from testing import get_test_app
+from benchmarks.startup import compare
+from routing import LazyBuildRule
+
+class StartupTestCase(unittest.TestCase):
+    def test_models_import_without_app(self):
+        """Test that importing models does not import the app factory"""
+        output = subprocess.run(
+            [sys.executable, '-c', "import sys, models; print('app' in sys.modules, 'routes.auth' in sys.modules)"],
+            capture_output=True, text=True, check=True
+        )
+        self.assertEqual(output.stdout.split(), ['False', 'False'])
+
+    def test_url_builders_compiled_on_first_use(self):
+        """Test that url_for() works with lazily compiled rule builders"""
+        app = create_app()
+        rule = next(rule for rule in app.url_map.iter_rules() if rule.endpoint == 'fields.get_field')
+        lazy_builder = rule._build_unknown
+        with app.test_request_context():
+            self.assertEqual(url_for('fields.get_field', id=3), '/api/fields/3')
+            self.assertEqual(url_for('fields.get_field', id=4, lang='ar'), '/api/fields/4?lang=ar')
+        self.assertIsNot(rule._build_unknown, lazy_builder)
+        self.assertEqual(app.test_client().get('/healthz').status_code, 200)
+
+    def test_werkzeug_compile_builder_contract(self):
+        """Test that Werkzeug still compiles builders through the private Rule._compile_builder we override"""
+        parameters = list(inspect.signature(Rule._compile_builder).parameters.values())
+        self.assertEqual([(p.name, p.default) for p in parameters], [('self', inspect.Parameter.empty), ('append_unknown', True)],
+                         'Rule._compile_builder changed: update routing.LazyBuildRule and the Werkzeug pin')
+        
+        with mock.patch.object(Rule, '_compile_builder', autospec=True, side_effect=Rule._compile_builder) as compile_builder:
+            url_map = Map([LazyBuildRule('/fields/<int:id>', endpoint='field')])
+            adapter = url_map.bind('example.com')
+            self.assertEqual(compile_builder.call_count, 0, 'Rule.compile() no longer goes through _compile_builder')
+            self.assertEqual(adapter.build('field', {'id': 3}), '/fields/3')
+            self.assertEqual(adapter.build('field', {'id': 3}, append_unknown=False), '/fields/3')
+            self.assertEqual(adapter.build('field', {'id': 4, 'lang': 'ar'}), '/fields/4?lang=ar')
+            # Each builder is compiled once, on first use
+            self.assertEqual([call.args[1:] for call in compile_builder.call_args_list], [(True,), (False,)])
+
+    def test_cached_test_app(self):
+        """Test that the shared test app is reused with a cleared facet cache"""
+        app = get_test_app()
+        app.extensions['facet_cache'].set('key', 'value')
+        self.assertIs(get_test_app(), app)
+        self.assertEqual(len(app.extensions['facet_cache']), 0)
+
+    def test_compare_to_baseline(self):
+        """Test startup regression detection"""
+        baseline = {'import_ms': 500, 'create_app_ms': 100}
+        self.assertEqual(compare({'import_ms': 550, 'create_app_ms': 90}, baseline, 0.2), [])
+        self.assertEqual(compare({'import_ms': 650, 'create_app_ms': 90}, baseline, 0.2),
+                         ['import_ms: 650ms vs baseline 500ms'])
+        self.assertEqual(compare({'import_ms': 650}, {}, 0.2), [])
+
+if __name__ == '__main__':
+    unittest.main()
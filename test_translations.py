@@ -0,0 +1,102 @@
+import unittest
+import json
+import os
+import tempfile
+from config import Config
+from app import create_app, db
+from translations import Catalog, catalog, translate
+from utils import get_language, t
+
+class CatalogTestCase(unittest.TestCase):
+    def test_negotiate(self):
+        """Test Accept-Language negotiation with q-values and region tags"""
+        self.assertEqual(catalog.negotiate('ar'), 'ar')
+        self.assertEqual(catalog.negotiate('ar-EG,en;q=0.5'), 'ar')
+        self.assertEqual(catalog.negotiate('en;q=0.2, ar;q=0.9'), 'ar')
+        self.assertEqual(catalog.negotiate('fr, ar;q=0.8'), 'ar')
+        self.assertEqual(catalog.negotiate('ar;q=0, en-GB'), 'en')
+        self.assertEqual(catalog.negotiate('de, fr'), 'en')
+        self.assertEqual(catalog.negotiate('*'), 'en')
+        self.assertEqual(catalog.negotiate(''), 'en')
+
+    def test_fallback(self):
+        """Test fallback to the default locale for missing keys and locales"""
+        partial = Catalog(messages={'en': {'hello': 'Hello', 'bye': 'Bye'}, 'fr': {'hello': 'Bonjour'}})
+        self.assertEqual(partial.gettext('hello', 'fr'), 'Bonjour')
+        self.assertEqual(partial.gettext('bye', 'fr'), 'Bye')
+        self.assertEqual(partial.gettext('hello', 'de'), 'Hello')
+        self.assertEqual(partial.gettext('unknown', 'fr'), 'unknown')
+        self.assertEqual(partial.missing_keys({'hello', 'bye'}), {'fr': ['bye']})
+        self.assertEqual(partial.negotiate('fr-CA'), 'fr')
+
+    def test_lazy_loading(self):
+        """Test that locale files are read on first use only"""
+        with tempfile.TemporaryDirectory() as directory:
+            for locale, strings in (('en', {'hello': 'Hello'}), ('fr', {'hello': 'Bonjour'}), ('de', {})):
+                with open(os.path.join(directory, locale + '.json'), 'w', encoding='utf-8') as output:
+                    json.dump(strings, output)
+
+            files = Catalog(directory)
+            self.assertEqual(files.locales, ('de', 'en', 'fr'))
+            self.assertEqual(files.loaded(), ())
+            self.assertEqual(files.negotiate('fr-FR'), 'fr')
+            self.assertEqual(files.loaded(), ())
+            self.assertEqual(files.gettext('hello', 'fr'), 'Bonjour')
+            self.assertEqual(files.loaded(), ('en', 'fr'))
+            self.assertEqual(files.gettext('hello', 'de'), 'Hello')
+            self.assertEqual(files.preload().loaded(), ('de', 'en', 'fr'))
+
+    def test_placeholders(self):
+        """Test message formatting with placeholders"""
+        self.assertEqual(
+            translate('new_review_message', 'en', user='Ali', rating=5, field='Cairo Arena'),
+            'Ali has left a 5-star review for your field Cairo Arena'
+        )
+        message = translate('new_review_message', 'ar', user='Ali', rating=5, field='Cairo Arena')
+        self.assertIn('Ali', message)
+        self.assertIn('Cairo Arena', message)
+        self.assertNotIn('{', message)
+        self.assertEqual(translate('new_review_message', 'en', user='Ali'),
+                         'Ali has left a {rating}-star review for your field {field}')
+        self.assertEqual(translate('field_not_found', 'en', unused=1), 'Field not found')
+
+    def test_route_keys_translated(self):
+        """Test that every key used by the routes exists in every locale"""
+        app = create_app()
+        self.assertEqual(app.extensions['missing_translations'], {})
+        self.assertEqual(translate('internal_server_error', 'en'), 'Internal server error')
+        self.assertEqual(translate('field_retrieved_successfully', 'ar'), 'تم استرجاع الملعب بنجاح')
+
+    def test_strict_mode(self):
+        """Test that TRANSLATIONS_STRICT fails startup on missing keys"""
+        class StrictConfig(Config):
+            TRANSLATIONS_STRICT = True
+
+        original = catalog['ar'].pop('booking_status_updated')
+        try:
+            with self.assertRaises(RuntimeError):
+                create_app(StrictConfig)
+            app = create_app()
+            self.assertEqual(app.extensions['missing_translations'], {'ar': ['booking_status_updated']})
+        finally:
+            catalog['ar']['booking_status_updated'] = original
+
+    def test_request_locale(self):
+        """Test that the locale is resolved once per request"""
+        app = create_app()
+        with app.test_request_context(headers={'Accept-Language': 'ar-SA, en;q=0.8'}):
+            app.preprocess_request()
+            self.assertEqual(get_language(), 'ar')
+            self.assertEqual(t('field_not_found'), translate('field_not_found', 'ar'))
+        with app.app_context():
+            self.assertEqual(get_language(), 'en')
+
+        with app.app_context():
+            db.create_all()
+            response = app.test_client().get('/api/fields/999999', headers={'Accept-Language': 'en;q=0.1, ar'})
+            db.session.remove()
+            db.drop_all()
+        self.assertEqual(response.get_json()[0]['message'], translate('field_not_found', 'ar'))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,177 @@
+import unittest
+import pytest
+from datetime import date, time, datetime
+from unittest import mock
+from sqlalchemy.exc import OperationalError
+from config import Config
+from testing import get_test_app
+from models import db, User, Field, Booking, Payment, PaymentEvent, Notification, Analytics
+from fake_gateway import FakeGateway, client_transport
+from webhooks import process_payment_events, run_worker
+
+class WebhookConfig(Config):
+    PAYMENT_WEBHOOK_SECRETS = {'fawry': 'fawry-secret', 'card': 'card-secret'}
+
+@pytest.mark.usefixtures('db_transaction')
+class PaymentWebhookTestCase(unittest.TestCase):
+    def setUp(self):
+        """Set up three pending payments and a fake Fawry gateway"""
+        self.app = get_test_app(WebhookConfig)
+        self.app.config['TESTING'] = True
+        self.client = self.app.test_client()
+        self.gateway = FakeGateway(client_transport(self.client), 'fawry', 'fawry-secret')
+        
+        with self.app.app_context():
+            owner = User(name='Owner', email='owner@example.com', password='password123', role='owner')
+            player = User(name='Player', email='player@example.com', password='password123', role='user')
+            db.session.add_all([owner, player])
+            db.session.commit()
+            self.player_id = player.id
+            
+            field = Field(name='Test Field', location='Test Location', governorate='Cairo',
+                          price_per_hour=100.0, owner_id=owner.id)
+            db.session.add(field)
+            db.session.commit()
+            self.field_id = field.id
+            
+            self.transactions = []
+            for hour in (10, 12, 14):
+                booking = Booking(user_id=player.id, field_id=field.id, date=date(2030, 1, 10),
+                                  start_time=time(hour, 0), end_time=time(hour + 1, 0), total_price=100.0)
+                db.session.add(booking)
+                db.session.flush()
+                payment = Payment(booking_id=booking.id, user_id=player.id, amount=100.0, payment_method='fawry')
+                payment.transaction_id = f'txn-{hour}'
+                db.session.add(payment)
+                self.transactions.append(payment.transaction_id)
+            db.session.commit()
+
+    def _payment(self, transaction_id):
+        return Payment.query.filter_by(transaction_id=transaction_id).one()
+
+    def test_burst_is_applied_in_one_batch(self):
+        """Test that a burst is queued, then applied with notifications and revenue rows"""
+        events = [self.gateway.event(transaction_id, 'completed', 100.0) for transaction_id in self.transactions]
+        status, body = self.gateway.deliver(events)
+        self.assertEqual(status, 202)
+        self.assertEqual(body[0]['queued'], 3)
+        
+        with self.app.app_context():
+            # Nothing is applied until the worker runs
+            self.assertEqual(self._payment('txn-10').status, 'pending')
+            self.assertEqual(process_payment_events(), {'applied': 3})
+            self.assertEqual(process_payment_events(), {})
+            
+            for transaction_id in self.transactions:
+                payment = self._payment(transaction_id)
+                self.assertEqual(payment.status, 'completed')
+                self.assertIsNotNone(payment.completed_at)
+            notifications = Notification.query.filter_by(user_id=self.player_id, code='payment_status').all()
+            self.assertEqual(len(notifications), 3)
+            self.assertTrue(notifications[0].render('en')[1].endswith('has been completed'))
+            revenue = Analytics.query.filter_by(metric_name='revenue', field_id=self.field_id).all()
+            self.assertEqual(sum(row.value for row in revenue), 300.0)
+
+    def test_redelivery_is_dropped(self):
+        """Test that a callback delivered twice is queued and applied once"""
+        events = [self.gateway.event('txn-10', 'completed', 100.0)]
+        self.gateway.deliver(events)
+        status, body = self.gateway.deliver(events)
+        self.assertEqual(status, 202)
+        self.assertEqual((body[0]['queued'], body[0]['duplicates']), (0, 1))
+        
+        with self.app.app_context():
+            self.assertEqual(PaymentEvent.query.count(), 1)
+            process_payment_events()
+            self.assertEqual(Analytics.query.filter_by(metric_name='revenue').count(), 1)
+
+    def test_events_per_transaction_are_collapsed(self):
+        """Test that several callbacks for one payment make one update in arrival order"""
+        self.gateway.deliver([
+            self.gateway.event('txn-10', 'failed'),
+            self.gateway.event('txn-10', 'completed', 100.0),
+            self.gateway.event('txn-10', 'completed', 100.0),
+            self.gateway.event('txn-10', 'refunded'),
+            self.gateway.event('txn-12', 'refunded'),
+            self.gateway.event('txn-14', 'completed', 999.0),
+            self.gateway.event('unknown', 'completed'),
+        ])
+        
+        with self.app.app_context():
+            counts = process_payment_events()
+            self.assertEqual(counts, {'applied': 3, 'duplicate': 1, 'invalid_transition': 1,
+                                      'amount_mismatch': 1, 'unknown_transaction': 1})
+            self.assertEqual(self._payment('txn-10').status, 'refunded')
+            self.assertEqual(self._payment('txn-12').status, 'pending')
+            self.assertEqual(self._payment('txn-14').status, 'pending')
+            # One notification per changed payment, with its final status
+            notifications = Notification.query.filter_by(code='payment_status').all()
+            self.assertEqual([n.params['status'] for n in notifications], ['refunded'])
+            metrics = sorted(row.metric_name for row in Analytics.query.all())
+            self.assertEqual(metrics, ['payment_refunded', 'revenue'])
+
+    def test_batch_size(self):
+        """Test that the worker applies at most batch_size callbacks per transaction"""
+        self.gateway.deliver([self.gateway.event(transaction_id, 'completed') for transaction_id in self.transactions])
+        with self.app.app_context():
+            self.assertEqual(process_payment_events(batch_size=2), {'applied': 2})
+            self.assertEqual(process_payment_events(batch_size=2), {'applied': 1})
+            self.assertEqual(PaymentEvent.query.filter(PaymentEvent.processed_at.is_(None)).count(), 0)
+
+    def test_poison_event_is_skipped(self):
+        """Test that a callback that cannot be applied is marked failed and the rest of its batch applied"""
+        self.gateway.deliver([self.gateway.event(self.transactions[0], 'completed')])
+        with self.app.app_context():
+            # Stored behind the webhook's back, as a corrupted row would be
+            db.session.add(PaymentEvent(gateway='fawry', event_id='corrupt', transaction_id=self.transactions[1],
+                                        status='completed', received_at=datetime.utcnow()))
+            db.session.flush()
+            db.session.execute(db.text("UPDATE payment_events SET amount = 'n/a' WHERE event_id = 'corrupt'"))
+            db.session.commit()
+        self.gateway.deliver([self.gateway.event(self.transactions[2], 'completed')])
+        
+        logged = []
+        with self.app.app_context():
+            run_worker(batch_size=10, once=True, log=logged.append)
+            results = dict(PaymentEvent.query.with_entities(PaymentEvent.event_id, PaymentEvent.result))
+            self.assertEqual(results['corrupt'], 'failed')
+            self.assertEqual(sorted(results.values()), ['applied', 'applied', 'failed'])
+            self.assertEqual(self._payment(self.transactions[2]).status, 'completed')
+        self.assertTrue(any('Skipped payment event' in line for line in logged))
+
+    def test_database_errors_back_off(self):
+        """Test that the worker survives database errors and retries after a growing delay"""
+        error = OperationalError('SELECT', {}, Exception('server closed the connection'))
+        with self.app.app_context(), \
+                mock.patch('webhooks.process_payment_events', side_effect=[error, error, {'applied': 1}, {}]), \
+                mock.patch('webhooks.time.sleep') as sleep:
+            run_worker(interval=1.0, once=True, log=lambda line: None)
+        self.assertEqual([call.args[0] for call in sleep.call_args_list], [2.0, 4.0])
+
+    def test_rejected_callbacks(self):
+        """Test bad signatures, unknown gateways and malformed bodies"""
+        events = [self.gateway.event('txn-10', 'completed')]
+        status, _ = self.gateway.deliver(events, secret='wrong')
+        self.assertEqual(status, 401)
+        
+        status, _ = FakeGateway(client_transport(self.client), 'vodafone_cash', 'x').deliver(
+            [{'transaction_id': 'txn-10', 'status': 'SUCCESS'}])
+        self.assertEqual(status, 404)
+        
+        self.assertEqual(self.gateway.deliver(None, raw=b'not json')[0], 400)
+        self.assertEqual(self.gateway.deliver([{'transaction_id': 'txn-10', 'status': 'BOGUS'}])[0], 400)
+        
+        with self.app.app_context():
+            self.assertEqual(PaymentEvent.query.count(), 0)
+
+    def test_card_gateway_vocabulary(self):
+        """Test that each gateway's statuses are mapped to payment statuses"""
+        card = FakeGateway(client_transport(self.client), 'card', 'card-secret')
+        self.assertEqual(card.event('txn-12', 'completed')['status'], 'captured')
+        self.assertEqual(card.deliver([card.event('txn-12', 'failed')])[0], 202)
+        with self.app.app_context():
+            process_payment_events()
+            self.assertEqual(self._payment('txn-12').status, 'failed')
+
+if __name__ == '__main__':
+    unittest.main()
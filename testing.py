@@ -0,0 +1,23 @@
+"""Shared app instances for the test suite.
+
+create_app() registers every blueprint and compiles its URL rules, which
+takes tens of milliseconds. Test cases that only need a default app reuse
+one per config class instead of building a new app in every setUp. Tests
+that add routes, swap extensions or need a specific configuration keep
+calling create_app() themselves.
+"""
+from config import Config
+from app import create_app
+
+_apps = {}
+
+
+def get_test_app(config_class=Config):
+    """The shared app for config_class, with its per-test state cleared"""
+    app = _apps.get(config_class)
+    if app is None:
+        app = _apps[config_class] = create_app(config_class)
+    app.extensions['facet_cache'].clear()
+    if 'rate_limit_store' in app.extensions:
+        app.extensions['rate_limit_store'].clear()
+    return app
@@ -1,150 +1,187 @@
-# Translation dictionaries for multi-language support
-translations = {
-    'en': {
-        # Authentication messages
-        'user_created_successfully': 'User created successfully',
-        'invalid_email_or_password': 'Invalid email or password',
-        'user_logged_in_successfully': 'User logged in successfully',
-        'otp_sent_successfully': 'OTP sent successfully',
-        'invalid_otp': 'Invalid OTP',
-        'password_reset_successfully': 'Password reset successfully',
-        'user_not_found': 'User not found',
-        'unauthorized': 'Unauthorized',
-        
-        # Field messages
-        'field_created_successfully': 'Field created successfully',
-        'field_updated_successfully': 'Field updated successfully',
-        'field_deleted_successfully': 'Field deleted successfully',
-        'field_not_found': 'Field not found',
-        
-        # Booking messages
-        'booking_created_successfully': 'Booking created successfully',
-        'booking_updated_successfully': 'Booking updated successfully',
-        'booking_cancelled_successfully': 'Booking cancelled successfully',
-        'booking_not_found': 'Booking not found',
-        'field_already_booked': 'Field already booked for this time slot',
-        'cannot_book_past_time': 'Cannot book field for past time',
-        'booking_in_past_not_allowed': 'Booking in past time is not allowed',
-        
-        # Payment messages
-        'payment_created_successfully': 'Payment created successfully',
-        'payment_refunded_successfully': 'Payment refunded successfully',
-        'payment_not_found': 'Payment not found',
-        'only_completed_payments_can_be_refunded': 'Only completed payments can be refunded',
-        
-        # Review messages
-        'review_created_successfully': 'Review created successfully',
-        'review_not_found': 'Review not found',
-        'rating_must_be_between_1_and_5': 'Rating must be between 1 and 5',
-        
-        # Team messages
-        'team_created_successfully': 'Team created successfully',
-        'team_updated_successfully': 'Team updated successfully',
-        'team_deleted_successfully': 'Team deleted successfully',
-        'team_not_found': 'Team not found',
-        'cannot_remove_team_leader': 'Cannot remove team leader from team',
-        
-        # General messages
-        'access_denied': 'Access denied',
-        'error_processing_request': 'Error processing request',
-        'invalid_data': 'Invalid data',
-        'required_field_missing': 'Required field missing',
-        'email_already_exists': 'Email already exists',
-        
-        # Analytics messages
-        'dashboard_data_retrieved_successfully': 'Dashboard data retrieved successfully',
-        'booking_trends_retrieved_successfully': 'Booking trends retrieved successfully',
-        'revenue_trends_retrieved_successfully': 'Revenue trends retrieved successfully',
-        'field_performance_retrieved_successfully': 'Field performance retrieved successfully',
-        
-        # Notification messages
-        'notifications_retrieved_successfully': 'Notifications retrieved successfully',
-        'notification_marked_as_read': 'Notification marked as read',
-        'all_notifications_marked_as_read': 'All notifications marked as read',
-        'notification_deleted_successfully': 'Notification deleted successfully',
-        'unread_notifications_count_retrieved': 'Unread notifications count retrieved',
-        
-        # Export messages
-        'bookings_exported_successfully': 'Bookings exported successfully',
-        'payments_exported_successfully': 'Payments exported successfully',
-        'users_exported_successfully': 'Users exported successfully',
-    },
-    'ar': {
-        # Authentication messages
-        'user_created_successfully': 'تم إنشاء المستخدم بنجاح',
-        'invalid_email_or_password': 'البريد الإلكتروني أو كلمة المرور غير صحيحة',
-        'user_logged_in_successfully': 'تم تسجيل دخول المستخدم بنجاح',
-        'otp_sent_successfully': 'تم إرسال رمز OTP بنجاح',
-        'invalid_otp': 'رمز OTP غير صحيح',
-        'password_reset_successfully': 'تم إعادة تعيين كلمة المرور بنجاح',
-        'user_not_found': 'المستخدم غير موجود',
-        'unauthorized': 'غير مصرح',
-        
-        # Field messages
-        'field_created_successfully': 'تم إنشاء الملعب بنجاح',
-        'field_updated_successfully': 'تم تحديث الملعب بنجاح',
-        'field_deleted_successfully': 'تم حذف الملعب بنجاح',
-        'field_not_found': 'الملعب غير موجود',
-        
-        # Booking messages
-        'booking_created_successfully': 'تم إنشاء الحجز بنجاح',
-        'booking_updated_successfully': 'تم تحديث الحجز بنجاح',
-        'booking_cancelled_successfully': 'تم إلغاء الحجز بنجاح',
-        'booking_not_found': 'الحجز غير موجود',
-        'field_already_booked': 'الملعب محجوز بالفعل لهذا الوقت',
-        'cannot_book_past_time': 'لا يمكن حجز الملعب لوقت سابق',
-        'booking_in_past_not_allowed': 'الحجز في وقت سابق غير مسموح',
-        
-        # Payment messages
-        'payment_created_successfully': 'تم إنشاء الدفع بنجاح',
-        'payment_refunded_successfully': 'تم استرداد الدفع بنجاح',
-        'payment_not_found': 'الدفع غير موجود',
-        'only_completed_payments_can_be_refunded': 'يمكن استرداد المدفوعات المكتملة فقط',
-        
-        # Review messages
-        'review_created_successfully': 'تم إنشاء التقييم بنجاح',
-        'review_not_found': 'التقييم غير موجود',
-        'rating_must_be_between_1_and_5': 'يجب أن يكون التقييم بين 1 و 5',
-        
-        # Team messages
-        'team_created_successfully': 'تم إنشاء الفريق بنجاح',
-        'team_updated_successfully': 'تم تحديث الفريق بنجاح',
-        'team_deleted_successfully': 'تم حذف الفريق بنجاح',
-        'team_not_found': 'الفريق غير موجود',
-        'cannot_remove_team_leader': 'لا يمكن إزالة قائد الفريق من الفريق',
-        
-        # General messages
-        'access_denied': 'تم رفض الوصول',
-        'error_processing_request': 'خطأ في معالجة الطلب',
-        'invalid_data': 'بيانات غير صحيحة',
-        'required_field_missing': 'حقل مطلوب مفقود',
-        'email_already_exists': 'البريد الإلكتروني موجود بالفعل',
-        
-        # Analytics messages
-        'dashboard_data_retrieved_successfully': 'تم استرداد بيانات لوحة التحكم بنجاح',
-        'booking_trends_retrieved_successfully': 'تم استرداد اتجاهات الحجز بنجاح',
-        'revenue_trends_retrieved_successfully': 'تم استرداد اتجاهات الإيرادات بنجاح',
-        'field_performance_retrieved_successfully': 'تم استرداد أداء الملعب بنجاح',
-        
-        # Notification messages
-        'notifications_retrieved_successfully': 'تم استرداد الإشعارات بنجاح',
-        'notification_marked_as_read': 'تم وضع علامة كمقروء',
-        'all_notifications_marked_as_read': 'تم وضع علامة على جميع الإشعارات كمقروءة',
-        'notification_deleted_successfully': 'تم حذف الإشعار بنجاح',
-        'unread_notifications_count_retrieved': 'تم استرداد عدد الإشعارات غير المقروءة',
-        
-        # Export messages
-        'bookings_exported_successfully': 'تم تصدير الحجوزات بنجاح',
-        'payments_exported_successfully': 'تم تصدير المدفوعات بنجاح',
-        'users_exported_successfully': 'تم تصدير المستخدمين بنجاح',
-    }
-}
+"""Message catalogs for multi-language support.
+
+Each locale is a JSON file in locales/ (locales/<locale>.json) mapping
+message keys to strings. A locale is read the first time it is used and
+compiled into one flat dict with the default locale merged in, so a
+missing translation falls back to English. preload() reads every locale
+up front: done in a server's master process before it forks (gunicorn
+--preload), the workers share the loaded catalogs instead of each reading
+its own copy. Adding a language is adding a file.
+
+Messages may contain str.format placeholders, filled from keyword
+arguments: translate('new_review_message', 'ar', user=..., rating=...).
+"""
+import glob
+import json
+import os
+import re
+from collections.abc import Mapping
+from functools import lru_cache
+from prefork import fork_safe_lock
+
+DEFAULT_LOCALE = 'en'
+LOCALES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'locales')
+
+# Message keys passed literally (not built at runtime) to t(), create_response() and create_error_response()
+KEY_PATTERN = re.compile(r"""\b(?:t|create_response|create_error_response)\(\s*['"]([a-z0-9_]+)['"]\s*[,)]""")
+
+
+class FormatParams(dict):
+    """Placeholders without a value are left in the message as they are"""
+
+    def __missing__(self, key):
+        return '{' + key + '}'
+
+
+class Catalog(Mapping):
+    """Locale files loaded on first use; maps each locale to its own messages"""
+
+    def __init__(self, directory=LOCALES_DIR, default_locale=DEFAULT_LOCALE, messages=None):
+        self.directory = directory
+        self.default_locale = default_locale
+        # messages: {locale: strings} given directly instead of read from files
+        self._messages = dict(messages or {})
+        if messages is None:
+            self.locales = tuple(sorted(
+                os.path.splitext(name)[0] for name in os.listdir(directory) if name.endswith('.json')
+            ))
+        else:
+            self.locales = tuple(self._messages)
+        if default_locale not in self.locales:
+            raise ValueError(f'No catalog for the default locale {default_locale!r}')
+        self._compiled = {}
+        self._lock = fork_safe_lock(self)
+        # Lookup keys for negotiation: 'ar-eg' and 'ar' both resolve to 'ar'
+        self._lookup = {locale.lower(): locale for locale in self.locales}
+        self.negotiate = lru_cache(maxsize=512)(self._negotiate)
+
+    def __getitem__(self, locale):
+        if locale not in self.locales:
+            raise KeyError(locale)
+        messages = self._messages.get(locale)
+        if messages is None:
+            with self._lock:
+                messages = self._messages.get(locale)
+                if messages is None:
+                    path = os.path.join(self.directory, locale + '.json')
+                    with open(path, encoding='utf-8') as source:
+                        messages = self._messages[locale] = json.load(source)
+        return messages
+
+    def __iter__(self):
+        return iter(self.locales)
+
+    def __len__(self):
+        return len(self.locales)
+
+    def compiled(self, locale):
+        """Flat {key: message} for locale with the default locale merged in"""
+        strings = self._compiled.get(locale)
+        if strings is None:
+            if locale not in self.locales:
+                return self.compiled(self.default_locale)
+            strings = self._compiled[locale] = {**self[self.default_locale], **self[locale]}
+        return strings
+
+    def preload(self):
+        """Load and compile every locale"""
+        for locale in self.locales:
+            self.compiled(locale)
+        return self
+
+    def loaded(self):
+        """Locales read so far"""
+        return tuple(locale for locale in self.locales if locale in self._messages)
+
+    def gettext(self, key, locale=DEFAULT_LOCALE, **params):
+        """Message for key in locale with placeholders filled from params.
+
+        Unknown locales use the default one, unknown keys echo the key.
+        """
+        message = self.compiled(locale).get(key, key)
+        if params:
+            message = message.format_map(FormatParams(params))
+        return message
+
+    def _match(self, tag):
+        tag = tag.lower().replace('_', '-')
+        if tag in self._lookup:
+            return self._lookup[tag]
+        return self._lookup.get(tag.split('-')[0])
+
+    def _negotiate(self, header):
+        """Best supported locale for an Accept-Language header, honouring q-values"""
+        best, best_quality = None, 0.0
+        for part in (header or '').split(','):
+            tag, _, params = part.strip().partition(';')
+            tag = tag.strip()
+            if not tag:
+                continue
+            quality = 1.0
+            for param in params.split(';'):
+                name, _, value = param.strip().partition('=')
+                if name.strip().lower() == 'q':
+                    try:
+                        quality = float(value)
+                    except ValueError:
+                        quality = 0.0
+            locale = self.default_locale if tag == '*' else self._match(tag)
+            # Ties keep the first listed tag
+            if locale is not None and quality > best_quality:
+                best, best_quality = locale, quality
+        return best or self.default_locale
+
+    def missing_keys(self, keys):
+        """{locale: sorted keys} the locale does not define itself"""
+        missing = {}
+        for locale, strings in self.items():
+            absent = sorted(set(keys) - set(strings))
+            if absent:
+                missing[locale] = absent
+        return missing
+
+
+catalog = Catalog()
+
+# Kept for scripts that read the catalogs as {locale: {key: message}}
+translations = catalog
+
+
+def used_keys(paths):
+    """Message keys referenced in the given source files"""
+    keys = set()
+    for path in paths:
+        with open(path, encoding='utf-8') as source:
+            keys.update(KEY_PATTERN.findall(source.read()))
+    return keys
+
+
+@lru_cache(maxsize=1)
+def route_keys():
+    """Message keys used by the routes, scanned once per process"""
+    root = os.path.dirname(os.path.abspath(__file__))
+    paths = glob.glob(os.path.join(root, 'routes', '*.py')) + [
+        os.path.join(root, module) for module in ('utils.py', 'idempotency.py', 'ratelimit.py')
+    ]
+    return frozenset(used_keys(paths))
+
+
+def check_translations(app):
+    """Log (or raise with TRANSLATIONS_STRICT) message keys the routes use but a locale lacks"""
+    missing = catalog.missing_keys(route_keys())
+    app.extensions['missing_translations'] = missing
+    for locale, keys in missing.items():
+        message = f"Missing {locale} translations: {', '.join(keys)}"
+        if app.config.get('TRANSLATIONS_STRICT'):
+            raise RuntimeError(message)
+        app.logger.warning(message)
+    return missing
+
 
 def get_translations(language='en'):
     """Get translations for a specific language"""
-    return translations.get(language, translations['en'])
+    return catalog.compiled(language)
 
-def translate(key, language='en'):
-    """Translate a key to a specific language"""
-    lang_translations = get_translations(language)
-    return lang_translations.get(key, key)
\ No newline at end of file
+def translate(key, language='en', **params):
+    """Translate a key to a specific language, filling placeholders from params"""
+    return catalog.gettext(key, language, **params)
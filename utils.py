@@ -1,21 +1,19 @@
-from flask import request
-from translations import translate
+from flask import request, has_request_context
+from translations import translate, catalog
 
 def get_language():
-    """Get language from request headers or default to English"""
-    lang = request.headers.get('Accept-Language', 'en')
-    # Extract primary language (e.g., 'en-US' -> 'en')
-    if '-' in lang:
-        lang = lang.split('-')[0]
-    # Support only 'en' and 'ar' for now
-    if lang not in ['en', 'ar']:
-        lang = 'en'
+    """Locale negotiated from Accept-Language, resolved once per request"""
+    if not has_request_context():
+        return catalog.default_locale
+    lang = getattr(request, 'lang', None)
+    if lang is None:
+        lang = request.lang = catalog.negotiate(request.headers.get('Accept-Language', ''))
     return lang
 
-def t(key):
-    """Translate a key to the current language"""
+def t(key, **params):
+    """Translate a key to the current language, filling placeholders from params"""
     lang = get_language()
-    return translate(key, lang)
+    return translate(key, lang, **params)
 
 def create_response(message_key, data=None, status_code=200):
     """Create a standardized response with translation"""
@@ -0,0 +1,267 @@
+"""Payment gateway webhooks: verified on receipt, applied in batches by a worker.
+
+POST /api/payments/webhooks/<gateway> checks the X-Webhook-Signature header
+(hex HMAC-SHA256 of the raw body with the gateway's secret from
+PAYMENT_WEBHOOK_SECRETS), stores every callback in `payment_events` with a
+single commit and answers 202. Callbacks redelivered by the gateway (same
+gateway and event id) are dropped at that point.
+
+A body is one callback or {"events": [...]} for gateways that batch them:
+
+    {"id": "evt_1", "transaction_id": "...", "status": "PAID", "amount": 200.0}
+
+Gateway statuses are mapped to Payment.status through GATEWAY_STATUSES.
+
+`flask process-payment-events` (see the Procfile `worker`) drains the queue:
+each batch loads its payments in one query, applies the status transitions
+with the events for a transaction collapsed in arrival order, and writes the
+payment updates, the users' notifications and the revenue/refund Analytics
+rows together with the events' results in one transaction. On databases
+that support it, concurrent workers claim disjoint batches (SKIP LOCKED).
+SQLite has no row locks: two workers there would apply the same events
+twice, so run a single worker against it.
+
+A batch that fails is rolled back and its callbacks are retried one at a
+time; a callback that fails on its own is marked `failed` and skipped, so
+it cannot block the queue. Database errors (connection lost, locked) are
+retried with exponential backoff instead.
+"""
+import hashlib
+import hmac
+import json
+import time
+from datetime import date, datetime
+from sqlalchemy.exc import IntegrityError, OperationalError
+
+# Gateway status -> Payment.status
+GATEWAY_STATUSES = {
+    'vodafone_cash': {'SUCCESS': 'completed', 'FAILED': 'failed', 'REVERSED': 'refunded'},
+    'fawry': {'PAID': 'completed', 'FAILED': 'failed', 'EXPIRED': 'failed', 'CANCELED': 'failed',
+              'REFUNDED': 'refunded'},
+    'card': {'captured': 'completed', 'declined': 'failed', 'refunded': 'refunded'},
+}
+
+# Payment.status -> statuses a callback may move it to
+TRANSITIONS = {
+    'pending': {'completed', 'failed'},
+    'failed': {'completed'},  # the customer retried and the gateway captured it
+    'completed': {'refunded'},
+    'refunded': set(),
+}
+
+SIGNATURE_HEADER = 'X-Webhook-Signature'
+
+
+class InvalidWebhook(Exception):
+    """Raised for callbacks that cannot be queued; message_key is the translation key"""
+
+    def __init__(self, message_key, status_code=400):
+        super().__init__(message_key)
+        self.message_key = message_key
+        self.status_code = status_code
+
+
+def sign(secret, body):
+    """Hex HMAC-SHA256 signature of body, as the gateway computes it"""
+    return hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+
+
+def verify_signature(secret, body, signature):
+    if not secret or not signature:
+        return False
+    if signature.startswith('sha256='):
+        signature = signature[len('sha256='):]
+    return hmac.compare_digest(sign(secret, body), signature)
+
+
+def parse_events(gateway, body):
+    """[{'event_id', 'transaction_id', 'status', 'amount', 'payload'}] of a callback body"""
+    statuses = GATEWAY_STATUSES.get(gateway)
+    if statuses is None:
+        raise InvalidWebhook('unknown_gateway', 404)
+    try:
+        data = json.loads(body)
+    except ValueError:
+        raise InvalidWebhook('invalid_webhook_payload')
+    items = data.get('events') if isinstance(data, dict) and 'events' in data else [data]
+    if not isinstance(items, list) or not items:
+        raise InvalidWebhook('invalid_webhook_payload')
+
+    events = []
+    for item in items:
+        if not isinstance(item, dict) or not item.get('transaction_id'):
+            raise InvalidWebhook('invalid_webhook_payload')
+        status = statuses.get(item.get('status'))
+        if status is None:
+            raise InvalidWebhook('invalid_webhook_payload')
+        # Without an id the content identifies the callback
+        event_id = item.get('id') or hashlib.sha256(json.dumps(item, sort_keys=True).encode()).hexdigest()
+        amount = item.get('amount')
+        events.append({
+            'event_id': str(event_id)[:100],
+            'transaction_id': str(item['transaction_id']),
+            'status': status,
+            'amount': float(amount) if isinstance(amount, (int, float)) else None,
+            'payload': item,
+        })
+    return events
+
+
+def enqueue_events(gateway, events):
+    """Store new callbacks in one commit; returns (queued, duplicates)"""
+    from models import db, PaymentEvent
+
+    # Redeliveries within one body count once
+    unique = list({event['event_id']: event for event in events}.values())
+    for attempt in range(2):
+        known = {event_id for (event_id,) in db.session.query(PaymentEvent.event_id).filter(
+            PaymentEvent.gateway == gateway,
+            PaymentEvent.event_id.in_([event['event_id'] for event in unique])
+        )}
+        new = [dict(event, gateway=gateway, received_at=datetime.utcnow())
+               for event in unique if event['event_id'] not in known]
+        if new:
+            db.session.execute(db.insert(PaymentEvent), new)
+        try:
+            db.session.commit()
+            return len(new), len(events) - len(new)
+        except IntegrityError:
+            # The same callback arrived concurrently on another worker
+            db.session.rollback()
+            if attempt:
+                raise
+
+
+def _claim_batch(batch_size):
+    from models import PaymentEvent
+
+    return PaymentEvent.query.filter(
+        PaymentEvent.processed_at.is_(None)
+    ).order_by(PaymentEvent.id).limit(batch_size).with_for_update(skip_locked=True).all()
+
+
+def process_payment_events(batch_size=500):
+    """Apply one batch of queued callbacks in a single transaction; returns {result: count}"""
+    from models import db, Payment, PaymentEvent, Booking, Notification, Analytics
+
+    events = _claim_batch(batch_size)
+    if not events:
+        return {}
+
+    transaction_ids = {event.transaction_id for event in events}
+    payments = {
+        payment.transaction_id: payment
+        for payment in Payment.query.filter(Payment.transaction_id.in_(transaction_ids))
+    }
+    bookings = {
+        booking.id: booking
+        for booking in Booking.query.filter(Booking.id.in_({p.booking_id for p in payments.values()}))
+    } if payments else {}
+
+    now = datetime.utcnow()
+    today = date.today()
+    status_before = {transaction_id: payment.status for transaction_id, payment in payments.items()}
+    status_after = dict(status_before)
+    results = []
+    analytics = []
+    for event in events:
+        payment = payments.get(event.transaction_id)
+        current = status_after.get(event.transaction_id)
+        if payment is None:
+            result = 'unknown_transaction'
+        elif event.status == current:
+            result = 'duplicate'
+        elif event.status not in TRANSITIONS.get(current, ()):
+            result = 'invalid_transition'
+        elif event.status == 'completed' and event.amount is not None and abs(event.amount - payment.amount) > 0.005:
+            result = 'amount_mismatch'
+        else:
+            result = 'applied'
+            status_after[event.transaction_id] = event.status
+            booking = bookings.get(payment.booking_id)
+            metric = {'completed': 'revenue', 'refunded': 'payment_refunded'}.get(event.status)
+            if metric and booking:
+                analytics.append({'metric_name': metric, 'value': float(payment.amount), 'date': today,
+                                  'user_id': booking.user_id, 'field_id': booking.field_id, 'created_at': now})
+        results.append({'id': event.id, 'processed_at': now, 'result': result})
+
+    # One UPDATE per changed payment and one notification for its final status
+    updates, notifications = [], []
+    for transaction_id, status in status_after.items():
+        if status == status_before[transaction_id]:
+            continue
+        payment = payments[transaction_id]
+        updates.append({'id': payment.id, 'status': status,
+                        'completed_at': now if status == 'completed' else payment.completed_at})
+        booking = bookings.get(payment.booking_id)
+        if booking:
+            notifications.append({'user_id': booking.user_id, 'code': 'payment_status',
+                                  'params': {'booking': booking.id, 'status': status}, 'type': 'payment',
+                                  'is_read': False, 'created_at': now})
+
+    if updates:
+        db.session.execute(db.update(Payment), updates)
+    if notifications:
+        db.session.execute(db.insert(Notification), notifications)
+    if analytics:
+        db.session.execute(db.insert(Analytics), analytics)
+    db.session.execute(db.update(PaymentEvent), results)
+    db.session.commit()
+
+    counts = {}
+    for row in results:
+        counts[row['result']] = counts.get(row['result'], 0) + 1
+    return counts
+
+
+def _fail_next_event():
+    """Mark the oldest queued callback failed so the queue moves past it; returns its id"""
+    from models import db
+
+    events = _claim_batch(1)
+    if not events:
+        return None
+    event = events[0]
+    event.processed_at = datetime.utcnow()
+    event.result = 'failed'
+    db.session.commit()
+    return event.id
+
+
+def run_worker(batch_size=500, interval=1.0, once=False, log=print, max_backoff=60.0):
+    """Process batches until the queue is empty, then poll every `interval` seconds unless once"""
+    from models import db
+
+    isolating = 0  # callbacks left to apply one at a time after a failed batch
+    failures = 0
+    while True:
+        try:
+            counts = process_payment_events(1 if isolating else batch_size)
+            failures = 0
+        except OperationalError as e:
+            db.session.rollback()
+            failures += 1
+            delay = min(max_backoff, interval * 2 ** failures)
+            log(f'Database error, retrying in {delay:.0f}s: {e}')
+            time.sleep(delay)
+            continue
+        except Exception as e:
+            db.session.rollback()
+            if not isolating:
+                log(f'Batch failed, applying its callbacks one at a time: {e!r}')
+                isolating = batch_size
+            else:
+                log(f'Skipped payment event {_fail_next_event()}: {e!r}')
+                isolating -= 1
+            continue
+        finally:
+            db.session.remove()
+
+        if counts:
+            isolating = max(0, isolating - 1)
+            log(', '.join(f'{count} {result}' for result, count in sorted(counts.items())))
+            continue
+        isolating = 0
+        if once:
+            return
+        time.sleep(interval)